@@ -0,0 +1,71 @@
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+
+from .services.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
+from .services.tracing import trace
+from .similarity_search import AsyncSearchService, format_response, query_from_body
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Created at startup rather than import, so importing the app does no I/O
+    app.state.search_service = AsyncSearchService()
+    yield
+    await app.state.search_service.vec.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), name="static")
+templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
+# The templates are shared with the Flask app, which calls url_for('static', filename=...)
+templates.env.globals["url_for"] = lambda endpoint, filename: f"/{endpoint}/{filename}"
+
+
+@app.get('/')
+async def home(request: Request):
+    return templates.TemplateResponse(request, 'search.html')
+
+
+@app.post('/search')
+async def search(request: Request):
+    try:
+        body = await request.json()
+        query = query_from_body(body)
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    try:
+        with trace() as request_trace:
+            response = await request.app.state.search_service.perform_search(query)
+
+        payload = {'success': True, 'result': format_response(response)}
+        # Per-stage milliseconds for this request, on request
+        if body.get('timings'):
+            payload['timings'] = request_trace.breakdown()
+        return payload
+    except Exception as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+@app.post('/search/stream')
+async def search_stream(request: Request):
+    try:
+        query = query_from_body(await request.json())
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    return StreamingResponse(
+        request.app.state.search_service.stream_search(query),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.get('/metrics')
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,72 @@
+"""
+Build the synonym table used to expand keyword search queries.
+
+Walks WordNet once, offline, for every term in the corpus vocabulary (from the
+term statistics kept by ingestion) and keeps only synonyms whose words all
+occur in the corpus, so every OR branch of a keyword query can actually match.
+Run after ingesting new documents:
+
+    python -m app.build_synonyms
+"""
+
+import argparse
+import logging
+from typing import Dict, List, Set
+
+import nltk
+from nltk.corpus import wordnet
+
+from .config.settings import get_settings
+from .database.vector_store import VectorStore
+from .services.synonyms import SynonymTable
+
+
+def corpus_synonyms(vocabulary: Set[str], max_expansions: int) -> Dict[str, List[str]]:
+    """
+    Look up WordNet synonyms for each vocabulary term.
+
+    Args:
+        vocabulary: The lowercased terms occurring in the corpus.
+        max_expansions: The maximum number of synonyms kept per term.
+
+    Returns:
+        Synonyms per term, most common sense first, restricted to the vocabulary.
+    """
+    synonyms: Dict[str, List[str]] = {}
+    for term in sorted(vocabulary):
+        if not term.isalpha():
+            continue
+        found: Dict[str, None] = {}
+        for synset in wordnet.synsets(term):
+            for lemma in synset.lemmas():
+                name = lemma.name().lower().replace("_", " ").replace("-", " ")
+                words = name.split()
+                if name != term and words and all(word in vocabulary for word in words):
+                    found[name] = None
+        if found:
+            synonyms[term] = list(found)[:max_expansions]
+    return synonyms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", help="Where to write the table (default: SYNONYMS_PATH)")
+    parser.add_argument("--max-expansions", type=int, help="Synonyms kept per term")
+    args = parser.parse_args()
+
+    settings = get_settings().synonyms
+    output = args.output or settings.path
+    max_expansions = args.max_expansions or settings.max_expansions
+
+    _, document_frequency = VectorStore().term_stats.load()
+    if not document_frequency:
+        raise SystemExit("No term statistics found; ingest documents first.")
+
+    nltk.download("wordnet", quiet=True)
+    synonyms = corpus_synonyms(set(document_frequency), max_expansions)
+    terms = SynonymTable.write(output, synonyms)
+    logging.info(f"Wrote synonyms for {terms} of {len(document_frequency)} terms to {output}")
+
+
+if __name__ == "__main__":
+    main()
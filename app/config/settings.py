@@ -2,7 +2,7 @@ import logging
 import os
 from datetime import timedelta
 from functools import lru_cache
-from typing import Optional
+from typing import List, Optional
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
@@ -11,9 +11,6 @@ from pydantic import BaseModel, Field
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DOTENV_PATH = os.path.join(BASE_DIR, "..", ".env")  # Adjust to point to the project root
 
-# Load the .env file
-load_dotenv(dotenv_path=DOTENV_PATH)
-
 
 def setup_logging():
     """Configure basic logging for the application."""
@@ -34,8 +31,83 @@ class OpenAISettings(LLMSettings):
     """OpenAI-specific settings extending LLMSettings."""
 
     api_key: str = Field(default_factory=lambda: os.getenv("OPENAI_API_KEY"))
+    base_url: Optional[str] = Field(default_factory=lambda: os.getenv("OPENAI_BASE_URL"))
     default_model: str = Field(default="gpt-4o-mini")
     embedding_model: str = Field(default="text-embedding-3-small")
+    # Shortened embeddings via the API's ``dimensions`` parameter (text-embedding-3
+    # models); None requests the model's full size
+    embedding_dimensions: Optional[int] = Field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_DIMENSIONS") or 0) or None
+    )
+    embedding_batch_size: int = Field(default=512)
+    embedding_batch_max_tokens: int = Field(default=250_000)
+
+
+class EmbeddingSchedulerSettings(BaseModel):
+    """Concurrency, rate-limit and retry settings for bulk embedding."""
+
+    max_concurrency: int = 4
+    requests_per_minute: int = 3_000
+    tokens_per_minute: int = 1_000_000
+    max_retries: int = 6
+    backoff_base_seconds: float = 1.0
+    backoff_max_seconds: float = 60.0
+
+
+class EmbeddingCacheSettings(BaseModel):
+    """Settings for the persistent on-disk embedding cache."""
+
+    enabled: bool = True
+    path: str = Field(
+        default_factory=lambda: os.getenv(
+            "EMBEDDING_CACHE_PATH",
+            os.path.join(BASE_DIR, "..", "..", ".cache", "embeddings.sqlite"),
+        )
+    )
+    max_entries: int = 200_000
+
+
+class IngestionSettings(BaseModel):
+    """Settings for the streaming PDF ingestion pipeline."""
+
+    chunk_size: int = Field(default_factory=lambda: int(os.getenv("CHUNK_SIZE", "500")))
+    chunk_overlap: int = Field(default_factory=lambda: int(os.getenv("CHUNK_OVERLAP", "50")))
+    parse_workers: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    queue_size: int = 4
+    upsert_batch_size: int = 1000
+    # Parsed files diffed against the table with one query, and embedded together
+    lookup_batch_files: int = 16
+
+
+class QueryCacheSettings(BaseModel):
+    """Settings for the search pipeline result cache."""
+
+    enabled: bool = True
+    ttl_seconds: float = 3600.0
+    similarity_threshold: float = 0.95
+    max_entries: int = 1000
+
+
+class KeywordSettings(BaseModel):
+    """Settings for extracting keyword search terms from queries."""
+
+    strategy: str = Field(default_factory=lambda: os.getenv("KEYWORD_STRATEGY", "local"))
+    max_keywords: int = 2
+    llm_model: str = "gpt-4o-mini"
+    cache_size: int = 1024
+
+
+class SynonymSettings(BaseModel):
+    """Settings for the precomputed synonym table used to expand keyword queries."""
+
+    enabled: bool = True
+    path: str = Field(
+        default_factory=lambda: os.getenv(
+            "SYNONYMS_PATH",
+            os.path.join(BASE_DIR, "..", "..", ".cache", "synonyms.tsv"),
+        )
+    )
+    max_expansions: int = 3
 
 
 class CohereSettings(BaseModel):
@@ -44,32 +116,137 @@ class CohereSettings(BaseModel):
     api_key: str = Field(default_factory=lambda: os.getenv("COHERE_API_KEY"))
 
 
+class RerankerSettings(BaseModel):
+    """Settings for reranking hybrid search results."""
+
+    provider: str = Field(default_factory=lambda: os.getenv("RERANKER_PROVIDER", "cohere"))
+    cohere_model: str = "rerank-english-v3.0"
+    local_model_path: Optional[str] = Field(
+        default_factory=lambda: os.getenv("RERANKER_MODEL_PATH")
+    )
+    local_tokenizer_path: Optional[str] = Field(
+        default_factory=lambda: os.getenv("RERANKER_TOKENIZER_PATH")
+    )
+    batch_size: int = 32
+    max_length: int = 512
+    cache_size: int = 10_000
+
+
 class DatabaseSettings(BaseModel):
     """Database connection settings."""
 
     service_url: str = Field(default_factory=lambda: os.getenv("TIMESCALE_SERVICE_URL"))
 
 
+class SearchSettings(BaseModel):
+    """Settings for hybrid retrieval."""
+
+    # "fused": one SQL statement ranking by weighted reciprocal-rank fusion;
+    # "union": separate keyword and semantic queries, concatenated and deduplicated
+    hybrid_mode: str = Field(default_factory=lambda: os.getenv("HYBRID_MODE", "fused"))
+    rrf_k: int = 60
+    semantic_weight: float = 1.0
+    keyword_weight: float = 1.0
+    # Candidates per retriever, reranking and results kept for the answer
+    keyword_k: int = 10
+    semantic_k: int = 10
+    rerank: bool = True
+    top_n: int = 5
+    # DiskANN query-time parameters; None uses the pgvectorscale defaults
+    diskann_query_search_list_size: Optional[int] = None
+    diskann_query_rescore: Optional[int] = None
+    # With IndexSettings.binary_quantization: Hamming-distance candidates fetched
+    # per result, then rescored with the full-precision embeddings
+    binary_rescore_factor: int = 10
+
+
 class VectorStoreSettings(BaseModel):
     """Settings for the VectorStore."""
 
     table_name: str = "documents"
-    embedding_dimensions: int = 1536
+    # Must match the embeddings stored; changing it requires a new table
+    embedding_dimensions: int = Field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_DIMENSIONS") or 1536)
+    )
     time_partition_interval: timedelta = timedelta(days=7)
+    pool_min_size: int = 1
+    pool_max_size: int = 10
+    pool_timeout: float = 30.0
+    pool_max_idle: float = 600.0
+    pool_check_connections: bool = True
+    pool_wait_warning_ms: float = 100.0
+    search_workers: int = 8
+    copy_batch_size: int = 5000
+    # How often a process checks the table version for changes made by others
+    version_check_seconds: float = 1.0
+
+
+class LocalIndexSettings(BaseModel):
+    """Settings for the in-process exact (brute-force) index used for small tables."""
+
+    # "auto": search in process while the table has at most max_rows rows;
+    # "exact": always search in process; "ann": always query the DiskANN index
+    mode: str = Field(default_factory=lambda: os.getenv("LOCAL_INDEX_MODE", "auto"))
+    max_rows: int = 10_000
+    # "float32" or "float16" (half the memory, scored in float32 blocks)
+    dtype: str = "float32"
+    path: str = Field(
+        default_factory=lambda: os.getenv(
+            "LOCAL_INDEX_PATH",
+            os.path.join(BASE_DIR, "..", "..", ".cache", "local_index"),
+        )
+    )
+
+
+class IndexSettings(BaseModel):
+    """Build parameters for the DiskANN and keyword search indexes.
+
+    DiskANN parameters left as None use the pgvectorscale defaults.
+    """
+
+    diskann_num_neighbors: Optional[int] = None
+    diskann_search_list_size: Optional[int] = None
+    diskann_max_alpha: Optional[float] = None
+    diskann_storage_layout: Optional[str] = None
+    diskann_num_bits_per_dimension: Optional[int] = None
+    maintenance_work_mem: str = "1GB"
+    # ts_rank_cd weights for the {D, C, B, A} tsvector labels; titles are A, contents B
+    keyword_rank_weights: List[float] = [0.1, 0.2, 0.4, 1.0]
+    bulk_load: bool = Field(default_factory=lambda: os.getenv("BULK_LOAD", "0") == "1")
+    # Index binary_quantize(embedding) with HNSW (bit_hamming_ops) instead of
+    # building DiskANN, and search it first (see SearchSettings.binary_rescore_factor)
+    binary_quantization: bool = Field(
+        default_factory=lambda: os.getenv("BINARY_QUANTIZATION", "0") == "1"
+    )
 
 
 class Settings(BaseModel):
     """Main settings class combining all sub-settings."""
 
     openai: OpenAISettings = Field(default_factory=OpenAISettings)
+    embedding_scheduler: EmbeddingSchedulerSettings = Field(
+        default_factory=EmbeddingSchedulerSettings
+    )
+    embedding_cache: EmbeddingCacheSettings = Field(
+        default_factory=EmbeddingCacheSettings
+    )
+    ingestion: IngestionSettings = Field(default_factory=IngestionSettings)
+    query_cache: QueryCacheSettings = Field(default_factory=QueryCacheSettings)
+    keywords: KeywordSettings = Field(default_factory=KeywordSettings)
+    synonyms: SynonymSettings = Field(default_factory=SynonymSettings)
     cohere: CohereSettings = Field(default_factory=CohereSettings)
+    reranker: RerankerSettings = Field(default_factory=RerankerSettings)
     database: DatabaseSettings = Field(default_factory=DatabaseSettings)
     vector_store: VectorStoreSettings = Field(default_factory=VectorStoreSettings)
+    search: SearchSettings = Field(default_factory=SearchSettings)
+    index: IndexSettings = Field(default_factory=IndexSettings)
+    local_index: LocalIndexSettings = Field(default_factory=LocalIndexSettings)
 
 
 @lru_cache()
 def get_settings() -> Settings:
-    """Create and return a cached instance of the Settings."""
+    """Load the .env file, then create and return a cached instance of the Settings."""
+    load_dotenv(dotenv_path=DOTENV_PATH)
     settings = Settings()
     setup_logging()
     return settings
\ No newline at end of file
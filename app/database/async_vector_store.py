@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from ..services.tracing import span
+from .results import SearchResult, results_to_dataframe
+from .vector_store import VectorStore, estimate_tokens
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from ..services.reranker import Reranker
+    from openai import AsyncOpenAI
+    from timescale_vector import client
+
+
+class AsyncVectorStore:
+    """
+    Async counterpart of VectorStore for the ASGI app.
+
+    Network calls go through async clients (OpenAI, Timescale Vector, the async
+    psycopg pool and the reranker's ``arerank``), so one event loop can serve many
+    searches at once. Configuration, the embedding cache, the reranker, SQL and
+    result shaping are shared with the wrapped sync VectorStore.
+    """
+
+    def __init__(self, store: Optional[VectorStore] = None):
+        """Share settings and helpers with ``store``; the async clients are created on first use."""
+        self.store = store or VectorStore()
+        self.settings = self.store.settings
+        self.vector_settings = self.store.vector_settings
+        self.embedding_model = self.store.embedding_model
+
+    @property
+    def openai_client(self) -> AsyncOpenAI:
+        """The async OpenAI client used for embeddings."""
+
+        def factory() -> AsyncOpenAI:
+            from openai import AsyncOpenAI
+
+            return AsyncOpenAI(
+                api_key=self.settings.openai.api_key,
+                base_url=self.settings.openai.base_url,
+            )
+
+        return self.store._lazy_client("async_openai", factory)
+
+    @property
+    def vec_client(self) -> client.Async:
+        """The async Timescale Vector client."""
+
+        def factory() -> client.Async:
+            from timescale_vector import client
+
+            return client.Async(
+                self.settings.database.service_url,
+                self.vector_settings.table_name,
+                self.vector_settings.embedding_dimensions,
+                time_partition_interval=self.vector_settings.time_partition_interval,
+            )
+
+        return self.store._lazy_client("async_vec", factory)
+
+    @property
+    def reranker(self) -> Reranker:
+        """The reranker shared with the sync store."""
+        return self.store.reranker
+
+    async def close(self) -> None:
+        """Close the async connection pool."""
+        await self.store.aclose()
+
+    async def check_for_changes(self) -> bool:
+        """
+        Notify the change listeners if the table changed outside this process.
+
+        See VectorStore.check_for_changes; the version is only read (in a
+        worker thread) when the check interval has passed.
+        """
+        if not self.store.table_version.due():
+            return False
+        return await asyncio.to_thread(self.store.check_for_changes)
+
+    async def get_embedding(self, text: str) -> List[float]:
+        """
+        Generate embedding for the given text, using the shared embedding cache.
+
+        Args:
+            text: The input text to generate an embedding for.
+
+        Returns:
+            A list of floats representing the embedding.
+        """
+        text = text.replace("\n", " ")
+        cache = self.store.embedding_cache
+        with span("embedding") as attributes:
+            if cache:
+                # SQLite lookups block, so they run in a worker thread
+                embedding = await asyncio.to_thread(cache.get, text)
+                attributes["cache_hit"] = embedding is not None
+                if embedding is not None:
+                    logging.info("Embedding served from cache")
+                    return embedding
+
+            start_time = time.time()
+            response = await self.openai_client.embeddings.create(
+                input=[text],
+                model=self.embedding_model,
+                **self.store.embedding_request_options(),
+            )
+            embedding = response.data[0].embedding
+            attributes["tokens"] = estimate_tokens(text)
+            elapsed_time = time.time() - start_time
+            logging.info(f"Embedding generated in {elapsed_time:.3f} seconds")
+
+        if cache:
+            await asyncio.to_thread(cache.put, text, embedding)
+        return embedding
+
+    async def semantic_search(
+        self,
+        query: str,
+        limit: int = 5,
+        metadata_filter: Union[dict, List[dict]] = None,
+        predicates: Optional[client.Predicates] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None,
+        return_dataframe: bool = False,
+        query_embedding: Optional[List[float]] = None,
+        include_embedding: bool = False,
+    ) -> Union[List[SearchResult], pd.DataFrame]:
+        """
+        Query the vector database for similar embeddings based on input text.
+
+        See VectorStore.semantic_search for the filtering options.
+        """
+        await self.check_for_changes()
+        if query_embedding is None:
+            query_embedding = await self.get_embedding(query)
+
+        start_time = time.time()
+        # Loading or building the local index does blocking I/O, so it runs in a thread
+        local_index = await asyncio.to_thread(
+            self.store._ready_local_index, predicates, time_range
+        )
+        with span("semantic_search", exact=local_index is not None) as attributes:
+            if local_index is not None:
+                # The matrix product is CPU-bound (NumPy releases the GIL for it)
+                results = await asyncio.to_thread(
+                    local_index.search, query_embedding, limit, metadata_filter, include_embedding
+                )
+            else:
+                if predicates or time_range:
+                    search_args = self.store._build_search_args(
+                        limit, metadata_filter, predicates, time_range
+                    )
+                    rows = await self.vec_client.search(query_embedding, **search_args)
+                else:
+                    search_sql, params = self.store._semantic_search_query(
+                        query_embedding, limit, metadata_filter, include_embedding
+                    )
+                    async with self.store.async_connection() as conn:
+                        query_settings = self.store._ann_query_settings_sql(limit)
+                        if query_settings:
+                            await conn.execute(*query_settings)
+                        cur = await conn.execute(search_sql, params)
+                        rows = await cur.fetchall()
+                results = self.store._semantic_results(rows, include_embedding)
+            attributes["candidates"] = len(results)
+        self.store._log_search_time(
+            "Exact" if local_index is not None else "Vector", time.time() - start_time
+        )
+
+        return results_to_dataframe(results) if return_dataframe else results
+
+    async def extract_keywords(self, query: str) -> List[str]:
+        """Extract search keywords from the query with the configured strategy."""
+        return await self.store.keyword_extractor.aextract(query)
+
+    async def build_keyword_query(self, query: str) -> str:
+        """Turn a natural-language query into a full-text search query."""
+        with span("keyword_extraction") as attributes:
+            keywords = await self.extract_keywords(query)
+            logging.info(f"Extracted keywords: {keywords}")
+            search_query = self.store._keywords_to_tsquery(keywords)
+            attributes["keywords"] = len(keywords)
+        return search_query
+
+    async def keyword_search(
+        self,
+        query: str,
+        limit: int = 5,
+        return_dataframe: bool = False,
+        search_query: Optional[str] = None,
+    ) -> Union[List[SearchResult], pd.DataFrame]:
+        """
+        Perform a keyword search on the contents of the vector store.
+
+        See VectorStore.keyword_search for details.
+        """
+        await self.check_for_changes()
+        if search_query is None:
+            search_query = await self.build_keyword_query(query)
+
+        start_time = time.time()
+        with span("keyword_search") as attributes:
+            async with self.store.async_connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(self.store._keyword_search_sql(), (search_query, limit))
+                    results = self.store._keyword_results(await cur.fetchall())
+            attributes["candidates"] = len(results)
+        self.store._log_search_time("Keyword", time.time() - start_time)
+
+        return results_to_dataframe(results) if return_dataframe else results
+
+    async def fused_search(
+        self,
+        query: str,
+        keyword_k: int = 5,
+        semantic_k: int = 5,
+        limit: Optional[int] = None,
+        return_dataframe: bool = False,
+        query_embedding: Optional[List[float]] = None,
+        search_query: Optional[str] = None,
+    ) -> Union[List[SearchResult], pd.DataFrame]:
+        """
+        Retrieve keyword and semantic candidates in one SQL statement, ranked by
+        weighted reciprocal-rank fusion.
+
+        See VectorStore.fused_search for details.
+        """
+        await self.check_for_changes()
+        if query_embedding is None:
+            query_embedding = await self.get_embedding(query)
+        if search_query is None:
+            search_query = await self.build_keyword_query(query)
+
+        start_time = time.time()
+        with span("fused_search") as attributes:
+            async with self.store.async_connection() as conn:
+                async with conn.cursor() as cur:
+                    query_settings = self.store._ann_query_settings_sql(semantic_k)
+                    if query_settings:
+                        await cur.execute(*query_settings)
+                    await cur.execute(
+                        self.store._fused_search_sql(),
+                        self.store._fused_search_params(
+                            query_embedding, search_query, keyword_k, semantic_k, limit
+                        ),
+                    )
+                    results = self.store._fused_results(await cur.fetchall())
+            attributes["candidates"] = len(results)
+        self.store._log_search_time("Fused", time.time() - start_time)
+
+        return results_to_dataframe(results) if return_dataframe else results
+
+    async def hybrid_search(
+        self,
+        query: str,
+        keyword_k: int = 5,
+        semantic_k: int = 5,
+        rerank: bool = False,
+        top_n: int = 5,
+        return_timings: bool = False,
+        mode: Optional[str] = None,
+        return_dataframe: bool = False,
+        query_embedding: Optional[List[float]] = None,
+        search_query: Optional[str] = None,
+    ) -> Union[
+        List[SearchResult],
+        pd.DataFrame,
+        Tuple[Union[List[SearchResult], pd.DataFrame], Dict[str, float]],
+    ]:
+        """
+        Perform a hybrid search with the retrieval steps running concurrently.
+
+        See VectorStore.hybrid_search for details.
+        """
+        await self.check_for_changes()
+        mode = mode or self.settings.search.hybrid_mode
+        timings: Dict[str, float] = {}
+        start_time = time.time()
+
+        async def timed(stage: str, awaitable: Any) -> Any:
+            stage_start = time.time()
+            try:
+                return await awaitable
+            finally:
+                timings[stage] = time.time() - stage_start
+
+        async def keyword_query() -> str:
+            if search_query is not None:
+                return search_query
+            return await timed("keyword_extraction", self.build_keyword_query(query))
+
+        async def embedding() -> List[float]:
+            if query_embedding is not None:
+                return query_embedding
+            return await timed("embedding", self.get_embedding(query))
+
+        async def keyword_branch() -> List[SearchResult]:
+            return await timed(
+                "keyword_search",
+                self.keyword_search(query, limit=keyword_k, search_query=await keyword_query()),
+            )
+
+        async def semantic_branch() -> List[SearchResult]:
+            return await timed(
+                "semantic_search",
+                self.semantic_search(query, limit=semantic_k, query_embedding=await embedding()),
+            )
+
+        with span("hybrid_search", mode=mode) as attributes:
+            if mode == "fused":
+                fused_query, fused_embedding = await asyncio.gather(keyword_query(), embedding())
+                combined_results = await timed(
+                    "fused_search",
+                    self.fused_search(
+                        query,
+                        keyword_k=keyword_k,
+                        semantic_k=semantic_k,
+                        query_embedding=fused_embedding,
+                        search_query=fused_query,
+                    ),
+                )
+            elif mode == "union":
+                keyword_results, semantic_results = await asyncio.gather(
+                    keyword_branch(), semantic_branch()
+                )
+                combined_results = self.store._combine_results(keyword_results, semantic_results)
+            else:
+                raise ValueError(f"Unsupported hybrid search mode: {mode}")
+            timings["retrieval"] = time.time() - start_time
+
+            if rerank:
+                combined_results = await timed(
+                    "rerank", self._rerank_results(query, combined_results, top_n)
+                )
+            attributes["candidates"] = len(combined_results)
+
+        timings["total"] = time.time() - start_time
+        logging.info(
+            "Hybrid search timings: "
+            + ", ".join(f"{stage}={elapsed:.3f}s" for stage, elapsed in timings.items())
+        )
+
+        if return_dataframe:
+            combined_results = results_to_dataframe(combined_results)
+        if return_timings:
+            return combined_results, timings
+        return combined_results
+
+    async def _rerank_results(
+        self, query: str, combined_results: List[SearchResult], top_n: int
+    ) -> List[SearchResult]:
+        """Rerank the combined search results with the configured reranker."""
+        with span("rerank", candidates=len(combined_results)):
+            ranking = await self.reranker.arerank(
+                query,
+                [result.content for result in combined_results],
+                top_n,
+                ids=[result.id for result in combined_results],
+            )
+        return self.store._reranked_results(combined_results, ranking)
@@ -0,0 +1,565 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .results import SearchResult
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Rows scored per block when float16 embeddings are upcast to float32
+_SCORE_BLOCK_ROWS = 8192
+# Metadata filter masks cached per snapshot
+_MAX_FILTER_MASKS = 128
+
+
+class _Snapshot:
+    """
+    The index contents at one table version (see TableVersion); changes build a
+    new snapshot and swap it in.
+    """
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        ids: List[str],
+        metadata: List[dict],
+        contents: List[str],
+        version: Optional[str] = None,
+        mtime_ns: int = 0,
+        saved: bool = True,
+    ):
+        self.matrix = matrix
+        self.ids = ids
+        self.metadata = metadata
+        self.contents = contents
+        self.version = version
+        self.mtime_ns = mtime_ns
+        # False for snapshots made by applying writes, until they are saved
+        self.saved = saved
+        self.positions = {record_id: i for i, record_id in enumerate(ids)}
+        self.filter_masks: Dict[str, np.ndarray] = {}
+
+
+class LocalVectorIndex:
+    """
+    Exact nearest-neighbour search over the table's embeddings, in process.
+
+    The unit-normalized embeddings are kept in one contiguous float32 (or
+    float16) matrix saved as ``<table>.npy`` and memory-mapped on load, with
+    ids, metadata and contents alongside in ``<table>.json``. A query is a
+    single matrix-vector product over the rows passing the metadata prefilter,
+    then ``argpartition`` for the top k, which beats a database round trip for
+    tables of a few thousand chunks.
+
+    Every snapshot records the table version it reflects (see TableVersion:
+    the table's oid and a write counter kept by a trigger), and is only used
+    while the table is at that version. VectorStore.upsert_records and
+    VectorStore.delete read the version before and after their write, in the
+    writing transaction, and apply their changes to the snapshot in memory if
+    it is at the version before; the result is saved when the index is next
+    used, so a batched load writes no files. Any other change, e.g. another
+    client's write or a dropped and re-seeded table, makes the next search load
+    a saved snapshot at the current version or rebuild it from the table.
+    Without the version table (before create_tables() has run) snapshots are
+    only told apart by file mtime, and writes remove the saved files.
+
+    Example:
+        index = LocalVectorIndex(vector_store, ".cache/local_index", max_rows=10_000)
+        if index.ready():
+            results = index.search(query_embedding, limit=5)
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        directory: str,
+        dtype: str = "float32",
+        max_rows: Optional[int] = None,
+    ):
+        table_name = vector_store.vector_settings.table_name
+        self.vector_store = vector_store
+        self.matrix_path = os.path.join(directory, f"{table_name}.npy")
+        self.records_path = os.path.join(directory, f"{table_name}.json")
+        self.dtype = dtype
+        self.max_rows = max_rows
+        self._snapshot: Optional[_Snapshot] = None
+        # True once the table is known to exceed max_rows, until its version changes
+        self._too_large = False
+        self._too_large_version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> Optional[int]:
+        """The number of indexed rows, or None if the index isn't loaded."""
+        snapshot = self._snapshot
+        return len(snapshot.ids) if snapshot is not None else None
+
+    def ready(self) -> bool:
+        """
+        Make sure the index is loaded and current, loading or building it if needed.
+
+        Returns:
+            False if the table has more than ``max_rows`` rows, so the database
+            should be searched instead.
+        """
+        version = self.vector_store.table_version.current()
+        if self._too_large:
+            if version is None or version == self._too_large_version:
+                return False
+            # The table changed since it was counted; count it again
+            self._too_large = False
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.saved and self._is_current(snapshot, version):
+            return True
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or not self._is_current(snapshot, version):
+                if not self._load(version) and not self._too_large:
+                    self._build()
+            elif not snapshot.saved:
+                # Written to by this process since it was saved
+                self._save(snapshot)
+        return self._snapshot is not None
+
+    def build(self) -> int:
+        """
+        Rebuild the index from the table.
+
+        Returns:
+            The number of indexed rows.
+        """
+        with self._lock:
+            self._too_large = False
+            self._build()
+        return self.size or 0
+
+    def delete_files(self) -> None:
+        """Forget the index and remove its saved files, e.g. after dropping the table."""
+        with self._lock:
+            self._snapshot = None
+            self._too_large = False
+            self._remove_files()
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        limit: int = 5,
+        metadata_filter: Union[dict, List[dict]] = None,
+        include_embedding: bool = False,
+    ) -> List[SearchResult]:
+        """
+        Return the ``limit`` rows closest to the query by cosine distance.
+
+        Args:
+            query_embedding: The query embedding.
+            limit: The maximum number of results to return.
+            metadata_filter: Keep only rows whose metadata has these key-value pairs,
+                or those of any dict in a list (like ``metadata @> filter``).
+            include_embedding: Whether to return the embeddings too.
+        """
+        import numpy as np
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RuntimeError("The local index is not loaded; call ready() first")
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        if metadata_filter:
+            rows = np.flatnonzero(self._filter_mask(snapshot, metadata_filter))
+            scores = self._scores(snapshot.matrix[rows], query)
+        else:
+            rows = None
+            scores = self._scores(snapshot.matrix, query)
+
+        k = min(limit, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            row = int(rows[i]) if rows is not None else int(i)
+            results.append(
+                SearchResult(
+                    id=snapshot.ids[row],
+                    content=snapshot.contents[row],
+                    search_type="semantic",
+                    metadata=snapshot.metadata[row],
+                    distance=float(1.0 - scores[i]),
+                    embedding=(
+                        snapshot.matrix[row].astype(np.float32).tolist()
+                        if include_embedding
+                        else None
+                    ),
+                )
+            )
+        return results
+
+    def apply_upsert(
+        self,
+        ids: List[Union[str, uuid.UUID]],
+        metadata: List[dict],
+        contents: List[str],
+        embeddings: np.ndarray,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> None:
+        """
+        Insert or replace rows written between two table versions.
+
+        The rows are applied in memory to the snapshot if it is at version
+        ``before``, making it a snapshot at ``after``. Otherwise (no index loaded,
+        or the table changed some other way too) the index is loaded or rebuilt
+        on next use instead.
+        """
+        import numpy as np
+
+        with self._lock:
+            snapshot = self._snapshot_at(before)
+            if snapshot is None:
+                return
+            ids = [str(record_id) for record_id in ids]
+            new_rows = self._normalized(np.asarray(embeddings, dtype=np.float32))
+            record_ids, record_metadata = list(snapshot.ids), list(snapshot.metadata)
+            record_contents = list(snapshot.contents)
+            updated, appended = [], []
+            for i, record_id in enumerate(ids):
+                position = snapshot.positions.get(record_id)
+                if position is None:
+                    appended.append(i)
+                    record_ids.append(record_id)
+                    record_metadata.append(metadata[i])
+                    record_contents.append(contents[i])
+                else:
+                    updated.append((position, i))
+                    record_metadata[position] = metadata[i]
+                    record_contents[position] = contents[i]
+
+            if self.max_rows is not None and len(record_ids) > self.max_rows:
+                logging.info(
+                    f"Table has more than {self.max_rows} rows; dropping the local index"
+                )
+                self._discard(after)
+                return
+
+            matrix = np.concatenate([snapshot.matrix, new_rows[appended]])
+            for position, i in updated:
+                matrix[position] = new_rows[i]
+            self._snapshot = _Snapshot(
+                matrix, record_ids, record_metadata, record_contents, after, saved=False
+            )
+
+    def apply_metadata(
+        self,
+        ids: List[Union[str, uuid.UUID]],
+        metadata: List[dict],
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> None:
+        """Replace the metadata of rows updated between two table versions (see apply_upsert)."""
+        with self._lock:
+            snapshot = self._snapshot_at(before)
+            if snapshot is None:
+                return
+            record_metadata = list(snapshot.metadata)
+            for record_id, values in zip(ids, metadata):
+                position = snapshot.positions.get(str(record_id))
+                if position is not None:
+                    record_metadata[position] = values
+            self._snapshot = _Snapshot(
+                snapshot.matrix,
+                snapshot.ids,
+                record_metadata,
+                snapshot.contents,
+                after,
+                saved=False,
+            )
+
+    def apply_delete(
+        self,
+        ids: Optional[List[str]] = None,
+        metadata_filter: Optional[dict] = None,
+        delete_all: bool = False,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> None:
+        """
+        Remove rows deleted between two table versions, by id, by metadata filter
+        or all of them (see apply_upsert).
+        """
+        import numpy as np
+
+        with self._lock:
+            self._too_large = False
+            snapshot = self._snapshot_at(before)
+            if snapshot is None:
+                return
+            if delete_all:
+                keep = np.zeros(len(snapshot.ids), dtype=bool)
+            elif metadata_filter:
+                keep = ~self._filter_mask(snapshot, metadata_filter)
+            else:
+                keep = np.ones(len(snapshot.ids), dtype=bool)
+                for record_id in ids or []:
+                    position = snapshot.positions.get(str(record_id))
+                    if position is not None:
+                        keep[position] = False
+            rows = np.flatnonzero(keep)
+            self._snapshot = _Snapshot(
+                snapshot.matrix[rows],
+                [snapshot.ids[i] for i in rows],
+                [snapshot.metadata[i] for i in rows],
+                [snapshot.contents[i] for i in rows],
+                after,
+                saved=False,
+            )
+
+    def _is_current(self, snapshot: _Snapshot, version: Optional[str]) -> bool:
+        """Whether the snapshot reflects the table at ``version`` (None: no version table)."""
+        if version is None:
+            return snapshot.mtime_ns == self._saved_mtime_ns()
+        return snapshot.version == version
+
+    def _snapshot_at(self, version: Optional[str]) -> Optional[_Snapshot]:
+        """
+        The loaded snapshot if it is at ``version``, for a write to be applied to,
+        or None. Nothing is read from disk: a snapshot at another version is
+        dropped, and without a version the saved files are removed, so the index
+        is loaded or rebuilt on next use.
+        """
+        snapshot = self._snapshot
+        if version is None:
+            self._snapshot = None
+            self._remove_files()
+            return None
+        if snapshot is None or snapshot.version != version:
+            self._snapshot = None
+            return None
+        return snapshot
+
+    def _saved_mtime_ns(self) -> int:
+        try:
+            return os.stat(self.matrix_path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _load(self, version: Optional[str]) -> bool:
+        """
+        Memory-map the saved index. Returns False if there is none, it is unusable
+        or it was saved at another table version than ``version``.
+        """
+        import numpy as np
+
+        mtime_ns = self._saved_mtime_ns()
+        if not mtime_ns or not os.path.exists(self.records_path):
+            self._snapshot = None
+            return False
+        matrix = np.load(self.matrix_path, mmap_mode="r")
+        with open(self.records_path, encoding="utf-8") as f:
+            records = json.load(f)
+        if (
+            len(records["ids"]) != matrix.shape[0]
+            or matrix.dtype != np.dtype(self.dtype)
+            or (version is not None and records.get("version") != version)
+        ):
+            logging.info(f"Local index {self.matrix_path} is stale; rebuilding it")
+            self._snapshot = None
+            return False
+        if self.max_rows is not None and matrix.shape[0] > self.max_rows:
+            self._discard(version)
+            return False
+        self._snapshot = _Snapshot(
+            matrix,
+            records["ids"],
+            records["metadata"],
+            records["contents"],
+            records.get("version"),
+            mtime_ns,
+        )
+        logging.info(f"Loaded local index of {matrix.shape[0]} rows from {self.matrix_path}")
+        return True
+
+    def _build(self) -> None:
+        """Read all embeddings from the table (unless it exceeds max_rows) and save them."""
+        import numpy as np
+
+        start_time = time.time()
+        version, records = self._read_table()
+        if records is None:
+            logging.info(
+                f"{self.vector_store.vector_settings.table_name} has more than {self.max_rows} "
+                "rows; searching the DiskANN index instead of a local index"
+            )
+            self._discard(version)
+            return
+
+        dimensions = self.vector_store.vector_settings.embedding_dimensions
+        matrix = self._normalized(
+            np.asarray([record[3] for record in records], dtype=np.float32).reshape(-1, dimensions)
+        )
+        self._save(
+            _Snapshot(
+                matrix,
+                [record[0] for record in records],
+                [record[1] for record in records],
+                [record[2] for record in records],
+                version,
+            )
+        )
+        if version is not None:
+            # Read after current(), so at least as new as the version it returned
+            self.vector_store.table_version.remember(version)
+        logging.info(
+            f"Built local index of {len(records)} rows in {time.time() - start_time:.3f} seconds"
+        )
+
+    def _read_table(self) -> Tuple[Optional[str], Optional[List[Tuple[Any, ...]]]]:
+        """
+        Read the table version and the (id, metadata, contents, embedding) rows.
+
+        Both are read in one repeatable-read transaction, so the rows are exactly
+        those at the version.
+
+        Returns:
+            The version (None without a version table) and the rows, or None for
+            the rows if there are more than ``max_rows``.
+        """
+        from pgvector.psycopg import register_vector
+
+        table_name = self.vector_store.vector_settings.table_name
+        table_version = self.vector_store.table_version
+        versioned = table_version.current() is not None
+        with self.vector_store.connection() as conn:
+            conn.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            version = table_version.read(conn) if versioned else None
+            if self.max_rows is not None:
+                # Bounded count: stops reading after max_rows + 1 rows
+                rows = conn.execute(
+                    f"SELECT count(*) FROM (SELECT 1 FROM {table_name} LIMIT %s) t",
+                    (self.max_rows + 1,),
+                ).fetchone()[0]
+                if rows > self.max_rows:
+                    return version, None
+            register_vector(conn)
+            records = conn.execute(
+                f"SELECT id::text, metadata, contents, embedding FROM {table_name}"
+            ).fetchall()
+        return version, records
+
+    def _save(self, snapshot: _Snapshot) -> None:
+        """
+        Write the records, then the matrix (whose mtime marks the version), each to
+        a temporary file of this process that is renamed into place.
+        """
+        import numpy as np
+
+        directory = os.path.dirname(os.path.abspath(self.matrix_path))
+        os.makedirs(directory, exist_ok=True)
+        records_tmp = self._temp_path(directory, self.records_path)
+        matrix_tmp = self._temp_path(directory, self.matrix_path)
+        try:
+            with open(records_tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": snapshot.version,
+                        "ids": snapshot.ids,
+                        "metadata": snapshot.metadata,
+                        "contents": snapshot.contents,
+                    },
+                    f,
+                    default=str,
+                )
+            with open(matrix_tmp, "wb") as f:
+                np.save(f, np.ascontiguousarray(snapshot.matrix, dtype=self.dtype))
+            os.replace(records_tmp, self.records_path)
+            os.replace(matrix_tmp, self.matrix_path)
+        finally:
+            for path in (records_tmp, matrix_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+        snapshot.matrix = np.load(self.matrix_path, mmap_mode="r")
+        snapshot.mtime_ns = self._saved_mtime_ns()
+        snapshot.saved = True
+        self._snapshot = snapshot
+
+    @staticmethod
+    def _temp_path(directory: str, path: str) -> str:
+        """A new temporary file next to ``path``, unique to this writer."""
+        fd, temp_path = tempfile.mkstemp(
+            prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=directory
+        )
+        os.close(fd)
+        return temp_path
+
+    def _discard(self, version: Optional[str]) -> None:
+        """Forget the index and remove its files once the table outgrows max_rows."""
+        self._snapshot = None
+        self._too_large = True
+        self._too_large_version = version
+        self._remove_files()
+
+    def _remove_files(self) -> None:
+        for path in (self.matrix_path, self.records_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _normalized(self, matrix: np.ndarray) -> np.ndarray:
+        import numpy as np
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(self.dtype)
+
+    @staticmethod
+    def _scores(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Cosine similarities of the (unit) rows to the query, computed in float32."""
+        import numpy as np
+
+        if matrix.dtype == np.float32:
+            return matrix @ query
+        return np.concatenate(
+            [
+                matrix[start : start + _SCORE_BLOCK_ROWS].astype(np.float32) @ query
+                for start in range(0, len(matrix), _SCORE_BLOCK_ROWS)
+            ]
+            or [np.empty(0, dtype=np.float32)]
+        )
+
+    @staticmethod
+    def _filter_mask(
+        snapshot: _Snapshot, metadata_filter: Union[dict, List[dict]]
+    ) -> np.ndarray:
+        """Rows matching the filter (any of a list of filters), cached per snapshot."""
+        import numpy as np
+
+        key = json.dumps(metadata_filter, sort_keys=True, default=str)
+        mask = snapshot.filter_masks.get(key)
+        if mask is None:
+            filters = metadata_filter if isinstance(metadata_filter, list) else [metadata_filter]
+            mask = np.fromiter(
+                (_matches(metadata or {}, filters) for metadata in snapshot.metadata),
+                dtype=bool,
+                count=len(snapshot.metadata),
+            )
+            if len(snapshot.filter_masks) >= _MAX_FILTER_MASKS:
+                snapshot.filter_masks.clear()
+            snapshot.filter_masks[key] = mask
+        return mask
+
+
+def _matches(metadata: dict, filters: List[dict]) -> bool:
+    """Whether the metadata has all key-value pairs of any of the filters."""
+    return any(
+        all(metadata.get(name) == value for name, value in metadata_filter.items())
+        for metadata_filter in filters
+    )
@@ -0,0 +1,105 @@
+import logging
+from typing import Any, Dict, List
+
+
+class DocumentManifest:
+    """
+    Tracks what has been ingested per source file in a ``<table>_manifest`` table.
+
+    Each row holds the file's content hash, size and modification time, the
+    chunking parameters used, and the ids of its chunks (content hashes), so
+    ingestion can skip unchanged files without parsing them and work out which
+    chunks of a changed file were added or removed.
+    """
+
+    def __init__(self, vector_store):
+        self.vector_store = vector_store
+        self.table_name = f"{vector_store.vector_settings.table_name}_manifest"
+
+    def create_table(self) -> None:
+        """Create the manifest table if it doesn't exist."""
+        create_table_sql = f"""
+        CREATE TABLE IF NOT EXISTS {self.table_name} (
+            file_path TEXT PRIMARY KEY,
+            doc_id TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            file_size BIGINT NOT NULL,
+            mtime_ns BIGINT NOT NULL,
+            chunk_size INTEGER NOT NULL,
+            chunk_overlap INTEGER NOT NULL,
+            chunk_ids JSONB NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """
+        with self.vector_store.connection() as conn:
+            conn.execute(create_table_sql)
+        logging.info(f"Manifest table '{self.table_name}' created or already exists.")
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Return all manifest entries keyed by file path."""
+        from psycopg.rows import dict_row
+
+        with self.vector_store.connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(f"SELECT * FROM {self.table_name}")
+                return {row["file_path"]: row for row in cur.fetchall()}
+
+    def save(
+        self,
+        file_path: str,
+        doc_id: str,
+        content_hash: str,
+        file_size: int,
+        mtime_ns: int,
+        chunk_size: int,
+        chunk_overlap: int,
+        chunk_ids: List[str],
+    ) -> None:
+        """Insert or replace the entry for a file after all its chunks are stored."""
+        from psycopg.types.json import Jsonb
+
+        save_sql = f"""
+        INSERT INTO {self.table_name}
+            (file_path, doc_id, content_hash, file_size, mtime_ns,
+             chunk_size, chunk_overlap, chunk_ids, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, now())
+        ON CONFLICT (file_path) DO UPDATE SET
+            doc_id = EXCLUDED.doc_id,
+            content_hash = EXCLUDED.content_hash,
+            file_size = EXCLUDED.file_size,
+            mtime_ns = EXCLUDED.mtime_ns,
+            chunk_size = EXCLUDED.chunk_size,
+            chunk_overlap = EXCLUDED.chunk_overlap,
+            chunk_ids = EXCLUDED.chunk_ids,
+            updated_at = now()
+        """
+        with self.vector_store.connection() as conn:
+            conn.execute(
+                save_sql,
+                (
+                    file_path,
+                    doc_id,
+                    content_hash,
+                    file_size,
+                    mtime_ns,
+                    chunk_size,
+                    chunk_overlap,
+                    Jsonb(chunk_ids),
+                ),
+            )
+
+    def touch(self, file_path: str, file_size: int, mtime_ns: int) -> None:
+        """Record a new size/mtime for a file whose content did not change."""
+        with self.vector_store.connection() as conn:
+            conn.execute(
+                f"UPDATE {self.table_name} SET file_size = %s, mtime_ns = %s, updated_at = now() "
+                "WHERE file_path = %s",
+                (file_size, mtime_ns, file_path),
+            )
+
+    def delete(self, file_path: str) -> None:
+        """Remove the entry for a file that no longer exists."""
+        with self.vector_store.connection() as conn:
+            conn.execute(
+                f"DELETE FROM {self.table_name} WHERE file_path = %s", (file_path,)
+            )
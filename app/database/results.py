@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@dataclass(slots=True)
+class SearchResult:
+    """
+    One retrieved chunk.
+
+    Only the fields produced by the search that returned it are set: ``distance``
+    (cosine distance) for semantic search, ``text_rank`` for keyword search,
+    ``fused_score`` for fused hybrid search and ``relevance_score`` after
+    reranking. ``embedding`` is only fetched on request.
+    """
+
+    id: str
+    content: str
+    search_type: str
+    metadata: Optional[Dict[str, Any]] = None
+    distance: Optional[float] = None
+    text_rank: Optional[float] = None
+    fused_score: Optional[float] = None
+    relevance_score: Optional[float] = None
+    embedding: Optional[List[float]] = None
+
+    def to_dict(self, columns: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Return the result as a flat dict.
+
+        Args:
+            columns: The fields to include. Defaults to all fields that are set,
+                with metadata keys merged in at the top level.
+        """
+        if columns is not None:
+            return {column: getattr(self, column) for column in columns}
+        row = {
+            field.name: getattr(self, field.name)
+            for field in fields(self)
+            if field.name != "metadata" and getattr(self, field.name) is not None
+        }
+        if self.metadata:
+            row.update(self.metadata)
+        return row
+
+
+def results_to_dataframe(results: Sequence[SearchResult]) -> pd.DataFrame:
+    """Convert search results into a DataFrame, with metadata keys as columns."""
+    import pandas as pd
+
+    return pd.DataFrame([result.to_dict() for result in results])
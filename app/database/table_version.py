@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+
+class TableVersion:
+    """
+    A change counter for the documents table, kept in a ``<table>_version`` table.
+
+    A statement-level trigger bumps the counter on every INSERT, UPDATE, DELETE
+    and TRUNCATE, whichever process or client runs it, inside the writing
+    transaction, so a new version becomes visible together with the change it
+    counts. Versions are reported as ``"<table oid>:<counter>"``, so dropping and
+    recreating the table is a change too. Processes compare versions to find
+    out that state derived from the table (cached results, keyword statistics,
+    the local index) is stale.
+
+    Example:
+        table_version = TableVersion(vector_store)
+        table_version.create()  # once, at setup
+        table_version.current()  # e.g. "16423:57", or None before setup
+    """
+
+    def __init__(self, vector_store, check_seconds: float = 1.0):
+        self.vector_store = vector_store
+        self.source_table = vector_store.vector_settings.table_name
+        self.table_name = f"{self.source_table}_version"
+        self.check_seconds = check_seconds
+        self._version: Optional[str] = None
+        self._checked_at = float("-inf")
+        self._missing_logged = False
+        self._lock = threading.Lock()
+
+    def create(self) -> None:
+        """Create the version table and the trigger maintaining it, if they don't exist."""
+        create_sql = f"""
+        CREATE TABLE IF NOT EXISTS {self.table_name} (
+            id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+            version BIGINT NOT NULL DEFAULT 0
+        );
+        INSERT INTO {self.table_name} DEFAULT VALUES ON CONFLICT DO NOTHING;
+        CREATE OR REPLACE FUNCTION {self.table_name}_bump() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE {self.table_name} SET version = version + 1;
+            RETURN NULL;
+        END;
+        $$;
+        CREATE OR REPLACE TRIGGER {self.table_name}_bump
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {self.source_table}
+        FOR EACH STATEMENT EXECUTE FUNCTION {self.table_name}_bump();
+        """
+        with self.vector_store.connection() as conn:
+            conn.execute(create_sql)
+        logging.info(f"Version table '{self.table_name}' created or already exists.")
+
+    def read(self, conn, lock: bool = False) -> str:
+        """
+        Read the version on a connection, e.g. inside a writing transaction.
+
+        Args:
+            conn: The connection to read it on.
+            lock: Lock the version row until the transaction ends, so no other
+                writer can change the version before it commits.
+        """
+        row = conn.execute(
+            f"SELECT %s::regclass::oid::bigint, version FROM {self.table_name}"
+            + (" FOR UPDATE" if lock else ""),
+            (self.source_table,),
+        ).fetchone()
+        return f"{row[0]}:{row[1]}"
+
+    def current(self) -> Optional[str]:
+        """
+        The committed version, read from the database at most every ``check_seconds``.
+
+        Returns:
+            The version, or None if the version table has not been created.
+        """
+        if not self.due():
+            return self._version
+        with self._lock:
+            if self.due():
+                self._version = self._fetch()
+                self._checked_at = time.monotonic()
+            return self._version
+
+    def due(self) -> bool:
+        """Whether current() will read the version from the database."""
+        return time.monotonic() - self._checked_at >= self.check_seconds
+
+    def remember(self, version: str) -> None:
+        """Record a version read by this process (e.g. after its own write)."""
+        with self._lock:
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def _fetch(self) -> Optional[str]:
+        from psycopg import errors
+
+        try:
+            with self.vector_store.connection() as conn:
+                return self.read(conn)
+        except errors.UndefinedTable:
+            if not self._missing_logged:
+                logging.warning(
+                    f"No '{self.table_name}' table; changes made by other processes "
+                    "won't be detected until create_tables() (e.g. pdm run ingest) has run"
+                )
+                self._missing_logged = True
+            return None
@@ -0,0 +1,155 @@
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+
+class TermStatistics:
+    """
+    Corpus term statistics in a ``<table>_term_stats`` table.
+
+    Holds the document frequency of every lowercased, unstemmed term in the
+    chunk contents (computed with ``ts_stat`` over the 'simple' text search
+    configuration), plus the chunk count. VectorStore.upsert_records and
+    VectorStore.delete keep it up to date in the writing transaction (see
+    apply_delta); refresh recomputes it from scratch, e.g. as a scheduled
+    ``python -m app.insert_vectors --refresh-term-stats``. Used for local keyword
+    extraction at query time.
+
+    The writers create the table on first use (see ensure_table), so a table
+    created before the statistics existed needs no migration.
+    """
+
+    def __init__(self, vector_store):
+        self.vector_store = vector_store
+        self.table_name = f"{vector_store.vector_settings.table_name}_term_stats"
+        self._table_ready = False
+        self._lock = threading.Lock()
+
+    def create_table(self) -> None:
+        """
+        Create the term statistics table if it doesn't exist.
+
+        A new (or never computed) table is filled with refresh, once; after that
+        the writes keep it current.
+        """
+        create_table_sql = f"""
+        CREATE TABLE IF NOT EXISTS {self.table_name} (
+            term TEXT PRIMARY KEY,
+            ndoc INTEGER NOT NULL,
+            nentry INTEGER NOT NULL
+        );
+        """
+        with self.vector_store.connection() as conn:
+            conn.execute(create_table_sql)
+            computed = conn.execute(
+                f"SELECT 1 FROM {self.table_name} WHERE term = ''"
+            ).fetchone()
+        if computed is None:
+            self.refresh()
+        self._table_ready = True
+
+    def ensure_table(self) -> None:
+        """
+        Create (and fill) the table once per process, before the first write
+        that updates it.
+
+        Runs in its own transaction, ahead of the write's, so the statistics
+        computed by refresh don't yet include the write's own delta.
+        """
+        if self._table_ready:
+            return
+        with self._lock:
+            if not self._table_ready:
+                self.create_table()
+
+    def apply_delta(
+        self, conn, added_sql: Optional[str] = None, removed_sql: Optional[str] = None
+    ) -> None:
+        """
+        Add the statistics of added rows and subtract those of removed rows.
+
+        Runs on the writer's connection, so the statistics change in the same
+        transaction as the table: call it after the added rows are readable and
+        before the removed ones are deleted.
+
+        Args:
+            conn: The writing connection.
+            added_sql: A query returning the ``contents`` of the added rows.
+            removed_sql: A query returning the ``contents`` of the removed or
+                replaced rows.
+        """
+        parts, params = [], []
+        for query, sign in ((added_sql, ""), (removed_sql, "-")):
+            if query is None:
+                continue
+            parts.append(f"SELECT word, {sign}ndoc, {sign}nentry FROM ts_stat(%s)")
+            params.append(f"SELECT to_tsvector('simple', contents) FROM ({query}) AS delta")
+            parts.append(f"SELECT '', {sign}count(*), {sign}count(*) FROM ({query}) AS delta")
+        if not parts:
+            return
+        # Sorted, so concurrent writers lock the shared term rows in the same order
+        delta_sql = f"""
+        INSERT INTO {self.table_name} AS stats (term, ndoc, nentry)
+        SELECT term, sum(ndoc), sum(nentry)
+        FROM ({" UNION ALL ".join(parts)}) AS delta (term, ndoc, nentry)
+        GROUP BY term
+        HAVING sum(ndoc) <> 0 OR sum(nentry) <> 0
+        ORDER BY term
+        ON CONFLICT (term) DO UPDATE SET
+            ndoc = stats.ndoc + EXCLUDED.ndoc,
+            nentry = stats.nentry + EXCLUDED.nentry
+        """
+        conn.execute(delta_sql, params)
+        if removed_sql is not None:
+            conn.execute(f"DELETE FROM {self.table_name} WHERE ndoc <= 0 AND term <> ''")
+
+    def clear(self, conn) -> None:
+        """Reset the statistics to an empty corpus, e.g. when all rows are deleted."""
+        conn.execute(
+            f"TRUNCATE {self.table_name}; "
+            f"INSERT INTO {self.table_name} (term, ndoc, nentry) VALUES ('', 0, 0)"
+        )
+
+    def refresh(self) -> int:
+        """
+        Recompute the statistics from the current table contents.
+
+        The chunk count is stored under the empty term, which no real token can be.
+
+        Returns:
+            The number of distinct terms.
+        """
+        source_table = self.vector_store.vector_settings.table_name
+        refresh_sql = f"""
+        TRUNCATE {self.table_name};
+        INSERT INTO {self.table_name} (term, ndoc, nentry)
+        SELECT word, ndoc, nentry
+        FROM ts_stat('SELECT to_tsvector(''simple'', contents) FROM {source_table}');
+        INSERT INTO {self.table_name} (term, ndoc, nentry)
+        SELECT '', count(*), count(*) FROM {source_table};
+        """
+        with self.vector_store.connection() as conn:
+            conn.execute(refresh_sql)
+            terms = conn.execute(f"SELECT count(*) - 1 FROM {self.table_name}").fetchone()[0]
+        logging.info(f"Refreshed term statistics for {terms} terms")
+        return terms
+
+    def load(self) -> Tuple[int, Dict[str, int]]:
+        """
+        Load the statistics into memory.
+
+        Returns:
+            The number of chunks and the document frequency of each term. Both are
+            empty if the table has not been created yet (see create_table).
+        """
+        from psycopg import errors
+
+        try:
+            with self.vector_store.connection() as conn:
+                rows = conn.execute(f"SELECT term, ndoc FROM {self.table_name}").fetchall()
+        except errors.UndefinedTable:
+            logging.warning(f"No '{self.table_name}' table; run create_tables() first")
+            return 0, {}
+        document_frequency = dict(rows)
+        total_documents = document_frequency.pop("", 0)
+        return total_documents, document_frequency
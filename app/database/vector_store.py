@@ -1,67 +1,499 @@
+from __future__ import annotations
+
+import asyncio
+import json
 import logging
+import re
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import replace
 from datetime import datetime
-from typing import Any, List, Optional, Tuple, Union
-
-import cohere
-import pandas as pd
-import psycopg
-from ..config.settings import get_settings
-from ..services.llm_factory import LLMFactory
-from pydantic import BaseModel
-from openai import OpenAI
-from ..services.synthesizer import Keywords
-from timescale_vector import client
-import nltk
-from nltk.corpus import wordnet
-from typing import List
-
-# Ensure the necessary NLTK data is downloaded
-nltk.download('punkt_tab')
-nltk.download('wordnet')
-
-
-def expand_with_synonyms(keywords: List[str]) -> List[str]:
-    """Expand keywords with synonyms using WordNet."""
-    expanded_keywords = set(keywords)
-    for keyword in keywords:
-        for syn in wordnet.synsets(keyword):
-            for lemma in syn.lemmas():
-                expanded_keywords.add(lemma.name())
-    return list(expanded_keywords)
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from ..config.settings import Settings, get_settings
+from ..services.embedding_cache import EmbeddingCache
+from ..services.keyword_extractor import create_keyword_extractor
+from ..services.reranker import Reranker, create_reranker
+from ..services.synonyms import SynonymTable
+from ..services.tracing import in_context, span
+from .local_index import LocalVectorIndex
+from .results import SearchResult, results_to_dataframe
+from .table_version import TableVersion
+from .term_stats import TermStatistics
+
+# Heavy dependencies are imported where they are first used, so importing this
+# module stays cheap for workers, CLIs and test collection.
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import psycopg
+    from openai import OpenAI
+    from psycopg_pool import AsyncConnectionPool, ConnectionPool
+    from timescale_vector import client
+
+def estimate_tokens(text: str) -> int:
+    """Cheaply estimate the number of tokens in a text (roughly 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def vector_literal(embedding: List[float]) -> str:
+    """Format an embedding as a pgvector text literal, for use as ``%s::vector``."""
+    return "[" + ",".join(map(str, embedding)) + "]"
+
+
+def parse_embedding(value: Any) -> List[float]:
+    """Read an embedding returned by the database (pgvector text or an array) as floats."""
+    if isinstance(value, str):
+        return json.loads(value)
+    return [float(x) for x in value]
+
+
+def batch_texts(
+    texts: List[str], max_batch_size: int, max_batch_tokens: int
+) -> List[List[int]]:
+    """
+    Group text indices into batches bounded by item count and estimated tokens.
+
+    Args:
+        texts: The texts to group.
+        max_batch_size: The maximum number of texts per batch.
+        max_batch_tokens: The maximum number of estimated tokens per batch.
+
+    Returns:
+        A list of batches, each a list of indices into ``texts`` in input order.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (
+            len(current) >= max_batch_size or current_tokens + tokens > max_batch_tokens
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
 
 class VectorStore:
     """A class for managing vector operations and database interactions."""
 
-    def __init__(self):
-        """Initialize the VectorStore with settings, OpenAI client, and Timescale Vector client."""
-        self.settings = get_settings()
-        self.openai_client = OpenAI(api_key=self.settings.openai.api_key)
+    def __init__(
+        self, settings: Optional[Settings] = None, clients: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize the VectorStore with settings.
+
+        No clients, connections or files are opened here: the OpenAI and Timescale
+        Vector clients, the embedding cache, the reranker and the connection pools
+        are created on first use.
+
+        Args:
+            settings: The settings to use instead of get_settings(), e.g. a copy
+                with another table_name.
+            clients: Clients to use instead of creating them, by name: "openai",
+                "reranker" and "keyword_llm" (the OpenAI client of the LLM keyword
+                extractor), e.g. fakes in benchmarks and tests.
+        """
+        clients = dict(clients or {})
+        self.settings = settings or get_settings()
         self.embedding_model = self.settings.openai.embedding_model
-        self.cohere_client = cohere.ClientV2(api_key=self.settings.cohere.api_key)
         self.vector_settings = self.settings.vector_store
-        self.vec_client = client.Sync(
-            self.settings.database.service_url,
-            self.vector_settings.table_name,
-            self.vector_settings.embedding_dimensions,
-            time_partition_interval=self.vector_settings.time_partition_interval,
+        self._pool: Optional[ConnectionPool] = None
+        self._async_pool: Optional[AsyncConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        self._async_pool_lock = asyncio.Lock()
+        keyword_client = clients.pop("keyword_llm", None)
+        self._clients: Dict[str, Any] = clients
+        self._client_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._change_listeners: List[Callable[[], None]] = []
+        self._seen_version: Optional[str] = None
+        self.term_stats = TermStatistics(self)
+        self.synonyms = (
+            SynonymTable(self.settings.synonyms.path, self.settings.synonyms.max_expansions)
+            if self.settings.synonyms.enabled
+            else None
+        )
+        self.keyword_extractor = create_keyword_extractor(
+            self.settings.keywords, self.settings.openai, self, client=keyword_client
+        )
+        self.add_change_listener(self.keyword_extractor.invalidate)
+
+    def _lazy_client(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Return the client stored under ``name``, creating it with ``factory`` on first use."""
+        if name not in self._clients:
+            with self._client_lock:
+                if name not in self._clients:
+                    self._clients[name] = factory()
+        return self._clients[name]
+
+    @property
+    def openai_client(self) -> OpenAI:
+        """The OpenAI client used for embeddings."""
+
+        def factory() -> OpenAI:
+            from openai import OpenAI
+
+            return OpenAI(
+                api_key=self.settings.openai.api_key,
+                base_url=self.settings.openai.base_url,
+            )
+
+        return self._lazy_client("openai", factory)
+
+    @property
+    def vec_client(self) -> client.Sync:
+        """The Timescale Vector client."""
+
+        def factory() -> client.Sync:
+            from timescale_vector import client
+
+            return client.Sync(
+                self.settings.database.service_url,
+                self.vector_settings.table_name,
+                self.vector_settings.embedding_dimensions,
+                time_partition_interval=self.vector_settings.time_partition_interval,
+            )
+
+        return self._lazy_client("vec", factory)
+
+    @property
+    def embedding_cache(self) -> Optional[EmbeddingCache]:
+        """The persistent embedding cache, or None if disabled."""
+
+        def factory() -> Optional[EmbeddingCache]:
+            if not self.settings.embedding_cache.enabled:
+                return None
+            # Shortened embeddings are cached apart from full-size ones
+            dimensions = self.settings.openai.embedding_dimensions
+            return EmbeddingCache(
+                self.settings.embedding_cache.path,
+                f"{self.embedding_model}:{dimensions}" if dimensions else self.embedding_model,
+                self.settings.embedding_cache.max_entries,
+            )
+
+        return self._lazy_client("embedding_cache", factory)
+
+    @property
+    def reranker(self) -> Reranker:
+        """The reranker selected in RerankerSettings."""
+        return self._lazy_client(
+            "reranker",
+            lambda: create_reranker(self.settings.reranker, self.settings.cohere.api_key),
         )
 
+    @property
+    def table_version(self) -> TableVersion:
+        """The table's change counter, shared by all processes using the table."""
+        return self._lazy_client(
+            "table_version",
+            lambda: TableVersion(self, self.vector_settings.version_check_seconds),
+        )
+
+    @property
+    def local_index(self) -> Optional[LocalVectorIndex]:
+        """The in-process exact index, or None if LocalIndexSettings.mode is "ann"."""
+
+        def factory() -> Optional[LocalVectorIndex]:
+            settings = self.settings.local_index
+            if settings.mode == "ann":
+                return None
+            return LocalVectorIndex(
+                self,
+                settings.path,
+                dtype=settings.dtype,
+                max_rows=settings.max_rows if settings.mode == "auto" else None,
+            )
+
+        return self._lazy_client("local_index", factory)
+
+    def _ready_local_index(
+        self,
+        predicates: Optional[client.Predicates] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None,
+    ) -> Optional[LocalVectorIndex]:
+        """
+        The local index if it should serve a semantic search: it is enabled, the
+        table is small enough, and the search has no predicates or time range.
+        """
+        if predicates or time_range or self.local_index is None:
+            return None
+        return self.local_index if self.local_index.ready() else None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool shared by concurrent search stages, created on first use."""
+        if self._executor is None:
+            with self._pool_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.vector_settings.search_workers,
+                        thread_name_prefix="vector-store",
+                    )
+        return self._executor
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """The shared connection pool, opened on first use."""
+        if self._pool is None:
+            from psycopg_pool import ConnectionPool
+
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(
+                        self.settings.database.service_url,
+                        open=True,
+                        **self._pool_kwargs(ConnectionPool),
+                    )
+        return self._pool
+
+    def _pool_kwargs(self, pool_class: type) -> Dict[str, Any]:
+        """Build the pool sizing and health-check options shared by both pools."""
+        return {
+            "min_size": self.vector_settings.pool_min_size,
+            "max_size": self.vector_settings.pool_max_size,
+            "timeout": self.vector_settings.pool_timeout,
+            "max_idle": self.vector_settings.pool_max_idle,
+            "check": (
+                pool_class.check_connection
+                if self.vector_settings.pool_check_connections
+                else None
+            ),
+            "name": f"{self.vector_settings.table_name}-{pool_class.__name__}",
+        }
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg.Connection]:
+        """
+        Borrow a connection from the shared pool.
+
+        The transaction is committed when the block exits normally and rolled back
+        on error. Waits longer than ``pool_wait_warning_ms`` are logged.
+
+        Example:
+            with vector_store.connection() as conn:
+                conn.execute("SELECT 1")
+        """
+        start_time = time.time()
+        with self.pool.connection() as conn:
+            self._log_pool_wait(start_time)
+            yield conn
+
+    @asynccontextmanager
+    async def async_connection(self) -> AsyncIterator[psycopg.AsyncConnection]:
+        """Borrow a connection from the shared async pool, opening it on first use."""
+        if self._async_pool is None:
+            from psycopg_pool import AsyncConnectionPool
+
+            # Concurrent first requests must not each open a pool
+            async with self._async_pool_lock:
+                if self._async_pool is None:
+                    pool = AsyncConnectionPool(
+                        self.settings.database.service_url,
+                        open=False,
+                        **self._pool_kwargs(AsyncConnectionPool),
+                    )
+                    await pool.open()
+                    self._async_pool = pool
+        start_time = time.time()
+        async with self._async_pool.connection() as conn:
+            self._log_pool_wait(start_time)
+            yield conn
+
+    def _log_pool_wait(self, start_time: float) -> None:
+        """Log a warning when getting a pooled connection took unusually long."""
+        wait_ms = (time.time() - start_time) * 1000
+        if wait_ms > self.vector_settings.pool_wait_warning_ms:
+            logging.warning(f"Waited {wait_ms:.1f} ms for a database connection")
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return the pools' counters, including wait metrics.
+
+        Returns:
+            A dict with "sync" and "async" entries from ``get_stats()`` (e.g.
+            ``requests_waiting``, ``requests_wait_ms``, ``pool_available``) for each
+            pool that has been opened.
+        """
+        stats = {}
+        if self._pool is not None:
+            stats["sync"] = self._pool.get_stats()
+        if self._async_pool is not None:
+            stats["async"] = self._async_pool.get_stats()
+        return stats
+
+    def close(self) -> None:
+        """Close the sync connection pool and the search thread pool."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def aclose(self) -> None:
+        """Close the async connection pool."""
+        if self._async_pool is not None:
+            await self._async_pool.close()
+            self._async_pool = None
+
+    def add_change_listener(self, listener: Callable[[], None]) -> None:
+        """Register a callback invoked after upsert or delete changes the table."""
+        self._change_listeners.append(listener)
+
+    def _notify_change(self) -> None:
+        for listener in self._change_listeners:
+            listener()
+
+    def check_for_changes(self) -> bool:
+        """
+        Notify the change listeners if the table changed outside this process.
+
+        Writes through this VectorStore notify the listeners directly; this
+        catches the others (e.g. the ingestion CLI, another worker or raw SQL) by
+        comparing the table version, which is read from the database at most
+        every ``version_check_seconds``. Searches call it before using any state
+        derived from the table.
+
+        Returns:
+            True if the listeners were notified.
+        """
+        version = self.table_version.current()
+        if version is None or version == self._seen_version:
+            return False
+        first_check = self._seen_version is None
+        self._seen_version = version
+        if first_check:
+            return False
+        logging.info(f"{self.vector_settings.table_name} changed (version {version})")
+        self._notify_change()
+        return True
+
+    @property
+    def embedding_index_name(self) -> str:
+        """Name of the DiskANN index (matches the Timescale Vector client's naming)."""
+        return f"{self.vector_settings.table_name}_embedding_idx"
+
+    @property
+    def keyword_index_name(self) -> str:
+        """Name of the GIN index used by keyword search."""
+        return f"idx_{self.vector_settings.table_name}_contents_tsv_gin"
+
+    def create_keyword_search_column(self) -> None:
+        """
+        Add the stored ``contents_tsv`` column used by keyword search, if missing.
+
+        The column is generated from the document title (weight A) and the chunk
+        contents (weight B), so Postgres fills it on every insert/update and keyword
+        search never recomputes ``to_tsvector`` at query time. Adding it to an
+        existing table rewrites the table once; the expression GIN index used by
+        older versions is dropped in the same transaction.
+        """
+        table_name = self.vector_settings.table_name
+        migrate_sql = f"""
+        ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS contents_tsv tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(metadata->>'title', '')), 'A') ||
+            setweight(to_tsvector('english', contents), 'B')
+        ) STORED;
+        DROP INDEX IF EXISTS idx_{table_name}_contents_gin;
+        """
+        with self.connection() as conn:
+            conn.execute(migrate_sql)
+        logging.info(f"Column '{table_name}.contents_tsv' created or already exists.")
+
     def create_keyword_search_index(self):
-        """Create a GIN index for keyword search if it doesn't exist."""
-        index_name = f"idx_{self.vector_settings.table_name}_contents_gin"
+        """
+        Create the GIN index for keyword search and the (doc_id, chunk_id) expression
+        index used for ingestion dedup, if they don't exist.
+        """
+        index_name = self.keyword_index_name
+        chunk_index_name = f"idx_{self.vector_settings.table_name}_doc_chunk"
         create_index_sql = f"""
         CREATE INDEX IF NOT EXISTS {index_name}
-        ON {self.vector_settings.table_name} USING gin(to_tsvector('english', contents));
+        ON {self.vector_settings.table_name} USING gin(contents_tsv);
+        CREATE INDEX IF NOT EXISTS {chunk_index_name}
+        ON {self.vector_settings.table_name} ((metadata->>'doc_id'), (metadata->>'chunk_id'));
         """
         try:
-            with psycopg.connect(self.settings.database.service_url) as conn:
+            self.create_keyword_search_column()
+            with self.connection() as conn:
                 with conn.cursor() as cur:
+                    self._set_maintenance_work_mem(cur)
                     cur.execute(create_index_sql)
-                    conn.commit()
-                    logging.info(f"GIN index '{index_name}' created or already exists.")
+                    logging.info(
+                        f"Indexes '{index_name}' and '{chunk_index_name}' created or already exist."
+                    )
         except Exception as e:
-            logging.error(f"Error while creating GIN index: {str(e)}")
+            logging.error(f"Error while creating keyword search indexes: {str(e)}")
+
+    def drop_keyword_search_index(self) -> None:
+        """Drop the GIN index used by keyword search."""
+        with self.connection() as conn:
+            conn.execute(f"DROP INDEX IF EXISTS {self.keyword_index_name}")
+        logging.info(f"Dropped index '{self.keyword_index_name}'")
+
+    def _set_maintenance_work_mem(self, cur: psycopg.Cursor) -> None:
+        """Raise maintenance_work_mem for index builds in the current transaction."""
+        cur.execute(
+            "SELECT set_config('maintenance_work_mem', %s, true)",
+            (self.settings.index.maintenance_work_mem,),
+        )
+
+    def get_stored_chunks(
+        self, doc_ids: List[str]
+    ) -> Dict[str, Dict[str, Tuple[str, dict]]]:
+        """
+        Return the stored chunks of several documents, in a single query.
+
+        The lookup uses the (doc_id, chunk_id) expression index created by
+        create_keyword_search_index.
+
+        Args:
+            doc_ids: The document identifiers.
+
+        Returns:
+            Per doc_id, a dict mapping each stored chunk_id to its record id and
+            metadata. Documents without stored chunks are left out.
+        """
+        if not doc_ids:
+            return {}
+        chunks_sql = f"""
+        SELECT metadata->>'doc_id', metadata->>'chunk_id', id::text, metadata
+        FROM {self.vector_settings.table_name}
+        WHERE metadata->>'doc_id' = ANY(%s::text[])
+        """
+        stored: Dict[str, Dict[str, Tuple[str, dict]]] = {}
+        start_time = time.time()
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(chunks_sql, (list(doc_ids),))
+                for doc_id, chunk_id, record_id, metadata in cur.fetchall():
+                    stored.setdefault(doc_id, {})[chunk_id] = (record_id, metadata)
+        logging.info(
+            f"Looked up the stored chunks of {len(doc_ids)} documents "
+            f"in {time.time() - start_time:.3f} seconds"
+        )
+        return stored
 
     def get_embedding(self, text: str) -> List[float]:
         """
@@ -74,30 +506,346 @@ class VectorStore:
             A list of floats representing the embedding.
         """
         text = text.replace("\n", " ")
-        start_time = time.time()
-        embedding = (
-            self.openai_client.embeddings.create(
-                input=[text],
-                model=self.embedding_model,
-            )
-            .data[0]
-            .embedding
+        with span("embedding") as attributes:
+            if self.embedding_cache:
+                embedding = self.embedding_cache.get(text)
+                attributes["cache_hit"] = embedding is not None
+                if embedding is not None:
+                    logging.info("Embedding served from cache")
+                    return embedding
+
+            start_time = time.time()
+            embedding = self.embed_batch([text])[0]
+            attributes["tokens"] = estimate_tokens(text)
+            elapsed_time = time.time() - start_time
+            logging.info(f"Embedding generated in {elapsed_time:.3f} seconds")
+
+        if self.embedding_cache:
+            self.embedding_cache.put(text, embedding)
+        return embedding
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for many texts using token-bounded batch requests.
+
+        Args:
+            texts: The input texts to generate embeddings for.
+
+        Returns:
+            A list of embeddings in the same order as ``texts``.
+        """
+        texts = [text.replace("\n", " ") for text in texts]
+        return self.embed_cached(texts, self._embed_uncached)
+
+    def embed_cached(
+        self,
+        texts: List[str],
+        embed_fn: Callable[[List[str]], List[List[float]]],
+    ) -> List[List[float]]:
+        """
+        Embed texts through the embedding cache, calling ``embed_fn`` only for misses.
+
+        Duplicate texts are embedded once, and new embeddings are written back to
+        the cache.
+
+        Args:
+            texts: The input texts to generate embeddings for.
+            embed_fn: Embeds a list of texts and returns embeddings in input order.
+
+        Returns:
+            A list of embeddings in the same order as ``texts``.
+        """
+        if not self.embedding_cache:
+            return embed_fn(texts)
+
+        embeddings, missing = self.embedding_cache.lookup(texts)
+        if missing:
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            new_embeddings = embed_fn(unique_texts)
+            self.embedding_cache.put_many(unique_texts, new_embeddings)
+            by_text = dict(zip(unique_texts, new_embeddings))
+            for i in missing:
+                embeddings[i] = by_text[texts[i]]
+
+        logging.info(
+            f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses"
+        )
+        return embeddings
+
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts sequentially in token-bounded batches, bypassing the cache."""
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        batches = batch_texts(
+            texts,
+            self.settings.openai.embedding_batch_size,
+            self.settings.openai.embedding_batch_max_tokens,
         )
+
+        start_time = time.time()
+        for batch in batches:
+            batch_embeddings = self.embed_batch([texts[i] for i in batch])
+            for i, embedding in zip(batch, batch_embeddings):
+                embeddings[i] = embedding
         elapsed_time = time.time() - start_time
-        logging.info(f"Embedding generated in {elapsed_time:.3f} seconds")
-        return embedding
+        logging.info(
+            f"Generated {len(texts)} embeddings in {len(batches)} requests "
+            f"in {elapsed_time:.3f} seconds"
+        )
+        return embeddings
+
+    def embed_batch(
+        self, texts: List[str], max_retries: Optional[int] = None
+    ) -> List[List[float]]:
+        """
+        Send a single embedding request for a batch of texts.
+
+        Args:
+            texts: The input texts, already within the provider's request limits.
+            max_retries: Override the OpenAI client's built-in retries (e.g. 0 when
+                the caller handles retries itself).
+
+        Returns:
+            A list of embeddings in the same order as ``texts``.
+        """
+        openai_client = self.openai_client
+        if max_retries is not None:
+            openai_client = openai_client.with_options(max_retries=max_retries)
+        response = openai_client.embeddings.create(
+            input=texts,
+            model=self.embedding_model,
+            **self.embedding_request_options(),
+        )
+        # The API documents ordered output, but sort by index to be safe
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+    def embedding_request_options(self) -> Dict[str, Any]:
+        """Extra embedding request arguments, i.e. ``dimensions`` for shortened embeddings."""
+        dimensions = self.settings.openai.embedding_dimensions
+        return {"dimensions": dimensions} if dimensions else {}
 
     def create_tables(self) -> None:
-        """Create the necessary tablesin the database"""
+        """
+        Create the necessary tables in the database, including the stored tsvector
+        column, the term statistics and the version table used to detect changes
+        across processes.
+        """
         self.vec_client.create_tables()
+        self.create_keyword_search_column()
+        self.term_stats.create_table()
+        self.table_version.create()
+
+    def create_index(self, **diskann_params: Any) -> None:
+        """
+        Create the StreamingDiskANN index to speed up similarity search.
+
+        Build parameters come from IndexSettings and can be overridden per call,
+        and the build runs with the configured maintenance_work_mem. With
+        IndexSettings.binary_quantization, the binary-quantized HNSW index is
+        built instead (see create_binary_quantized_index).
+
+        Args:
+            diskann_params: Overrides for num_neighbors, search_list_size, max_alpha,
+                storage_layout or num_bits_per_dimension.
+
+        Example:
+            vector_store.create_index(num_neighbors=50, search_list_size=100)
+        """
+        if self.settings.index.binary_quantization:
+            self.create_binary_quantized_index()
+            return
+        params = self.diskann_build_params()
+        params.update({k: v for k, v in diskann_params.items() if v is not None})
+        with_clause = ", ".join(
+            f"{name} = '{value}'" if isinstance(value, str) else f"{name} = {value}"
+            for name, value in params.items()
+        )
+        create_index_sql = f"""
+        CREATE INDEX IF NOT EXISTS {self.embedding_index_name}
+        ON {self.vector_settings.table_name} USING diskann (embedding)
+        {f"WITH ({with_clause})" if with_clause else ""}
+        """
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                self._set_maintenance_work_mem(cur)
+                cur.execute(create_index_sql)
+        logging.info(f"DiskANN index '{self.embedding_index_name}' created with {params or 'defaults'}")
 
-    def create_index(self) -> None:
-        """Create the StreamingDiskANN index to spseed up similarity search"""
-        self.vec_client.create_embedding_index(client.DiskAnnIndex())
+    def create_binary_quantized_index(self) -> None:
+        """
+        Create an HNSW index over the binary-quantized embeddings.
+
+        ``binary_quantize`` keeps one bit per dimension, so the index is 32 times
+        smaller than one over float32 embeddings. It is an expression index, so
+        the table needs no extra column; searches use it for a first stage by
+        Hamming distance and rescore the candidates with the full embeddings.
+        """
+        create_index_sql = f"""
+        CREATE INDEX IF NOT EXISTS {self.binary_quantized_index_name}
+        ON {self.vector_settings.table_name}
+        USING hnsw (({self._binary_quantized_sql("embedding")}) bit_hamming_ops)
+        """
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                self._set_maintenance_work_mem(cur)
+                cur.execute(create_index_sql)
+        logging.info(f"Binary-quantized index '{self.binary_quantized_index_name}' created")
+
+    @property
+    def binary_quantized_index_name(self) -> str:
+        """Name of the HNSW index over the binary-quantized embeddings."""
+        return f"{self.vector_settings.table_name}_embedding_bq_idx"
+
+    def _binary_quantized_sql(self, expression: str) -> str:
+        """SQL quantizing a vector expression to one bit per dimension, as indexed."""
+        return f"binary_quantize({expression})::bit({self.vector_settings.embedding_dimensions})"
+
+    def _binary_candidates(self, limit: int) -> int:
+        """The number of Hamming-distance candidates rescored for ``limit`` results."""
+        return limit * self.settings.search.binary_rescore_factor
+
+    def _semantic_candidates_sql(
+        self, embedding_param: str, candidates_param: str, where_clause: str = ""
+    ) -> str:
+        """
+        The FROM source of a semantic search: the table, or with binary quantization
+        its nearest rows by Hamming distance, to be ranked by exact cosine distance.
+        """
+        table_name = self.vector_settings.table_name
+        if not self.settings.index.binary_quantization:
+            return f"{table_name} {where_clause}"
+        return f"""(
+            SELECT id, metadata, contents, embedding
+            FROM {table_name}
+            {where_clause}
+            ORDER BY {self._binary_quantized_sql("embedding")}
+                <~> {self._binary_quantized_sql(f"{embedding_param}::vector")}
+            LIMIT {candidates_param}
+        ) candidates"""
+
+    def diskann_build_params(self) -> Dict[str, Any]:
+        """Return the DiskANN build parameters configured in IndexSettings."""
+        index_settings = self.settings.index
+        params = {
+            "num_neighbors": index_settings.diskann_num_neighbors,
+            "search_list_size": index_settings.diskann_search_list_size,
+            "max_alpha": index_settings.diskann_max_alpha,
+            "storage_layout": index_settings.diskann_storage_layout,
+            "num_bits_per_dimension": index_settings.diskann_num_bits_per_dimension,
+        }
+        return {name: value for name, value in params.items() if value is not None}
+
+    def diskann_query_params(self) -> Dict[str, Any]:
+        """Return the DiskANN query-time parameters configured in SearchSettings."""
+        search_settings = self.settings.search
+        params = {
+            "search_list_size": search_settings.diskann_query_search_list_size,
+            "rescore": search_settings.diskann_query_rescore,
+        }
+        return {name: value for name, value in params.items() if value is not None}
+
+    def _ann_query_settings_sql(self, limit: int) -> Optional[Tuple[str, List[str]]]:
+        """
+        Build a statement applying the ANN query parameters for a search of
+        ``limit`` rows to the current transaction, or None if all are left at
+        their defaults.
+
+        These are the DiskANN query parameters, or with binary quantization an
+        HNSW ``ef_search`` large enough to return all the candidates.
+        """
+        if self.settings.index.binary_quantization:
+            # HNSW returns at most ef_search rows, which is capped at 1000
+            params = {"hnsw.ef_search": max(40, min(self._binary_candidates(limit), 1000))}
+        else:
+            params = {
+                f"diskann.query_{name}": value
+                for name, value in self.diskann_query_params().items()
+            }
+        if not params:
+            return None
+        calls = ", ".join("set_config(%s, %s, true)" for _ in params)
+        return f"SELECT {calls}", [str(item) for pair in params.items() for item in pair]
 
     def drop_index(self) -> None:
-        """Drop the StreamingDiskANN index in the database"""
-        self.vec_client.drop_embedding_index()
+        """Drop the StreamingDiskANN and binary-quantized indexes in the database"""
+        with self.connection() as conn:
+            conn.execute(f"DROP INDEX IF EXISTS {self.embedding_index_name}")
+            conn.execute(f"DROP INDEX IF EXISTS {self.binary_quantized_index_name}")
+        logging.info(
+            f"Dropped indexes '{self.embedding_index_name}' and '{self.binary_quantized_index_name}'"
+        )
+
+    def index_status(self) -> List[Dict[str, Any]]:
+        """
+        Describe the indexes on the table.
+
+        Returns:
+            One dict per index with its name, access method, definition (including
+            build parameters), storage options, size in bytes and validity.
+        """
+        status_sql = """
+        SELECT c.relname AS name,
+               am.amname AS method,
+               pg_get_indexdef(i.indexrelid) AS definition,
+               c.reloptions AS options,
+               pg_relation_size(i.indexrelid) AS size_bytes,
+               i.indisvalid AS valid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_am am ON am.oid = c.relam
+        WHERE i.indrelid = %s::regclass
+        ORDER BY c.relname
+        """
+        from psycopg.rows import dict_row
+
+        with self.connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(status_sql, (self.vector_settings.table_name,))
+                return cur.fetchall()
+
+    def rebuild_indexes(self, **diskann_params: Any) -> Dict[str, float]:
+        """
+        Drop and rebuild the DiskANN and keyword search indexes.
+
+        Args:
+            diskann_params: Overrides for the DiskANN build parameters (see create_index).
+
+        Returns:
+            Seconds spent building each index.
+        """
+        self.drop_index()
+        self.drop_keyword_search_index()
+        return self._build_indexes(**diskann_params)
+
+    def _build_indexes(self, **diskann_params: Any) -> Dict[str, float]:
+        timings: Dict[str, float] = {}
+        self._timed(timings, "diskann", self.create_index, **diskann_params)
+        self._timed(timings, "keyword", self.create_keyword_search_index)
+        logging.info(
+            "Index build timings: "
+            + ", ".join(f"{index}={elapsed:.3f}s" for index, elapsed in timings.items())
+        )
+        return timings
+
+    @contextmanager
+    def deferred_indexes(self, **diskann_params: Any) -> Iterator[Dict[str, float]]:
+        """
+        Bulk-load mode: drop the DiskANN and GIN indexes, load, then rebuild them.
+
+        Rows inserted inside the block skip incremental index maintenance, and both
+        indexes are built once at the end. The yielded dict is filled with the
+        build timings when the block exits.
+
+        Example:
+            with vector_store.deferred_indexes() as timings:
+                vector_store.upsert(df)
+        """
+        timings: Dict[str, float] = {}
+        self.drop_index()
+        self.drop_keyword_search_index()
+        try:
+            yield timings
+        finally:
+            timings.update(self._build_indexes(**diskann_params))
 
     def upsert(self, df: pd.DataFrame) -> None:
         """
@@ -107,11 +855,112 @@ class VectorStore:
             df: A pandas DataFrame containing the data to insert or update.
                 Expected columns: id, metadata, contents, embedding
         """
-        records = df.to_records(index=False)
-        self.vec_client.upsert(list(records))
+        import numpy as np
+
+        if df.empty:
+            return
+        self.upsert_records(
+            df["id"].tolist(),
+            df["metadata"].tolist(),
+            df["contents"].tolist(),
+            np.asarray(df["embedding"].tolist(), dtype=np.float32),
+        )
+
+    def upsert_records(
+        self,
+        ids: List[Union[str, uuid.UUID]],
+        metadata: List[dict],
+        contents: List[str],
+        embeddings: np.ndarray,
+        batch_size: Optional[int] = None,
+    ) -> None:
+        """
+        Bulk insert or update records with binary ``COPY ... FROM STDIN``.
+
+        Each batch is streamed into a temporary table in PostgreSQL's binary COPY
+        format, with embeddings encoded directly from rows of a contiguous float32
+        array, then merged into the table with ``INSERT ... ON CONFLICT (id) DO UPDATE``.
+        The term statistics are updated in the same transaction, and each
+        committed batch is applied to the local index.
+
+        Args:
+            ids: Record ids (UUIDs or their string form).
+            metadata: Metadata dicts, stored as JSONB.
+            contents: Record texts.
+            embeddings: A (n, embedding_dimensions) array of embeddings.
+            batch_size: Rows per COPY batch. Defaults to VectorStoreSettings.copy_batch_size.
+        """
+        import numpy as np
+        from pgvector.psycopg import register_vector
+        from psycopg.types.json import Jsonb
+
+        batch_size = batch_size or self.vector_settings.copy_batch_size
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        table_name = self.vector_settings.table_name
+        columns = "id, metadata, contents, embedding"
+        merge_sql = f"""
+        INSERT INTO {table_name} ({columns})
+        SELECT {columns} FROM _upsert_batch
+        ON CONFLICT (id) DO UPDATE SET
+            metadata = EXCLUDED.metadata,
+            contents = EXCLUDED.contents,
+            embedding = EXCLUDED.embedding
+        """
+
+        start_time = time.time()
+        self.term_stats.ensure_table()
+        track_versions = self._tracks_local_index_versions()
+        for start in range(0, len(ids), batch_size):
+            end = min(start + batch_size, len(ids))
+            with self.connection() as conn:
+                before = self.table_version.read(conn, lock=True) if track_versions else None
+                register_vector(conn)
+                conn.execute(
+                    f"""
+                    CREATE TEMP TABLE _upsert_batch (
+                        id uuid, metadata jsonb, contents text,
+                        embedding vector({embeddings.shape[1]})
+                    ) ON COMMIT DROP
+                    """
+                )
+                with conn.cursor() as cur:
+                    with cur.copy(
+                        f"COPY _upsert_batch ({columns}) FROM STDIN WITH (FORMAT BINARY)"
+                    ) as copy:
+                        copy.set_types(["uuid", "jsonb", "text", "vector"])
+                        for i in range(start, end):
+                            record_id = ids[i]
+                            copy.write_row(
+                                (
+                                    record_id if isinstance(record_id, uuid.UUID) else uuid.UUID(record_id),
+                                    Jsonb(metadata[i]),
+                                    contents[i],
+                                    embeddings[i],
+                                )
+                            )
+                    self.term_stats.apply_delta(
+                        conn,
+                        added_sql="SELECT contents FROM _upsert_batch",
+                        removed_sql=f"SELECT contents FROM {table_name} "
+                        "WHERE id IN (SELECT id FROM _upsert_batch)",
+                    )
+                    cur.execute(merge_sql)
+                after = self.table_version.read(conn) if track_versions else None
+            self._apply_to_local_index(
+                "apply_upsert",
+                ids[start:end],
+                metadata[start:end],
+                contents[start:end],
+                embeddings[start:end],
+                before=before,
+                after=after,
+            )
+
+        elapsed_time = time.time() - start_time
         logging.info(
-            f"Inserted {len(df)} records into {self.vector_settings.table_name}"
+            f"Inserted {len(ids)} records into {table_name} in {elapsed_time:.3f} seconds"
         )
+        self._notify_change()
 
     def semantic_search(
         self,
@@ -120,11 +969,18 @@ class VectorStore:
         metadata_filter: Union[dict, List[dict]] = None,
         predicates: Optional[client.Predicates] = None,
         time_range: Optional[Tuple[datetime, datetime]] = None,
-        return_dataframe: bool = True,
-    ) -> Union[List[Tuple[Any, ...]], pd.DataFrame]:
+        return_dataframe: bool = False,
+        query_embedding: Optional[List[float]] = None,
+        include_embedding: bool = False,
+    ) -> Union[List[SearchResult], pd.DataFrame]:
         """
         Query the vector database for similar embeddings based on input text.
 
+        Searches without predicates or a time range are answered exactly by the
+        in-process LocalVectorIndex while the table is small (see
+        LocalIndexSettings), and otherwise run as a single SQL query that selects
+        only the columns needed; the others go through the Timescale Vector client.
+
         More info:
             https://github.com/timescale/docs/blob/latest/ai/python-interface-for-pgvector-and-timescale-vector.md
 
@@ -138,10 +994,12 @@ class VectorStore:
                 - & is used to combine multiple predicates with AND operator.
                 - | is used to combine multiple predicates with OR operator.
             time_range: A tuple of (start_date, end_date) to filter results by time.
-            return_dataframe: Whether to return results as a DataFrame (default: True).
+            return_dataframe: Whether to return results as a DataFrame (default: False).
+            query_embedding: A precomputed embedding of the query, to skip embedding it here.
+            include_embedding: Whether to fetch the stored embeddings (default: False).
 
         Returns:
-            Either a list of tuples or a pandas DataFrame containing the search results.
+            Either a list of SearchResult or a pandas DataFrame containing the search results.
 
         Basic Examples:
             Basic search:
@@ -161,10 +1019,98 @@ class VectorStore:
             Search with time range:
                 vector_store.semantic_search("Recent updates", time_range=(datetime(2024, 1, 1), datetime(2024, 1, 31)))
         """
-        query_embedding = self.get_embedding(query)
+        self.check_for_changes()
+        if query_embedding is None:
+            query_embedding = self.get_embedding(query)
 
         start_time = time.time()
+        local_index = self._ready_local_index(predicates, time_range)
+        with span("semantic_search", exact=local_index is not None) as attributes:
+            if local_index is not None:
+                results = local_index.search(
+                    query_embedding, limit, metadata_filter, include_embedding
+                )
+            else:
+                if predicates or time_range:
+                    search_args = self._build_search_args(
+                        limit, metadata_filter, predicates, time_range
+                    )
+                    rows = self.vec_client.search(query_embedding, **search_args)
+                else:
+                    search_sql, params = self._semantic_search_query(
+                        query_embedding, limit, metadata_filter, include_embedding
+                    )
+                    with self.connection() as conn:
+                        query_settings = self._ann_query_settings_sql(limit)
+                        if query_settings:
+                            conn.execute(*query_settings)
+                        rows = conn.execute(search_sql, params).fetchall()
+                results = self._semantic_results(rows, include_embedding)
+            attributes["candidates"] = len(results)
+        self._log_search_time(
+            "Exact" if local_index is not None else "Vector", time.time() - start_time
+        )
+
+        return results_to_dataframe(results) if return_dataframe else results
+
+    def _semantic_search_query(
+        self,
+        query_embedding: List[float],
+        limit: int,
+        metadata_filter: Union[dict, List[dict]] = None,
+        include_embedding: bool = False,
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the ANN search SQL and its parameters.
+
+        A list of metadata filters matches rows containing any of them, as in the
+        Timescale Vector client. Rows are (id, metadata, contents, embedding or NULL,
+        distance).
+        """
+        from psycopg.types.json import Jsonb
+
+        filters = [metadata_filter] if isinstance(metadata_filter, dict) else metadata_filter or []
+        where_clause = (
+            "WHERE " + " OR ".join(["metadata @> %s"] * len(filters)) if filters else ""
+        )
+        search_sql = f"""
+        SELECT id, metadata, contents, {"embedding::text" if include_embedding else "NULL"},
+               embedding <=> %s::vector AS distance
+        FROM {self._semantic_candidates_sql("%s", "%s", where_clause)}
+        ORDER BY distance
+        LIMIT %s
+        """
+        embedding = vector_literal(query_embedding)
+        params = [embedding, *(Jsonb(f) for f in filters)]
+        if self.settings.index.binary_quantization:
+            params += [embedding, self._binary_candidates(limit)]
+        return search_sql, [*params, limit]
+
+    @staticmethod
+    def _semantic_results(
+        rows: List[Tuple[Any, ...]], include_embedding: bool = False
+    ) -> List[SearchResult]:
+        """Convert (id, metadata, contents, embedding, distance) rows into results."""
+        return [
+            SearchResult(
+                id=str(row[0]),
+                content=row[2],
+                search_type="semantic",
+                metadata=row[1],
+                distance=row[4],
+                embedding=parse_embedding(row[3]) if include_embedding else None,
+            )
+            for row in rows
+        ]
 
+    def _build_search_args(
+        self,
+        limit: int,
+        metadata_filter: Union[dict, List[dict]] = None,
+        predicates: Optional[client.Predicates] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None,
+    ) -> Dict[str, Any]:
+        """Build the keyword arguments for a Timescale Vector search call."""
         search_args = {
             "limit": limit,
         }
@@ -176,46 +1122,18 @@ class VectorStore:
             search_args["predicates"] = predicates
 
         if time_range:
+            from timescale_vector import client
+
             start_date, end_date = time_range
             search_args["uuid_time_filter"] = client.UUIDTimeRange(start_date, end_date)
 
-        results = self.vec_client.search(query_embedding, **search_args)
-        elapsed_time = time.time() - start_time
-
-        self._log_search_time("Vector", elapsed_time)
-
-        if return_dataframe:
-            return self._create_dataframe_from_results(results)
-        else:
-            return results
-
-    def _create_dataframe_from_results(
-        self,
-        results: List[Tuple[Any, ...]],
-    ) -> pd.DataFrame:
-        """
-        Create a pandas DataFrame from the search results.
-
-        Args:
-            results: A list of tuples containing the search results.
-
-        Returns:
-            A pandas DataFrame containing the formatted search results.
-        """
-        # Convert results to DataFrame
-        df = pd.DataFrame(
-            results, columns=["id", "metadata", "content", "embedding", "distance"]
-        )
-
-        # Expand metadata column
-        df = pd.concat(
-            [df.drop(["metadata"], axis=1), df["metadata"].apply(pd.Series)], axis=1
-        )
+        query_params = self.diskann_query_params()
+        if query_params:
+            from timescale_vector import client
 
-        # Convert id to string for better readability
-        df["id"] = df["id"].astype(str)
+            search_args["query_params"] = client.DiskAnnIndexParams(**query_params)
 
-        return df
+        return search_args
 
     def delete(
         self,
@@ -248,19 +1166,100 @@ class VectorStore:
                 "Provide exactly one of: ids, metadata_filter, or delete_all"
             )
 
-        if delete_all:
-            self.vec_client.delete_all()
-            logging.info(f"Deleted all records from {self.vector_settings.table_name}")
-        elif ids:
-            self.vec_client.delete_by_ids(ids)
-            logging.info(
-                f"Deleted {len(ids)} records from {self.vector_settings.table_name}"
-            )
-        elif metadata_filter:
-            self.vec_client.delete_by_metadata(metadata_filter)
-            logging.info(
-                f"Deleted records matching metadata filter from {self.vector_settings.table_name}"
-            )
+        table_name = self.vector_settings.table_name
+        self.term_stats.ensure_table()
+        track_versions = self._tracks_local_index_versions()
+        with self.connection() as conn:
+            before = self.table_version.read(conn, lock=True) if track_versions else None
+            if delete_all:
+                conn.execute(f"DELETE FROM {table_name}")
+                self.term_stats.clear(conn)
+                logging.info(f"Deleted all records from {table_name}")
+            else:
+                if ids:
+                    condition, params = "id = ANY(%s::uuid[])", [[str(i) for i in ids]]
+                else:
+                    from psycopg.types.json import Jsonb
+
+                    # A list of filters matches records matching any of them
+                    filters = (
+                        metadata_filter if isinstance(metadata_filter, list) else [metadata_filter]
+                    )
+                    condition = "metadata @> ANY(%s::jsonb[])"
+                    params = [[Jsonb(f) for f in filters]]
+                # The deleted contents are kept until commit to update the term statistics
+                conn.execute("CREATE TEMP TABLE _delete_batch (contents text) ON COMMIT DROP")
+                deleted = conn.execute(
+                    f"""
+                    WITH deleted AS (
+                        DELETE FROM {table_name} WHERE {condition} RETURNING contents
+                    )
+                    INSERT INTO _delete_batch SELECT contents FROM deleted
+                    """,
+                    params,
+                ).rowcount
+                self.term_stats.apply_delta(
+                    conn, removed_sql="SELECT contents FROM _delete_batch"
+                )
+                logging.info(f"Deleted {deleted} records from {table_name}")
+
+            after = self.table_version.read(conn) if track_versions else None
+        self._apply_to_local_index(
+            "apply_delete", ids, metadata_filter, delete_all, before=before, after=after
+        )
+        self._notify_change()
+
+    def update_metadata(self, ids: List[str], metadata: List[dict]) -> None:
+        """
+        Replace the metadata of existing records, keeping their contents and embeddings.
+
+        The stored tsvector is regenerated from the new title; the term statistics
+        only count contents, so they are unchanged.
+
+        Args:
+            ids: Record ids.
+            metadata: The new metadata dict of each record.
+        """
+        from psycopg.types.json import Jsonb
+
+        if not ids:
+            return
+        table_name = self.vector_settings.table_name
+        update_sql = f"""
+        UPDATE {table_name} t SET metadata = u.metadata
+        FROM unnest(%s::uuid[], %s::jsonb[]) AS u(id, metadata)
+        WHERE t.id = u.id
+        """
+        track_versions = self._tracks_local_index_versions()
+        with self.connection() as conn:
+            before = self.table_version.read(conn, lock=True) if track_versions else None
+            updated = conn.execute(
+                update_sql, ([str(i) for i in ids], [Jsonb(m) for m in metadata])
+            ).rowcount
+            after = self.table_version.read(conn) if track_versions else None
+        logging.info(f"Updated the metadata of {updated} records in {table_name}")
+        self._apply_to_local_index("apply_metadata", ids, metadata, before=before, after=after)
+        self._notify_change()
+
+    def _tracks_local_index_versions(self) -> bool:
+        """Whether writes read the table version around their changes, for the local index."""
+        return self.local_index is not None and self.table_version.current() is not None
+
+    def _apply_to_local_index(
+        self, method: str, *args: Any, before: Optional[str], after: Optional[str]
+    ) -> None:
+        """
+        Apply a committed write to the local index, if it is enabled.
+
+        ``before`` and ``after`` are the table versions read (with the version row
+        locked) at the start and end of the writing transaction.
+        """
+        if after is not None:
+            # This process has seen its own write
+            self.table_version.remember(after)
+            self._seen_version = after
+        if self.local_index is not None:
+            getattr(self.local_index, method)(*args, before=before, after=after)
 
     def _log_search_time(self, search_type: str, elapsed_time: float) -> None:
         """
@@ -272,93 +1271,247 @@ class VectorStore:
         """
         logging.info(f"{search_type} search completed in {elapsed_time:.3f} seconds")
 
-    def extract_keywords_with_llm(self, query: str) -> List[str]:
-        """Extract keywords from the query using an LLM."""
-        # Set the OpenAI API key
-        client = OpenAI()
-        OpenAI.api_key = self.settings.openai.api_key
-
-        # Define the prompt for keyword extraction
-        message = [
-            {
-            "role": "system",
-             "content": "You are a financial analyst. Your task is to extract the two most important keywords from the given query, and return them as a list of strings."},
-            {
-            "role": "user",
-            "content": f"""Extract the most important keywords from the following query: '{query}'
-            Only return only two keywords, no other text.
-            """
-            }
-        ]
+    def extract_keywords(self, query: str) -> List[str]:
+        """Extract search keywords from the query with the configured strategy."""
+        return self.keyword_extractor.extract(query)
 
-        # Call the OpenAI API to get the keywords
-        response = client.beta.chat.completions.parse(
-            model="gpt-4o-mini",
-            messages=message,
-            response_format=Keywords
-        )
-        
-        keywords = response.choices[0].message.parsed.content
-        # Extract keywords from the response
-        if isinstance(keywords, list) and all(isinstance(i, list) for i in keywords):
-            keywords = [item for sublist in keywords for item in sublist]
+    def build_keyword_query(self, query: str) -> str:
+        """
+        Turn a natural-language query into a full-text search query.
+
+        Args:
+            query: The search query string.
 
-        #keywords = response.choices[0].message.parsed.content
-        return keywords
+        Returns:
+            A ``to_tsquery`` expression OR-ing the extracted keywords and their synonyms.
+        """
+        with span("keyword_extraction") as attributes:
+            keywords = self.extract_keywords(query)
+            logging.info(f"Extracted keywords: {keywords}")
+            search_query = self._keywords_to_tsquery(keywords)
+            attributes["keywords"] = len(keywords)
+        return search_query
+
+    def _keywords_to_tsquery(self, keywords: List[str]) -> str:
+        """Expand keywords with synonyms and OR them into a ``to_tsquery`` expression."""
+        expanded_keywords = self.synonyms.expand(keywords) if self.synonyms else keywords
+        logging.info(f"Expanded keywords: {expanded_keywords}")
+
+        # Multi-word keywords become phrases; everything else would break to_tsquery
+        terms = []
+        for keyword in expanded_keywords:
+            words = re.findall(r"[^\W_]+", keyword)
+            if words:
+                terms.append(" <-> ".join(words))
+        search_query = ' | '.join(dict.fromkeys(terms))
+        logging.info(f"Search query: {search_query}")
+        return search_query
 
     def keyword_search(
-        self, query: str, limit: int = 5, return_dataframe: bool = True
-    ) -> Union[List[Tuple[str, str, float]], pd.DataFrame]:
+        self,
+        query: str,
+        limit: int = 5,
+        return_dataframe: bool = False,
+        search_query: Optional[str] = None,
+    ) -> Union[List[SearchResult], pd.DataFrame]:
         """
         Perform a keyword search on the contents of the vector store.
 
         Args:
             query: The search query string.
             limit: The maximum number of results to return. Defaults to 5.
-            return_dataframe: Whether to return results as a DataFrame. Defaults to True.
+            return_dataframe: Whether to return results as a DataFrame. Defaults to False.
+            search_query: A precomputed ``to_tsquery`` expression (see build_keyword_query),
+                to skip keyword extraction here.
 
         Returns:
-            Either a list of tuples (id, contents, rank) or a pandas DataFrame containing the search results.
+            Either a list of SearchResult (with text_rank set) or a pandas DataFrame
+            containing the search results.
 
         Example:
             results = vector_store.keyword_search("shipping options")
         """
-        # Extract keywords using LLM
-        keywords = self.extract_keywords_with_llm(query)
-        logging.info(f"Extracted keywords: {keywords}")
+        self.check_for_changes()
+        if search_query is None:
+            search_query = self.build_keyword_query(query)
 
-        # Expand keywords with synonyms
-        expanded_keywords = expand_with_synonyms(keywords)
-        logging.info(f"Expanded keywords: {expanded_keywords}")
+        search_sql = self._keyword_search_sql()
+        start_time = time.time()
 
-        # Construct a search query with expanded keywords
-        search_query = ' | '.join(expanded_keywords)
-        logging.info(f"Search query: {search_query}")
+        with span("keyword_search") as attributes, self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(search_sql, (search_query, limit))
+                results = self._keyword_results(cur.fetchall())
+            attributes["candidates"] = len(results)
 
-        search_sql = f"""
-        SELECT id, contents, ts_rank_cd(to_tsvector('english', contents), query) as rank
+        elapsed_time = time.time() - start_time
+        self._log_search_time("Keyword", elapsed_time)
+
+        return results_to_dataframe(results) if return_dataframe else results
+
+    def _keyword_search_sql(self) -> str:
+        """Full-text search SQL taking (tsquery expression, limit) parameters."""
+        return f"""
+        SELECT id, contents, ts_rank_cd({self._rank_weights_sql()}, contents_tsv, query) as rank,
+               metadata
         FROM {self.vector_settings.table_name}, to_tsquery('english', %s) query
-        WHERE to_tsvector('english', contents) @@ query
+        WHERE contents_tsv @@ query
         ORDER BY rank DESC
         LIMIT %s
         """
 
-        start_time = time.time()
+    def _rank_weights_sql(self) -> str:
+        """The configured ts_rank_cd weights as a float4[] literal, ordered {D, C, B, A}."""
+        weights = ",".join(str(float(w)) for w in self.settings.index.keyword_rank_weights)
+        return f"'{{{weights}}}'::float4[]"
+
+    @staticmethod
+    def _keyword_results(rows: List[Tuple[Any, ...]]) -> List[SearchResult]:
+        """Convert (id, contents, rank, metadata) rows into results."""
+        return [
+            SearchResult(
+                id=str(row[0]),
+                content=row[1],
+                search_type="keyword",
+                metadata=row[3],
+                text_rank=row[2],
+            )
+            for row in rows
+        ]
+
+    def fused_search(
+        self,
+        query: str,
+        keyword_k: int = 5,
+        semantic_k: int = 5,
+        limit: Optional[int] = None,
+        return_dataframe: bool = False,
+        query_embedding: Optional[List[float]] = None,
+        search_query: Optional[str] = None,
+    ) -> Union[List[SearchResult], pd.DataFrame]:
+        """
+        Retrieve keyword and semantic candidates in one SQL statement, ranked by
+        weighted reciprocal-rank fusion.
+
+        The ANN and full-text candidate queries run as CTEs. Each candidate scores
+        ``weight / (rrf_k + rank)`` per branch it appears in, and the scores are
+        summed on the server (see SearchSettings), so the results come back in a
+        usable order from a single round trip.
+
+        Args:
+            query: The search query string.
+            keyword_k: The number of full-text candidates. Defaults to 5.
+            semantic_k: The number of ANN candidates. Defaults to 5.
+            limit: The maximum number of fused results. Defaults to all candidates.
+            return_dataframe: Whether to return results as a DataFrame. Defaults to False.
+            query_embedding: A precomputed embedding of the query.
+            search_query: A precomputed ``to_tsquery`` expression (see build_keyword_query).
 
-        with psycopg.connect(self.settings.database.service_url) as conn:
+        Returns:
+            Either a list of SearchResult (with fused_score set, and search_type
+            "semantic", "keyword" or "hybrid" by the branches that found each chunk)
+            or a DataFrame, best first.
+        """
+        self.check_for_changes()
+        if query_embedding is None:
+            query_embedding = self.get_embedding(query)
+        if search_query is None:
+            search_query = self.build_keyword_query(query)
+
+        start_time = time.time()
+        with span("fused_search") as attributes, self.connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(search_sql, (search_query, limit))
-                results = cur.fetchall()
+                query_settings = self._ann_query_settings_sql(semantic_k)
+                if query_settings:
+                    cur.execute(*query_settings)
+                cur.execute(
+                    self._fused_search_sql(),
+                    self._fused_search_params(
+                        query_embedding, search_query, keyword_k, semantic_k, limit
+                    ),
+                )
+                results = self._fused_results(cur.fetchall())
+            attributes["candidates"] = len(results)
+        self._log_search_time("Fused", time.time() - start_time)
+
+        return results_to_dataframe(results) if return_dataframe else results
+
+    def _fused_search_sql(self) -> str:
+        """Weighted reciprocal-rank fusion SQL over ANN and full-text candidates."""
+        table_name = self.vector_settings.table_name
+        return f"""
+        WITH semantic AS (
+            SELECT id, metadata, contents, row_number() OVER (ORDER BY distance) AS rank
+            FROM (
+                SELECT id, metadata, contents, embedding <=> %(embedding)s::vector AS distance
+                FROM {self._semantic_candidates_sql("%(embedding)s", "%(semantic_candidates)s")}
+                ORDER BY distance
+                LIMIT %(semantic_k)s
+            ) ann
+        ),
+        keyword AS (
+            SELECT id, metadata, contents, row_number() OVER (ORDER BY text_rank DESC) AS rank
+            FROM (
+                SELECT id, metadata, contents,
+                       ts_rank_cd({self._rank_weights_sql()}, contents_tsv, query) AS text_rank
+                FROM {table_name}, to_tsquery('english', %(tsquery)s) query
+                WHERE contents_tsv @@ query
+                ORDER BY text_rank DESC
+                LIMIT %(keyword_k)s
+            ) fts
+        )
+        SELECT coalesce(s.id, k.id) AS id,
+               coalesce(s.contents, k.contents) AS contents,
+               coalesce(%(semantic_weight)s / (%(rrf_k)s + s.rank), 0)
+                 + coalesce(%(keyword_weight)s / (%(rrf_k)s + k.rank), 0) AS fused_score,
+               s.rank AS semantic_rank,
+               k.rank AS keyword_rank,
+               coalesce(s.metadata, k.metadata) AS metadata
+        FROM semantic s
+        FULL OUTER JOIN keyword k ON s.id = k.id
+        ORDER BY fused_score DESC
+        LIMIT %(limit)s
+        """
 
-        elapsed_time = time.time() - start_time
-        self._log_search_time("Keyword", elapsed_time)
+    def _fused_search_params(
+        self,
+        query_embedding: List[float],
+        search_query: str,
+        keyword_k: int,
+        semantic_k: int,
+        limit: Optional[int],
+    ) -> Dict[str, Any]:
+        search_settings = self.settings.search
+        return {
+            "embedding": vector_literal(query_embedding),
+            "tsquery": search_query,
+            "keyword_k": keyword_k,
+            "semantic_k": semantic_k,
+            "semantic_candidates": self._binary_candidates(semantic_k),
+            "limit": limit or keyword_k + semantic_k,
+            "rrf_k": search_settings.rrf_k,
+            "semantic_weight": float(search_settings.semantic_weight),
+            "keyword_weight": float(search_settings.keyword_weight),
+        }
 
-        if return_dataframe:
-            df = pd.DataFrame(results, columns=["id", "content", "rank"])
-            df["id"] = df["id"].astype(str)
-            return df
-        else:
-            return results
+    @staticmethod
+    def _fused_results(rows: List[Tuple[Any, ...]]) -> List[SearchResult]:
+        """
+        Convert (id, contents, fused_score, semantic_rank, keyword_rank, metadata)
+        rows into results.
+        """
+        return [
+            SearchResult(
+                id=str(row[0]),
+                content=row[1],
+                search_type=(
+                    "hybrid" if row[3] and row[4] else "semantic" if row[3] else "keyword"
+                ),
+                metadata=row[5],
+                fused_score=float(row[2]),
+            )
+            for row in rows
+        ]
 
     def hybrid_search(
         self,
@@ -367,83 +1520,194 @@ class VectorStore:
         semantic_k: int = 5,
         rerank: bool = False,
         top_n: int = 5,
-    ) -> pd.DataFrame:
+        return_timings: bool = False,
+        mode: Optional[str] = None,
+        return_dataframe: bool = False,
+        query_embedding: Optional[List[float]] = None,
+        search_query: Optional[str] = None,
+    ) -> Union[
+        List[SearchResult],
+        pd.DataFrame,
+        Tuple[Union[List[SearchResult], pd.DataFrame], Dict[str, float]],
+    ]:
         """
         Perform a hybrid search combining keyword and semantic search results,
-        with optional reranking using Cohere.
+        with optional reranking (Cohere or the local cross-encoder, see RerankerSettings).
+
+        In "fused" mode, keyword extraction and the query embedding run concurrently,
+        then a single SQL statement retrieves both candidate sets and ranks them by
+        reciprocal-rank fusion (see fused_search). In "union" mode, the keyword branch
+        (keyword extraction, then full-text SQL) and the semantic branch (query
+        embedding, then ANN query) run concurrently and their results are
+        concatenated and deduplicated, unranked.
 
         Args:
             query: The search query string.
             keyword_k: The number of results to return from keyword search. Defaults to 5.
             semantic_k: The number of results to return from semantic search. Defaults to 5.
-            rerank: Whether to apply Cohere reranking. Defaults to True.
+            rerank: Whether to apply reranking. Defaults to False.
             top_n: The number of top results to return after reranking. Defaults to 5.
+            return_timings: Whether to also return per-stage timings. Defaults to False.
+            mode: "fused" or "union". Defaults to SearchSettings.hybrid_mode.
+            return_dataframe: Whether to return results as a DataFrame. Defaults to False.
+            query_embedding: A precomputed embedding of the query, to skip embedding it here.
+            search_query: A precomputed ``to_tsquery`` expression (see build_keyword_query),
+                to skip keyword extraction here.
 
         Returns:
-            A pandas DataFrame containing the combined search results with a 'search_type' column.
+            A list of SearchResult (or a DataFrame) with the combined search results,
+            or a tuple of (results, timings in seconds per stage) if return_timings is True.
 
         Example:
             results = vector_store.hybrid_search("shipping options", keyword_k=3, semantic_k=3, rerank=True, top_n=5)
         """
-        # Perform keyword search
-        keyword_results = self.keyword_search(
-            query, limit=keyword_k, return_dataframe=True
-        )
-        keyword_results["search_type"] = "keyword"
-        keyword_results = keyword_results[["id", "content", "search_type"]]
+        self.check_for_changes()
+        mode = mode or self.settings.search.hybrid_mode
+        timings: Dict[str, float] = {}
+        start_time = time.time()
 
-        # Perform semantic search
-        semantic_results = self.semantic_search(
-            query, limit=semantic_k, return_dataframe=True
+        with span("hybrid_search", mode=mode) as attributes:
+            if mode == "fused":
+                embedding_future = None
+                if query_embedding is None:
+                    embedding_future = self.executor.submit(
+                        in_context(self._timed, timings, "embedding", self.get_embedding, query)
+                    )
+                if search_query is None:
+                    search_query = self._timed(
+                        timings, "keyword_extraction", self.build_keyword_query, query
+                    )
+                if embedding_future is not None:
+                    query_embedding = embedding_future.result()
+                combined_results = self._timed(
+                    timings,
+                    "fused_search",
+                    self.fused_search,
+                    query,
+                    keyword_k=keyword_k,
+                    semantic_k=semantic_k,
+                    query_embedding=query_embedding,
+                    search_query=search_query,
+                )
+            elif mode == "union":
+                combined_results = self._union_search(
+                    query, keyword_k, semantic_k, timings, query_embedding, search_query
+                )
+            else:
+                raise ValueError(f"Unsupported hybrid search mode: {mode}")
+            timings["retrieval"] = time.time() - start_time
+
+            if rerank:
+                combined_results = self._timed(
+                    timings, "rerank", self._rerank_results, query, combined_results, top_n
+                )
+            attributes["candidates"] = len(combined_results)
+
+        timings["total"] = time.time() - start_time
+        logging.info(
+            "Hybrid search timings: "
+            + ", ".join(f"{stage}={elapsed:.3f}s" for stage, elapsed in timings.items())
         )
-        semantic_results["search_type"] = "semantic"
-        semantic_results = semantic_results[["id", "content", "search_type"]]
 
-        # Combine results
-        combined_results = pd.concat(
-            [keyword_results, semantic_results], ignore_index=True
-        )
+        if return_dataframe:
+            combined_results = results_to_dataframe(combined_results)
+        if return_timings:
+            return combined_results, timings
+        return combined_results
 
-        # Remove duplicates, keeping the first occurrence (which maintains the original order)
-        combined_results = combined_results.drop_duplicates(subset=["id"], keep="first")
+    def _union_search(
+        self,
+        query: str,
+        keyword_k: int,
+        semantic_k: int,
+        timings: Dict[str, float],
+        query_embedding: Optional[List[float]] = None,
+        search_query: Optional[str] = None,
+    ) -> List[SearchResult]:
+        """Run the keyword and semantic searches concurrently and combine their results."""
+
+        def keyword_branch() -> List[SearchResult]:
+            keyword_query = search_query
+            if keyword_query is None:
+                keyword_query = self._timed(
+                    timings, "keyword_extraction", self.build_keyword_query, query
+                )
+            return self._timed(
+                timings,
+                "keyword_search",
+                self.keyword_search,
+                query,
+                limit=keyword_k,
+                search_query=keyword_query,
+            )
 
-        if rerank:
-            return self._rerank_results(query, combined_results, top_n)
+        def semantic_branch() -> List[SearchResult]:
+            embedding = query_embedding
+            if embedding is None:
+                embedding = self._timed(timings, "embedding", self.get_embedding, query)
+            return self._timed(
+                timings,
+                "semantic_search",
+                self.semantic_search,
+                query,
+                limit=semantic_k,
+                query_embedding=embedding,
+            )
 
-        return combined_results
+        # Run both retrieval branches concurrently
+        keyword_future = self.executor.submit(in_context(keyword_branch))
+        semantic_future = self.executor.submit(in_context(semantic_branch))
+        return self._combine_results(keyword_future.result(), semantic_future.result())
+
+    @staticmethod
+    def _combine_results(
+        keyword_results: List[SearchResult], semantic_results: List[SearchResult]
+    ) -> List[SearchResult]:
+        """Concatenate keyword and semantic results, keeping the first result per id."""
+        combined: Dict[str, SearchResult] = {}
+        for result in keyword_results + semantic_results:
+            combined.setdefault(result.id, result)
+        return list(combined.values())
+
+    @staticmethod
+    def _timed(timings: Dict[str, float], stage: str, fn: Callable, *args, **kwargs) -> Any:
+        """Call ``fn`` and record its wall-clock time in ``timings[stage]``."""
+        start_time = time.time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings[stage] = time.time() - start_time
 
     def _rerank_results(
-        self, query: str, combined_results: pd.DataFrame, top_n: int
-    ) -> pd.DataFrame:
+        self, query: str, combined_results: List[SearchResult], top_n: int
+    ) -> List[SearchResult]:
         """
-        Rerank the combined search results using Cohere.
+        Rerank the combined search results with the configured reranker.
 
         Args:
             query: The original search query.
-            combined_results: DataFrame containing the combined keyword and semantic search results.
+            combined_results: The combined keyword and semantic search results.
             top_n: The number of top results to return after reranking.
 
         Returns:
-            A pandas DataFrame containing the reranked results.
-        """
-        rerank_results = self.cohere_client.v2.rerank(
-            model="rerank-english-v3.0",
-            query=query,
-            documents=combined_results["content"].tolist(),
-            top_n=top_n,
-            return_documents=True,
-        )
-
-        reranked_df = pd.DataFrame(
-            [
-                {
-                    "id": combined_results.iloc[result.index]["id"],
-                    "content": result.document,
-                    "search_type": combined_results.iloc[result.index]["search_type"],
-                    "relevance_score": result.relevance_score,
-                }
-                for result in rerank_results.results
-            ]
-        )
-
-        return reranked_df.sort_values("relevance_score", ascending=False)
\ No newline at end of file
+            The top results with relevance_score set, best first.
+        """
+        with span("rerank", candidates=len(combined_results)):
+            ranking = self.reranker.rerank(
+                query,
+                [result.content for result in combined_results],
+                top_n,
+                ids=[result.id for result in combined_results],
+            )
+        return self._reranked_results(combined_results, ranking)
+
+    @staticmethod
+    def _reranked_results(
+        combined_results: List[SearchResult], ranking: List[Tuple[int, float]]
+    ) -> List[SearchResult]:
+        """Pick the reranked results from (index, relevance score) pairs, best first."""
+        reranked = [
+            replace(combined_results[index], relevance_score=relevance_score)
+            for index, relevance_score in ranking
+        ]
+        return sorted(reranked, key=lambda result: result.relevance_score, reverse=True)
@@ -0,0 +1,318 @@
+"""
+Measure retrieval quality against latency over a grid of search configurations.
+
+Every combination of the given candidate counts, DiskANN query parameters,
+fusion weights and rerank on/off runs the labelled queries through
+``hybrid_search`` and reports recall@top_n, MRR@top_n and latency, so the cheapest
+configuration meeting a recall target can be chosen:
+
+    python -m app.evaluate queries.jsonl --keyword-k 5 10 20 --semantic-k 5 10 20 \\
+        --search-list-size 50 100 200 --rerank on off --target-recall 0.9
+
+Each line of the query file is a JSON object with the ``query`` and the
+``relevant_chunks`` that should be retrieved for it, as ``[doc_id, chunk_id]``
+pairs (the chunk's metadata, which survives re-ingestion, unlike record ids):
+
+    {"query": "green bond allocation", "relevant_chunks": [["report-3f2a9c1d8e7b", "9c4e...-0"]]}
+
+Without reranking, results are ranked by reciprocal-rank fusion, so evaluate
+with the default "fused" hybrid mode. Comparing ``--binary-quantization on off``
+measures the recall lost to the quantized first stage; the indexes each swept
+value searches must exist (see VectorStore.index_status). Semantic search
+queries the database, so the DiskANN parameters take effect, unless
+``--local-index`` picks another LocalIndexSettings.mode.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import statistics
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .config.settings import get_settings
+from .database.results import SearchResult
+from .database.vector_store import VectorStore
+
+# The SearchSettings fields swept, in report column order
+SWEPT_SETTINGS = (
+    "keyword_k",
+    "semantic_k",
+    "diskann_query_search_list_size",
+    "diskann_query_rescore",
+    "binary_rescore_factor",
+    "semantic_weight",
+    "keyword_weight",
+    "rerank",
+)
+# The IndexSettings fields swept, which only change how the index is queried
+SWEPT_INDEX_SETTINGS = ("binary_quantization",)
+
+
+def load_queries(path: str) -> List[Dict[str, Any]]:
+    """Read the labelled queries, skipping lines without relevant chunks."""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            labelled = json.loads(line)
+            if labelled.get("relevant_chunks"):
+                queries.append(labelled)
+    return queries
+
+
+def chunk_key(doc_id: Any, chunk_id: Any) -> Tuple[str, str]:
+    """The identity of a chunk, compared as strings so JSON labels match stored metadata."""
+    return str(doc_id), str(chunk_id)
+
+
+def score(
+    results: List[SearchResult], relevant_chunks: List[List[Any]], cutoff: int
+) -> Tuple[float, float]:
+    """
+    Score one query's results.
+
+    Args:
+        results: The ranked results, with metadata.
+        relevant_chunks: The ``[doc_id, chunk_id]`` pairs of the relevant chunks.
+        cutoff: The number of results scored.
+
+    Returns:
+        The recall and the reciprocal rank of the first relevant result (0 if
+        none), both within the first ``cutoff`` results.
+    """
+    relevant = {chunk_key(*pair) for pair in relevant_chunks}
+    ranked = [
+        chunk_key(result.metadata.get("doc_id"), result.metadata.get("chunk_id"))
+        for result in results[:cutoff]
+        if result.metadata
+    ]
+    recall = len(relevant.intersection(ranked)) / len(relevant)
+    reciprocal_rank = next(
+        (1 / rank for rank, key in enumerate(ranked, 1) if key in relevant), 0.0
+    )
+    return recall, reciprocal_rank
+
+
+def configurations(args: argparse.Namespace) -> Iterator[Dict[str, Any]]:
+    """Yield every combination of the swept parameters."""
+    grid = itertools.product(
+        args.keyword_k,
+        args.semantic_k,
+        args.search_list_size,
+        args.rescore,
+        args.binary_rescore_factor,
+        args.semantic_weight,
+        args.keyword_weight,
+        args.rerank,
+        args.binary_quantization,
+    )
+    for values in grid:
+        config = dict(zip(SWEPT_SETTINGS + SWEPT_INDEX_SETTINGS, values))
+        config["rerank"] = config["rerank"] == "on"
+        config["binary_quantization"] = config["binary_quantization"] == "on"
+        yield config
+
+
+def evaluate(
+    vector_store: VectorStore,
+    queries: List[Dict[str, Any]],
+    config: Dict[str, Any],
+    top_n: int,
+    mode: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run the queries with one configuration and aggregate quality and latency.
+
+    Args:
+        vector_store: The store to search; its settings are overridden by ``config``
+            for the run and restored afterwards.
+        queries: Labelled queries, as returned by load_queries.
+        config: SearchSettings and IndexSettings overrides, as yielded by configurations.
+        top_n: The number of results scored (and kept after reranking).
+        mode: The hybrid search mode. Defaults to SearchSettings.hybrid_mode.
+
+    Returns:
+        The configuration with recall@top_n, MRR and latency percentiles in milliseconds.
+    """
+    settings = vector_store.settings
+    index_config = {name: config[name] for name in SWEPT_INDEX_SETTINGS}
+    search_config = {name: config[name] for name in SWEPT_SETTINGS}
+    vector_store.settings = settings.model_copy(
+        update={
+            "search": settings.search.model_copy(update=search_config),
+            "index": settings.index.model_copy(update=index_config),
+        }
+    )
+
+    recalls, reciprocal_ranks, latencies = [], [], []
+    try:
+        for labelled in queries:
+            start_time = time.perf_counter()
+            results = vector_store.hybrid_search(
+                labelled["query"],
+                keyword_k=config["keyword_k"],
+                semantic_k=config["semantic_k"],
+                rerank=config["rerank"],
+                top_n=top_n,
+                mode=mode,
+            )
+            latencies.append(time.perf_counter() - start_time)
+            recall, reciprocal_rank = score(results, labelled["relevant_chunks"], top_n)
+            recalls.append(recall)
+            reciprocal_ranks.append(reciprocal_rank)
+    finally:
+        vector_store.settings = settings
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        **config,
+        f"recall@{top_n}": round(statistics.fmean(recalls), 4),
+        "mrr": round(statistics.fmean(reciprocal_ranks), 4),
+        "p50_ms": round(cuts[49] * 1000, 1),
+        "p95_ms": round(cuts[94] * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1),
+    }
+
+
+def check_indexes(vector_store: VectorStore, binary_quantization: List[str]) -> None:
+    """
+    Fail if a swept binary_quantization value has no valid index to search.
+
+    Without it the configuration would silently measure a sequential scan.
+    """
+    valid = {index["name"] for index in vector_store.index_status() if index["valid"]}
+    required = {
+        "on": vector_store.binary_quantized_index_name,
+        "off": vector_store.embedding_index_name,
+    }
+    missing = [
+        f"--binary-quantization {value} needs index '{required[value]}'"
+        for value in dict.fromkeys(binary_quantization)
+        if required[value] not in valid
+    ]
+    if missing:
+        raise SystemExit(
+            "; ".join(missing) + " (see VectorStore.create_index and create_binary_quantized_index)"
+        )
+
+
+def warm_up(vector_store: VectorStore, queries: List[Dict[str, Any]]) -> None:
+    """Fill the embedding cache and keyword memo, so the first configuration isn't penalized."""
+    texts = [labelled["query"] for labelled in queries]
+    vector_store.get_embeddings(texts)
+    for text in texts:
+        vector_store.build_keyword_query(text)
+
+
+def cheapest(report: List[Dict[str, Any]], metric: str, target: float) -> Optional[Dict[str, Any]]:
+    """Return the configuration with the lowest p95 latency whose ``metric`` meets ``target``."""
+    passing = [row for row in report if row[metric] >= target]
+    return min(passing, key=lambda row: row["p95_ms"]) if passing else None
+
+
+def parse_args() -> argparse.Namespace:
+    search = get_settings().search
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("queries", help="JSONL file of labelled queries")
+    parser.add_argument("--keyword-k", type=int, nargs="+", default=[search.keyword_k])
+    parser.add_argument("--semantic-k", type=int, nargs="+", default=[search.semantic_k])
+    parser.add_argument("--top-n", type=int, default=search.top_n, help="Results scored")
+    parser.add_argument(
+        "--search-list-size",
+        type=int,
+        nargs="+",
+        default=[search.diskann_query_search_list_size],
+        help="diskann.query_search_list_size values",
+    )
+    parser.add_argument(
+        "--rescore",
+        type=int,
+        nargs="+",
+        default=[search.diskann_query_rescore],
+        help="diskann.query_rescore values",
+    )
+    parser.add_argument(
+        "--binary-quantization",
+        nargs="+",
+        choices=("on", "off"),
+        default=["on" if get_settings().index.binary_quantization else "off"],
+        help="First-stage search on binary-quantized embeddings",
+    )
+    parser.add_argument(
+        "--binary-rescore-factor",
+        type=int,
+        nargs="+",
+        default=[search.binary_rescore_factor],
+        help="Hamming-distance candidates rescored per result",
+    )
+    parser.add_argument(
+        "--semantic-weight", type=float, nargs="+", default=[search.semantic_weight]
+    )
+    parser.add_argument("--keyword-weight", type=float, nargs="+", default=[search.keyword_weight])
+    parser.add_argument(
+        "--rerank", nargs="+", choices=("on", "off"), default=["on" if search.rerank else "off"]
+    )
+    parser.add_argument("--mode", choices=("fused", "union"), help="Hybrid search mode")
+    parser.add_argument(
+        "--local-index",
+        choices=("ann", "auto", "exact"),
+        default="ann",
+        help="LocalIndexSettings.mode; 'auto' or 'exact' bypass the swept ANN parameters",
+    )
+    parser.add_argument(
+        "--target-recall", type=float, help="Report the cheapest configuration meeting it"
+    )
+    parser.add_argument("--output", help="Write the JSON report here")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    queries = load_queries(args.queries)
+    if not queries:
+        raise SystemExit(f"No labelled queries in {args.queries}")
+
+    settings = get_settings()
+    vec = VectorStore(
+        settings.model_copy(
+            update={
+                "local_index": settings.local_index.model_copy(update={"mode": args.local_index})
+            }
+        )
+    )
+    check_indexes(vec, args.binary_quantization)
+    warm_up(vec, queries)
+    report = []
+    for config in configurations(args):
+        row = evaluate(vec, queries, config, args.top_n, args.mode)
+        logging.info(f"Evaluated {row}")
+        report.append(row)
+    vec.close()
+
+    metric = f"recall@{args.top_n}"
+    columns = [*SWEPT_SETTINGS, *SWEPT_INDEX_SETTINGS, metric, "mrr", "p50_ms", "p95_ms"]
+    print("\t".join(columns))
+    for row in sorted(report, key=lambda row: row["p95_ms"]):
+        print("\t".join(str(row[column]) for column in columns))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {"queries": len(queries), "local_index": args.local_index, "results": report},
+                f,
+                indent=2,
+            )
+
+    if args.target_recall is not None:
+        best = cheapest(report, metric, args.target_recall)
+        if best is None:
+            print(f"No configuration reached {metric} >= {args.target_recall}")
+        else:
+            print(f"Cheapest configuration with {metric} >= {args.target_recall}: {best}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,22 @@
-from flask import Flask, request, render_template, jsonify
-from .similarity_search import SearchService
+import atexit
+from functools import lru_cache
+
+from flask import Flask, Response, request, render_template, jsonify, stream_with_context
+from .services.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
+from .services.tracing import trace
+from .similarity_search import SearchService, format_response, query_from_body
 
 app = Flask(__name__)
-search_service = SearchService()
+
+
+@lru_cache(maxsize=None)
+def get_search_service() -> SearchService:
+    """Create the search service on first use, so importing the app does no I/O."""
+    search_service = SearchService()
+    # Requests share the VectorStore's connection pool; release it on shutdown
+    atexit.register(search_service.vec.close)
+    return search_service
+
 
 @app.route('/')
 def home():
@@ -10,18 +24,36 @@ def home():
 
 @app.route('/search', methods=['POST'])
 def search():
+    body = request.get_json(silent=True)
+    try:
+        query = query_from_body(body)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     try:
-        query = request.json['query']
-        response = search_service.perform_search(query)
-        
-        # Format the response into HTML
-        formatted_response = {
-            'key_points': response.key_points,
-            'sections': response.sections,
-            'sources': response.sources,
-            'enough_context': response.enough_context
-        }
-        
-        return jsonify({'success': True, 'result': formatted_response})
+        with trace() as request_trace:
+            response = get_search_service().perform_search(query)
+
+        payload = {'success': True, 'result': format_response(response)}
+        # Per-stage milliseconds for this request, on request
+        if body.get('timings'):
+            payload['timings'] = request_trace.breakdown()
+        return jsonify(payload)
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/search/stream', methods=['POST'])
+def search_stream():
+    try:
+        query = query_from_body(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return Response(
+        stream_with_context(get_search_service().stream_search(query)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), mimetype=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys by collapsing all whitespace runs."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed embedding cache backed by SQLite.
+
+    Entries are keyed on a SHA-256 hash of (model, normalized text) and stored as
+    float32 blobs. The cache is bounded to ``max_entries`` and evicts the least
+    recently used entries first. Hit and miss counters are kept per instance.
+
+    Example:
+        cache = EmbeddingCache(".cache/embeddings.sqlite", "text-embedding-3-small")
+        embeddings, missing = cache.lookup(texts)
+    """
+
+    def __init__(self, path: str, model: str, max_entries: int = 200_000):
+        self.path = path
+        self.model = model
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key BLOB PRIMARY KEY,
+                embedding BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(
+            f"{self.model}\0{normalize_text(text)}".encode("utf-8")
+        ).digest()
+
+    def lookup(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[int]]:
+        """
+        Look up cached embeddings for many texts.
+
+        Args:
+            texts: The texts to look up.
+
+        Returns:
+            A tuple of (embeddings aligned with ``texts``, with None for misses,
+            indices of the texts that were not found).
+        """
+        keys = [self._key(text) for text in texts]
+        found: Dict[bytes, List[float]] = {}
+        with self._lock:
+            unique_keys = list(set(keys))
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start : start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, embedding FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+
+            embeddings = [found.get(key) for key in keys]
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return embeddings, missing
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for a text, or None on a miss."""
+        return self.lookup([text])[0][0]
+
+    def put_many(self, texts: List[str], embeddings: List[List[float]]) -> None:
+        """
+        Store embeddings for many texts, evicting least recently used entries if needed.
+
+        Args:
+            texts: The texts that were embedded.
+            embeddings: The embeddings, aligned with ``texts``.
+        """
+        now = time.time()
+        rows = {
+            self._key(text): array("f", embedding).tobytes()
+            for text, embedding in zip(texts, embeddings)
+        }
+        with self._lock:
+            # Only keys not stored yet grow the cache; replacing an entry doesn't
+            self._size += len(rows) - self._count_stored(list(rows))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, last_access) VALUES (?, ?, ?)",
+                [(key, blob, now) for key, blob in rows.items()],
+            )
+            if self._size > self.max_entries:
+                # Other processes sharing the file change its size too, so recount
+                # inside this write transaction before evicting
+                self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if self._size > self.max_entries:
+                evicted = self._size - self.max_entries
+                self._conn.execute(
+                    """
+                    DELETE FROM embeddings WHERE key IN (
+                        SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?
+                    )
+                    """,
+                    (evicted,),
+                )
+                self._size = self.max_entries
+                logging.info(f"Evicted {evicted} entries from the embedding cache")
+            self._conn.commit()
+
+    def _count_stored(self, keys: List[bytes]) -> int:
+        """Count how many of the keys are already stored (primary-key lookups only)."""
+        stored = 0
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            stored += self._conn.execute(
+                f"SELECT COUNT(*) FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchone()[0]
+        return stored
+
+    def put(self, text: str, embedding: List[float]) -> None:
+        """Store the embedding for a single text."""
+        self.put_many([text], [embedding])
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters, hit rate and current size."""
+        with self._lock:
+            hits, misses, size = self.hits, self.misses, self._size
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "size": size,
+        }
@@ -0,0 +1,205 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from ..database.vector_store import batch_texts, estimate_tokens
+
+
+class RateLimiter:
+    """Token-bucket limiter enforcing request-per-minute and token-per-minute budgets."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self._requests = self.request_capacity
+        self._tokens = self.token_capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(
+            self.request_capacity,
+            self._requests + elapsed * self.request_capacity / 60,
+        )
+        self._tokens = min(
+            self.token_capacity,
+            self._tokens + elapsed * self.token_capacity / 60,
+        )
+
+    def acquire(self, tokens: int) -> None:
+        """
+        Block until one request carrying ``tokens`` tokens fits in both budgets.
+
+        Args:
+            tokens: The estimated number of tokens in the request.
+        """
+        # A single request larger than the whole budget would never fit
+        tokens = min(float(tokens), self.token_capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self._requests) * 60 / self.request_capacity,
+                    (tokens - self._tokens) * 60 / self.token_capacity,
+                )
+            time.sleep(max(wait, 0.01))
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Return True for rate-limit (429), server (5xx) and connection errors."""
+    import openai
+
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code == 429 or (status_code is not None and status_code >= 500)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Return the server-provided Retry-After delay in seconds, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class EmbeddingScheduler:
+    """
+    Embed large numbers of texts concurrently within provider rate limits.
+
+    Texts are packed into token-bounded batches (see ``VectorStore.get_embeddings``),
+    which are sent from a bounded thread pool. Every request first takes its share
+    of the request/token budgets, failed requests are retried with exponential
+    backoff on 429/5xx, and results are delivered in input order.
+
+    Concurrency, rate limits and backoff default to the store's
+    EmbeddingSchedulerSettings. Point ``OPENAI_BASE_URL`` at a local fake server
+    to exercise it without the real API.
+
+    Example:
+        scheduler = EmbeddingScheduler(vector_store)
+        embeddings = scheduler.embed(texts)
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ):
+        self.vector_store = vector_store
+        self.settings = vector_store.settings.embedding_scheduler
+        self.max_concurrency = max_concurrency or self.settings.max_concurrency
+        self.max_retries = (
+            self.settings.max_retries if max_retries is None else max_retries
+        )
+        self.rate_limiter = RateLimiter(
+            requests_per_minute or self.settings.requests_per_minute,
+            tokens_per_minute or self.settings.tokens_per_minute,
+        )
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for all texts, serving repeats from the embedding cache.
+
+        Args:
+            texts: The input texts to generate embeddings for.
+
+        Returns:
+            A list of embeddings in the same order as ``texts``.
+        """
+        texts = [text.replace("\n", " ") for text in texts]
+        return self.vector_store.embed_cached(texts, self._embed_uncached)
+
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed all texts through the scheduler, bypassing the cache."""
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        for indices, batch_embeddings in self.iter_batches(texts):
+            for i, embedding in zip(indices, batch_embeddings):
+                embeddings[i] = embedding
+        return embeddings
+
+    def iter_batches(
+        self, texts: List[str]
+    ) -> Iterator[Tuple[List[int], List[List[float]]]]:
+        """
+        Yield embedded batches in input order as soon as each one is ready.
+
+        At most ``2 * max_concurrency`` batches are in flight, so memory stays bounded
+        when a slow batch holds back delivery of later ones.
+
+        Args:
+            texts: The input texts to generate embeddings for.
+
+        Yields:
+            Tuples of (indices into ``texts``, embeddings for those indices).
+        """
+        texts = [text.replace("\n", " ") for text in texts]
+        openai_settings = self.vector_store.settings.openai
+        batches = batch_texts(
+            texts,
+            openai_settings.embedding_batch_size,
+            openai_settings.embedding_batch_max_tokens,
+        )
+
+        start_time = time.time()
+        pending: deque[Tuple[List[int], Future]] = deque()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for batch in batches:
+                if len(pending) >= 2 * self.max_concurrency:
+                    indices, future = pending.popleft()
+                    yield indices, future.result()
+                future = executor.submit(self._embed_with_retries, [texts[i] for i in batch])
+                pending.append((batch, future))
+            while pending:
+                indices, future = pending.popleft()
+                yield indices, future.result()
+
+        elapsed_time = time.time() - start_time
+        logging.info(
+            f"Scheduled {len(texts)} embeddings in {len(batches)} requests "
+            f"in {elapsed_time:.3f} seconds"
+        )
+
+    def _embed_with_retries(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, waiting for rate-limit budget and retrying transient errors."""
+        tokens = sum(estimate_tokens(text) for text in texts)
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(tokens)
+            try:
+                return self.vector_store.embed_batch(texts, max_retries=0)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(
+                        0,
+                        min(
+                            self.settings.backoff_max_seconds,
+                            self.settings.backoff_base_seconds * 2**attempt,
+                        ),
+                    )
+                attempt += 1
+                logging.warning(
+                    f"Embedding request failed ({e}); retry {attempt}/{self.max_retries} "
+                    f"in {delay:.2f} seconds"
+                )
+                time.sleep(delay)
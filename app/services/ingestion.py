@@ -0,0 +1,516 @@
+import hashlib
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..database.manifest import DocumentManifest
+from .embedding_scheduler import EmbeddingScheduler
+
+# langchain, numpy, timescale_vector and tqdm are imported where they are used,
+# so importing the ingestion CLI (and its --help) stays cheap.
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+def file_hash(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def document_id(path: Path) -> str:
+    """
+    Return the doc_id of a source file: its stem plus a hash of its resolved path.
+
+    The stem keeps ids readable; the path hash keeps files with the same name in
+    different folders apart.
+    """
+    path_hash = hashlib.sha256(str(path.resolve()).encode("utf-8")).hexdigest()[:12]
+    return f"{path.stem}-{path_hash}"
+
+
+def parse_pdf(path: str, chunk_size: int, chunk_overlap: int) -> List[Dict[str, Any]]:
+    """
+    Load one PDF and split it into chunks. Runs in a worker process.
+
+    Chunk ids are derived from the chunk's content (plus an occurrence counter for
+    repeated text), so an unchanged chunk keeps its id when the file is edited.
+
+    Args:
+        path: Path to the PDF file.
+        chunk_size: Size of each text chunk.
+        chunk_overlap: Overlap between chunks.
+
+    Returns:
+        A list of chunk dicts with chunk_id, chunk_index, doc_id, title, content, page
+        and total_pages.
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.document_loaders import PyPDFLoader
+
+    source_file = Path(path)
+    documents = PyPDFLoader(path).load()
+    title = (documents[0].metadata.get("title") if documents else None) or source_file.stem
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunked_docs = splitter.split_documents(documents)
+
+    chunks = []
+    occurrences: Dict[str, int] = {}
+    for i, chunk in enumerate(chunked_docs):
+        content_hash = hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()[:32]
+        occurrence = occurrences.get(content_hash, 0)
+        occurrences[content_hash] = occurrence + 1
+        chunks.append(
+            {
+                "chunk_id": f"{content_hash}-{occurrence}",
+                "chunk_index": i,
+                "doc_id": document_id(source_file),
+                "title": title,
+                "content": chunk.page_content,
+                "page": chunk.metadata.get("page", 0),
+                "total_pages": len(documents),
+            }
+        )
+    return chunks
+
+
+# Chunk metadata that depends on the chunk's position in the file, not its content
+POSITION_FIELDS = ("chunk_index", "title", "page", "total_pages")
+
+
+def prepare_record(chunk: Dict[str, Any], embedding: List[float]) -> Dict[str, Any]:
+    """
+    Prepare a record for insertion into the vector store.
+
+    Args:
+        chunk: A chunk dict as returned by parse_pdf.
+        embedding: The embedding generated for the chunk's content.
+
+    Returns:
+        Prepared record with metadata and embedding.
+    """
+    from timescale_vector.client import uuid_from_time
+
+    return {
+        "id": str(uuid_from_time(datetime.now())),
+        "metadata": {
+            "doc_id": chunk["doc_id"],
+            "chunk_id": chunk["chunk_id"],
+            "chunk_index": chunk["chunk_index"],
+            "title": chunk.get("title", chunk["doc_id"]),
+            "created_at": datetime.now().isoformat(),
+            "page": chunk.get("page", 0),
+            "total_pages": chunk.get("total_pages", 0),
+        },
+        "contents": chunk["content"],
+        "embedding": embedding,
+    }
+
+
+class IngestionPipeline:
+    """
+    Streaming PDF ingestion: parse, embed and upsert run as concurrent stages.
+
+    Ingestion is incremental against a DocumentManifest: files whose size and
+    mtime (or, failing that, content hash) and chunking parameters match the
+    manifest are skipped without parsing, and files removed from the folder have
+    their rows deleted. Documents are identified by their resolved path (see
+    document_id); rows a file has under an older doc_id, including rows of the
+    pre-manifest ingestion, are deleted when the file is next ingested.
+
+    Changed files are parsed and chunked in a process pool, one file per task.
+    Chunks flow through bounded queues into an embedding stage, which diffs the
+    files parsed so far against their stored chunk ids with one query per batch
+    and embeds only new chunks, and an upsert stage, which inserts the new rows,
+    updates the position metadata (chunk index, page) of unchanged chunks that
+    moved, deletes rows of removed chunks and then records the file in the
+    manifest. Peak memory is bounded by the queue
+    sizes rather than the corpus, and an interrupted run resumes per file. The
+    corpus term statistics used for local keyword extraction are updated by the
+    upserts and deletes themselves.
+
+    Example:
+        pipeline = IngestionPipeline(VectorStore())
+        pipeline.run("data")
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+    ):
+        self.vector_store = vector_store
+        self.settings = vector_store.settings.ingestion
+        self.chunk_size = chunk_size or self.settings.chunk_size
+        self.chunk_overlap = (
+            self.settings.chunk_overlap if chunk_overlap is None else chunk_overlap
+        )
+        self.scheduler = EmbeddingScheduler(vector_store)
+        self.manifest = DocumentManifest(vector_store)
+        self._stop = threading.Event()
+
+    def run(self, pdf_folder: str) -> Dict[str, int]:
+        """
+        Sync a folder of PDFs into the vector store.
+
+        Args:
+            pdf_folder: Path to the folder containing PDF files.
+
+        Returns:
+            Counts of processed, unchanged and removed files, chunks, and
+            inserted, updated and deleted records.
+
+        Raises:
+            FileNotFoundError: If the pdf_folder doesn't exist
+            ValueError: If no PDF files are found in the folder
+        """
+        pdf_path = Path(pdf_folder)
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"Folder not found: {pdf_folder}")
+
+        pdf_files = sorted(pdf_path.glob("*.pdf"))
+        if not pdf_files:
+            raise ValueError(f"No PDF files found in {pdf_folder}")
+
+        self._stop.clear()
+        stats = {
+            "files": 0,
+            "unchanged_files": 0,
+            "removed_files": 0,
+            "chunks": 0,
+            "inserted": 0,
+            "updated": 0,
+            "deleted": 0,
+        }
+        start_time = time.time()
+
+        self.manifest.create_table()
+        entries = self.manifest.load()
+        self._remove_deleted_files(pdf_path, pdf_files, entries, stats)
+        pending = self._changed_files(pdf_files, entries, stats)
+        logging.info(
+            f"Ingesting {len(pending)} of {len(pdf_files)} PDFs "
+            f"({stats['unchanged_files']} unchanged)"
+        )
+
+        errors: List[BaseException] = []
+        parsed: queue.Queue = queue.Queue(maxsize=self.settings.queue_size)
+        embedded: queue.Queue = queue.Queue(maxsize=self.settings.queue_size)
+
+        stages = [
+            threading.Thread(
+                target=self._run_stage, args=(self._parse_stage, errors, pending, parsed)
+            ),
+            threading.Thread(
+                target=self._run_stage, args=(self._embed_stage, errors, parsed, embedded, stats)
+            ),
+        ]
+        for stage in stages:
+            stage.start()
+
+        try:
+            self._upsert_stage(embedded, stats, total_files=len(pending))
+        except BaseException as e:
+            errors.append(e)
+            self._stop.set()
+        for stage in stages:
+            stage.join()
+
+        if errors:
+            raise errors[0]
+
+        elapsed_time = time.time() - start_time
+        logging.info(
+            f"Ingested {stats['files']} changed files ({stats['chunks']} chunks): "
+            f"{stats['inserted']} records inserted, {stats['updated']} updated, "
+            f"{stats['deleted']} deleted, "
+            f"{stats['removed_files']} files removed, in {elapsed_time:.3f} seconds"
+        )
+        return stats
+
+    def _file_info(self, pdf_file: Path) -> Dict[str, Any]:
+        stat = pdf_file.stat()
+        return {
+            "path": pdf_file,
+            "file_path": str(pdf_file.resolve()),
+            "doc_id": document_id(pdf_file),
+            "file_size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    def _changed_files(
+        self,
+        pdf_files: List[Path],
+        entries: Dict[str, Dict[str, Any]],
+        stats: Dict[str, int],
+    ) -> List[Dict[str, Any]]:
+        """Return the files that need parsing, skipping unchanged ones without parsing them."""
+        changed = []
+        for pdf_file in pdf_files:
+            info = self._file_info(pdf_file)
+            entry = entries.get(info["file_path"])
+            if entry is None:
+                # Possibly stored by the pre-manifest ingestion, under this doc_id
+                info["legacy_doc_id"] = f"{pdf_file.stem}_{info['mtime_ns']}"
+            elif entry["doc_id"] != info["doc_id"]:
+                # Stored under an older doc_id scheme; its rows are replaced
+                info["previous_doc_id"] = entry["doc_id"]
+            same_params = entry is not None and (
+                entry["doc_id"] == info["doc_id"]
+                and entry["chunk_size"] == self.chunk_size
+                and entry["chunk_overlap"] == self.chunk_overlap
+            )
+            # Fast path: size and mtime unchanged, don't even read the file
+            if same_params and (entry["file_size"], entry["mtime_ns"]) == (
+                info["file_size"],
+                info["mtime_ns"],
+            ):
+                stats["unchanged_files"] += 1
+                continue
+
+            info["content_hash"] = file_hash(pdf_file)
+            if same_params and entry["content_hash"] == info["content_hash"]:
+                # Touched but not modified
+                self.manifest.touch(info["file_path"], info["file_size"], info["mtime_ns"])
+                stats["unchanged_files"] += 1
+                continue
+            changed.append(info)
+        return changed
+
+    def _remove_deleted_files(
+        self,
+        pdf_path: Path,
+        pdf_files: List[Path],
+        entries: Dict[str, Dict[str, Any]],
+        stats: Dict[str, int],
+    ) -> None:
+        """Delete the rows of manifest files in this folder that no longer exist."""
+        folder = pdf_path.resolve()
+        present = {str(pdf_file.resolve()) for pdf_file in pdf_files}
+        removed = {
+            file_path: entry
+            for file_path, entry in entries.items()
+            if Path(file_path).parent == folder and file_path not in present
+        }
+        stored = self.vector_store.get_stored_chunks(
+            [entry["doc_id"] for entry in removed.values()]
+        )
+        for file_path, entry in removed.items():
+            ids = [record_id for record_id, _ in stored.get(entry["doc_id"], {}).values()]
+            if ids:
+                self.vector_store.delete(ids=ids)
+            self.manifest.delete(file_path)
+            stats["removed_files"] += 1
+            stats["deleted"] += len(ids)
+            logging.info(f"Removed {len(ids)} records of deleted file {file_path}")
+
+    def _run_stage(self, stage, errors: List[BaseException], *args) -> None:
+        """Run a stage in a thread, stopping the whole pipeline if it fails."""
+        try:
+            stage(*args)
+        except BaseException as e:
+            errors.append(e)
+            self._stop.set()
+
+    def _put(self, q: queue.Queue, item: Any) -> None:
+        """Put into a bounded queue, giving up if another stage failed."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: queue.Queue) -> Any:
+        """Get from a queue, returning _DONE if another stage failed."""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _parse_stage(self, files: List[Dict[str, Any]], parsed: queue.Queue) -> None:
+        """Parse PDFs in a process pool with a bounded number of files in flight."""
+        max_in_flight = 2 * self.settings.parse_workers
+        # The embed and write stages are already running as threads, and forking a
+        # process with running threads can copy held locks into the child; spawn
+        # starts the workers from a clean interpreter instead.
+        with ProcessPoolExecutor(
+            max_workers=self.settings.parse_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            remaining = iter(files)
+            in_flight = {}
+            while True:
+                while len(in_flight) < max_in_flight and not self._stop.is_set():
+                    info = next(remaining, None)
+                    if info is None:
+                        break
+                    future = executor.submit(
+                        parse_pdf, str(info["path"]), self.chunk_size, self.chunk_overlap
+                    )
+                    in_flight[future] = info
+                if not in_flight or self._stop.is_set():
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    info = in_flight.pop(future)
+                    try:
+                        chunks = future.result()
+                        logging.info(f"Successfully loaded {info['path'].name}")
+                    except Exception as e:
+                        logging.error(f"Error loading {info['path'].name}: {str(e)}")
+                        continue
+                    self._put(parsed, (info, chunks))
+        self._put(parsed, _DONE)
+
+    def _embed_stage(
+        self, parsed: queue.Queue, embedded: queue.Queue, stats: Dict[str, int]
+    ) -> None:
+        """
+        Diff batches of parsed files against the stored chunks and embed only new
+        chunks. A batch is the files parsed by the time the previous one is done,
+        up to ``lookup_batch_files``, looked up with one query.
+        """
+        finished = False
+        while not finished:
+            item = self._get(parsed)
+            if item is _DONE:
+                break
+            batch = [item]
+            while len(batch) < self.settings.lookup_batch_files:
+                try:
+                    item = parsed.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    finished = True
+                    break
+                batch.append(item)
+            self._embed_batch(batch, embedded, stats)
+        self._put(embedded, _DONE)
+
+    def _embed_batch(
+        self,
+        batch: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+        embedded: queue.Queue,
+        stats: Dict[str, int],
+    ) -> None:
+        """Embed the new chunks of a batch of parsed files and pass each file on."""
+        # The files' current doc_ids and any older ones their rows are stored under
+        doc_ids = [
+            info[key]
+            for info, _ in batch
+            for key in ("doc_id", "previous_doc_id", "legacy_doc_id")
+            if key in info
+        ]
+        stored_chunks = self.vector_store.get_stored_chunks(doc_ids)
+
+        diffs = []
+        for info, chunks in batch:
+            stats["chunks"] += len(chunks)
+            stored = stored_chunks.get(info["doc_id"], {})
+            chunk_ids = [chunk["chunk_id"] for chunk in chunks]
+            current = set(chunk_ids)
+            new_chunks = [chunk for chunk in chunks if chunk["chunk_id"] not in stored]
+            moved = self._moved_chunks(chunks, stored)
+            removed_ids = [
+                record_id
+                for chunk_id, (record_id, _) in stored.items()
+                if chunk_id not in current
+            ]
+            for key in ("previous_doc_id", "legacy_doc_id"):
+                if key in info:
+                    removed_ids += [
+                        record_id for record_id, _ in stored_chunks.get(info[key], {}).values()
+                    ]
+            logging.info(
+                f"{info['path'].name}: {len(new_chunks)} new, "
+                f"{len(chunks) - len(new_chunks)} unchanged ({len(moved)} moved), "
+                f"{len(removed_ids)} removed chunks"
+            )
+            diffs.append((info, chunk_ids, new_chunks, moved, removed_ids))
+
+        embeddings = iter(
+            self.scheduler.embed(
+                [chunk["content"] for _, _, new_chunks, _, _ in diffs for chunk in new_chunks]
+            )
+        )
+        for info, chunk_ids, new_chunks, moved, removed_ids in diffs:
+            records = [prepare_record(chunk, next(embeddings)) for chunk in new_chunks]
+            self._put(embedded, (info, chunk_ids, records, moved, removed_ids))
+
+    @staticmethod
+    def _moved_chunks(
+        chunks: List[Dict[str, Any]], stored: Dict[str, Tuple[str, dict]]
+    ) -> Dict[str, dict]:
+        """
+        Return the new metadata, by record id, of unchanged chunks whose position
+        fields (chunk index, page, ...) changed because earlier chunks moved.
+        """
+        moved = {}
+        for chunk in chunks:
+            if chunk["chunk_id"] not in stored:
+                continue
+            record_id, metadata = stored[chunk["chunk_id"]]
+            metadata = metadata or {}
+            position = {
+                field: chunk.get(field, metadata.get(field)) for field in POSITION_FIELDS
+            }
+            if any(metadata.get(field) != value for field, value in position.items()):
+                moved[record_id] = {**metadata, **position}
+        return moved
+
+    def _upsert_stage(
+        self, embedded: queue.Queue, stats: Dict[str, int], total_files: int
+    ) -> None:
+        """Store each file's changes, then record the file in the manifest."""
+        import numpy as np
+        from tqdm import tqdm
+
+        batch_size = self.settings.upsert_batch_size
+        with tqdm(total=total_files, desc="Ingesting PDFs") as progress:
+            while True:
+                item = self._get(embedded)
+                if item is _DONE:
+                    break
+                info, chunk_ids, records, moved, removed_ids = item
+                if records:
+                    self.vector_store.upsert_records(
+                        [record["id"] for record in records],
+                        [record["metadata"] for record in records],
+                        [record["contents"] for record in records],
+                        np.asarray([record["embedding"] for record in records], dtype=np.float32),
+                        batch_size=batch_size,
+                    )
+                if moved:
+                    self.vector_store.update_metadata(list(moved), list(moved.values()))
+                if removed_ids:
+                    self.vector_store.delete(ids=removed_ids)
+                self.manifest.save(
+                    info["file_path"],
+                    info["doc_id"],
+                    info["content_hash"],
+                    info["file_size"],
+                    info["mtime_ns"],
+                    self.chunk_size,
+                    self.chunk_overlap,
+                    chunk_ids,
+                )
+                stats["inserted"] += len(records)
+                stats["updated"] += len(moved)
+                stats["deleted"] += len(removed_ids)
+                stats["files"] += 1
+                progress.update(1)
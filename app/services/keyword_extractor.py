@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from ..config.settings import KeywordSettings, OpenAISettings
+from .query_cache import normalize_query
+from .synthesizer import Keywords
+from .tracing import span
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+STOPWORDS = frozenset(
+    """
+    a about above after again against all am an and any are as at be because been
+    before being below between both but by can could did do does doing down during
+    each few for from further had has have having he her here hers herself him
+    himself his how i if in into is it its itself just me more most my myself no
+    nor not now of off on once only or other our ours ourselves out over own same
+    she should so some such than that the their theirs them themselves then there
+    these they this those through to too under until up very was we were what when
+    where which while who whom why will with would you your yours yourself
+    yourselves tell give show find explain describe list please know much many
+    """.split()
+)
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+class KeywordExtractor(ABC):
+    """Picks the search keywords for a natural-language query."""
+
+    @abstractmethod
+    def extract(self, query: str) -> List[str]:
+        """
+        Extract keywords from a query.
+
+        Args:
+            query: The search query.
+
+        Returns:
+            The keywords, most important first.
+        """
+
+    async def aextract(self, query: str) -> List[str]:
+        """Async variant of extract; runs the sync implementation in a worker thread."""
+        return await asyncio.to_thread(self.extract, query)
+
+    def invalidate(self) -> None:
+        """Drop any state derived from the corpus (called when the table changes)."""
+
+
+class LocalKeywordExtractor(KeywordExtractor):
+    """
+    Extracts keywords in-process by TF-IDF scoring against corpus statistics.
+
+    Query terms are lowercased and stripped of stopwords, then scored by their
+    frequency in the query times their inverse document frequency in the corpus,
+    so rare, specific terms win over common ones. Terms that never occur in the
+    corpus are dropped since they cannot match. The statistics (see
+    TermStatistics) are loaded once and reloaded after the table changes, in
+    this process or (checked every ``version_check_seconds``) in another.
+    """
+
+    def __init__(self, vector_store, max_keywords: int = 2):
+        self.max_keywords = max_keywords
+        self.vector_store = vector_store
+        self.term_stats = vector_store.term_stats
+        self._stats: Optional[Tuple[int, Dict[str, int]]] = None
+        self._lock = threading.Lock()
+
+    def extract(self, query: str) -> List[str]:
+        terms = [
+            term
+            for term in _TOKEN_PATTERN.findall(query.lower())
+            if term not in STOPWORDS and len(term) > 1
+        ]
+        total_documents, document_frequency = self._load_stats()
+        if document_frequency:
+            # Terms outside the vocabulary can't match anything
+            terms = [term for term in terms if term in document_frequency]
+
+        counts = Counter(terms)
+        scores = {
+            term: count
+            * (math.log((total_documents + 1) / (document_frequency.get(term, 0) + 1)) + 1)
+            for term, count in counts.items()
+        }
+        ranked = sorted(scores, key=lambda term: scores[term], reverse=True)
+        return ranked[: self.max_keywords]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stats = None
+
+    def _load_stats(self) -> Tuple[int, Dict[str, int]]:
+        # Invalidates the statistics (through the change listener) if another
+        # process changed the table
+        self.vector_store.check_for_changes()
+        with self._lock:
+            if self._stats is None:
+                self._stats = self.term_stats.load()
+            return self._stats
+
+
+class LLMKeywordExtractor(KeywordExtractor):
+    """
+    Extracts keywords with a chat completion, memoized per normalized query.
+
+    The OpenAI clients are created on first use (unless ``client`` is given) and
+    reused, and an LRU of ``cache_size`` results is shared by the sync and async
+    paths.
+    """
+
+    def __init__(
+        self,
+        openai_settings: OpenAISettings,
+        model: str = "gpt-4o-mini",
+        cache_size: int = 1024,
+        client: Optional[OpenAI] = None,
+    ):
+        self.model = model
+        self.cache_size = cache_size
+        self.openai_settings = openai_settings
+        self._client: Optional[OpenAI] = client
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._memo: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(
+                api_key=self.openai_settings.api_key, base_url=self.openai_settings.base_url
+            )
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+
+            self._async_client = AsyncOpenAI(
+                api_key=self.openai_settings.api_key, base_url=self.openai_settings.base_url
+            )
+        return self._async_client
+
+    def extract(self, query: str) -> List[str]:
+        key = normalize_query(query)
+        with span("keyword_llm") as attributes:
+            keywords = self._memo_get(key)
+            attributes["cache_hit"] = keywords is not None
+            if keywords is None:
+                response = self.client.beta.chat.completions.parse(
+                    model=self.model,
+                    messages=self._messages(query),
+                    response_format=Keywords,
+                )
+                attributes["tokens"] = self._total_tokens(response)
+                keywords = self._parse_keywords(response)
+                self._memo_put(key, keywords)
+        return keywords
+
+    async def aextract(self, query: str) -> List[str]:
+        key = normalize_query(query)
+        with span("keyword_llm") as attributes:
+            keywords = self._memo_get(key)
+            attributes["cache_hit"] = keywords is not None
+            if keywords is None:
+                response = await self.async_client.beta.chat.completions.parse(
+                    model=self.model,
+                    messages=self._messages(query),
+                    response_format=Keywords,
+                )
+                attributes["tokens"] = self._total_tokens(response)
+                keywords = self._parse_keywords(response)
+                self._memo_put(key, keywords)
+        return keywords
+
+    def _memo_get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            keywords = self._memo.get(key)
+            if keywords is not None:
+                self._memo.move_to_end(key)
+            return keywords
+
+    def _memo_put(self, key: str, keywords: List[str]) -> None:
+        with self._lock:
+            self._memo[key] = keywords
+            while len(self._memo) > self.cache_size:
+                self._memo.popitem(last=False)
+
+    @staticmethod
+    def _messages(query: str) -> List[Dict[str, str]]:
+        """Build the prompt for LLM keyword extraction."""
+        return [
+            {
+            "role": "system",
+             "content": "You are a financial analyst. Your task is to extract the two most important keywords from the given query, and return them as a list of strings."},
+            {
+            "role": "user",
+            "content": f"""Extract the most important keywords from the following query: '{query}'
+            Only return only two keywords, no other text.
+            """
+            }
+        ]
+
+    @staticmethod
+    def _total_tokens(response: Any) -> int:
+        """The prompt plus completion tokens reported for a chat completion."""
+        usage = getattr(response, "usage", None)
+        return usage.total_tokens if usage else 0
+
+    @staticmethod
+    def _parse_keywords(response: Any) -> List[str]:
+        """Pull the keyword list out of a parsed chat completion."""
+        keywords = response.choices[0].message.parsed.content
+        if isinstance(keywords, list) and all(isinstance(i, list) for i in keywords):
+            keywords = [item for sublist in keywords for item in sublist]
+        return keywords
+
+
+def create_keyword_extractor(
+    settings: KeywordSettings,
+    openai_settings: OpenAISettings,
+    vector_store,
+    client: Optional[OpenAI] = None,
+) -> KeywordExtractor:
+    """
+    Create the keyword extractor selected by ``settings.strategy`` ("local" or "llm").
+
+    ``client`` replaces the OpenAI client of the "llm" strategy.
+    """
+    if settings.strategy == "local":
+        return LocalKeywordExtractor(vector_store, max_keywords=settings.max_keywords)
+    if settings.strategy == "llm":
+        return LLMKeywordExtractor(
+            openai_settings,
+            model=settings.llm_model,
+            cache_size=settings.cache_size,
+            client=client,
+        )
+    raise ValueError(f"Unsupported keyword extraction strategy: {settings.strategy}")
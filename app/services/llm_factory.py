@@ -1,27 +1,33 @@
 from typing import Any, Dict, List, Type
 
-import instructor
-
-from anthropic import Anthropic
-from openai import OpenAI
 from pydantic import BaseModel
 from ..config.settings import get_settings
 
 
 class LLMFactory:
-    def __init__(self, provider: str):
+    def __init__(self, provider: str, use_async: bool = False):
         self.provider = provider
+        self.use_async = use_async
         self.settings = getattr(get_settings(), provider)
         self.client = self._initialize_client()
 
     def _initialize_client(self) -> Any:
+        # Provider SDKs are slow to import, so only load them when a client is built
+        import instructor
+        from anthropic import Anthropic, AsyncAnthropic
+        from openai import AsyncOpenAI, OpenAI
+
+        openai_client = AsyncOpenAI if self.use_async else OpenAI
+        anthropic_client = AsyncAnthropic if self.use_async else Anthropic
         client_initializers = {
-            "openai": lambda s: instructor.from_openai(OpenAI(api_key=s.api_key)),
+            "openai": lambda s: instructor.from_openai(
+                openai_client(api_key=s.api_key, base_url=s.base_url)
+            ),
             "anthropic": lambda s: instructor.from_anthropic(
-                Anthropic(api_key=s.api_key)
+                anthropic_client(api_key=s.api_key)
             ),
             "llama": lambda s: instructor.from_openai(
-                OpenAI(base_url=s.base_url, api_key=s.api_key),
+                openai_client(base_url=s.base_url, api_key=s.api_key),
                 mode=instructor.Mode.JSON,
             ),
         }
@@ -34,12 +40,30 @@ class LLMFactory:
     def create_completion(
         self, response_model: Type[BaseModel], messages: List[Dict[str, str]], **kwargs
     ) -> Any:
-        completion_params = {
+        """Create a structured completion; returns an awaitable when ``use_async`` is set."""
+        completion_params = self._completion_params(response_model, messages, **kwargs)
+        return self.client.chat.completions.create(**completion_params)
+
+    def create_partial_completion(
+        self, response_model: Type[BaseModel], messages: List[Dict[str, str]], **kwargs
+    ) -> Any:
+        """
+        Stream a structured completion as progressively filled partial objects.
+
+        Returns an iterator of partial ``response_model`` instances, or an async
+        iterator when ``use_async`` is set.
+        """
+        completion_params = self._completion_params(response_model, messages, **kwargs)
+        return self.client.chat.completions.create_partial(**completion_params)
+
+    def _completion_params(
+        self, response_model: Type[BaseModel], messages: List[Dict[str, str]], **kwargs
+    ) -> Dict[str, Any]:
+        return {
             "model": kwargs.get("model", self.settings.default_model),
             "temperature": kwargs.get("temperature", self.settings.temperature),
             "max_retries": kwargs.get("max_retries", self.settings.max_retries),
             "max_tokens": kwargs.get("max_tokens", self.settings.max_tokens),
             "response_model": response_model,
             "messages": messages,
-        }
-        return self.client.chat.completions.create(**completion_params)
\ No newline at end of file
+        }
\ No newline at end of file
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for exact matching: lowercase, no punctuation, single spaces."""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+class QueryResultCache:
+    """
+    Two-level cache for full search pipeline results.
+
+    The first level matches the normalized query text exactly. The second level
+    finds the most similar cached query embedding and returns its result when the
+    cosine similarity is at least ``similarity_threshold``. Entries expire after
+    ``ttl_seconds``, the least recently used entries are evicted beyond
+    ``max_entries``, and ``invalidate`` drops everything. The search services
+    call it when the document table changes, in this or another process (see
+    VectorStore.check_for_changes).
+
+    The query embeddings live in one preallocated ``(max_entries, dimensions)``
+    float32 matrix, allocated on the first put, so a similarity lookup is a
+    single matrix-vector product over it.
+
+    Example:
+        cache = QueryResultCache(ttl_seconds=3600, similarity_threshold=0.95)
+        result = cache.get_exact(query) or cache.get_similar(query_embedding)
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 1000,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        # Normalized query -> (time cached, matrix row or None, result), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Optional[int], Any]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        # Per matrix row: the time its entry was cached (-inf when free) and its key
+        self._row_times: Optional[np.ndarray] = None
+        self._row_keys: List[Optional[str]] = [None] * max_entries
+        self._free_rows = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def get_exact(self, query: str) -> Optional[Any]:
+        """Return the cached result for the same normalized query, if still fresh."""
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry):
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry[2]
+        return None
+
+    def get_similar(self, query_embedding: List[float]) -> Optional[Any]:
+        """
+        Return the result cached for the most similar query embedding.
+
+        Args:
+            query_embedding: The embedding of the incoming query.
+
+        Returns:
+            The cached result if the best match reaches the similarity threshold and
+            is still fresh, otherwise None.
+        """
+        import numpy as np
+
+        query_vector = self._normalize(query_embedding)
+        with self._lock:
+            if self._matrix is not None and self._matrix.shape[1] == len(query_vector):
+                similarities = self._matrix @ query_vector
+                # Free rows have a time of -inf, so they count as expired
+                expired = time.time() - self._row_times >= self.ttl_seconds
+                similarities[expired] = -np.inf
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    key = self._row_keys[best]
+                    self._entries.move_to_end(key)
+                    self.similar_hits += 1
+                    return self._entries[key][2]
+            self.misses += 1
+        return None
+
+    def put(self, query: str, query_embedding: Optional[List[float]], result: Any) -> None:
+        """Cache a result under the normalized query and, if given, its embedding."""
+        import numpy as np
+
+        key = normalize_query(query)
+        vector = self._normalize(query_embedding) if query_embedding is not None else None
+        now = time.time()
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._release_row(previous[1])
+            while self._entries and len(self._entries) >= self.max_entries:
+                _, (_, row, _) = self._entries.popitem(last=False)
+                self._release_row(row)
+
+            row = None
+            if vector is not None and self.max_entries > 0:
+                if self._matrix is None:
+                    self._matrix = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+                    self._row_times = np.full(self.max_entries, -np.inf)
+                if self._matrix.shape[1] == len(vector):
+                    row = self._free_rows.pop()
+                    self._matrix[row] = vector
+                    self._row_times[row] = now
+                    self._row_keys[row] = key
+            self._entries[key] = (now, row, result)
+
+    def invalidate(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            for _, row, _ in self._entries.values():
+                self._release_row(row)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the number of cached entries."""
+        return {
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+        }
+
+    def _release_row(self, row: Optional[int]) -> None:
+        """Return an entry's matrix row to the free list."""
+        if row is None:
+            return
+        self._row_times[row] = float("-inf")
+        self._row_keys[row] = None
+        self._free_rows.append(row)
+
+    def _is_fresh(self, entry: Tuple[float, Optional[int], Any]) -> bool:
+        return time.time() - entry[0] < self.ttl_seconds
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        import numpy as np
+
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from ..config.settings import RerankerSettings
+from .query_cache import normalize_query
+
+
+class Reranker(ABC):
+    """Scores documents against a query and returns the best ones first."""
+
+    @abstractmethod
+    def rerank(
+        self,
+        query: str,
+        documents: List[str],
+        top_n: int,
+        ids: Optional[List[str]] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Rerank documents by relevance to the query.
+
+        Args:
+            query: The search query.
+            documents: The candidate document texts.
+            top_n: The number of results to return.
+            ids: Optional identifiers of the documents (e.g. record ids). Not
+                used by the built-in rerankers.
+
+        Returns:
+            Up to ``top_n`` (index into ``documents``, relevance score) pairs, best first.
+        """
+
+    async def arerank(
+        self,
+        query: str,
+        documents: List[str],
+        top_n: int,
+        ids: Optional[List[str]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Async variant of rerank; runs the sync implementation in a worker thread."""
+        return await asyncio.to_thread(self.rerank, query, documents, top_n, ids)
+
+
+class CohereReranker(Reranker):
+    """Reranks with Cohere's hosted rerank API."""
+
+    def __init__(self, api_key: str, model: str = "rerank-english-v3.0"):
+        import cohere
+
+        self.model = model
+        self.client = cohere.ClientV2(api_key=api_key)
+        self.async_client = cohere.AsyncClientV2(api_key=api_key)
+
+    def rerank(
+        self,
+        query: str,
+        documents: List[str],
+        top_n: int,
+        ids: Optional[List[str]] = None,
+    ) -> List[Tuple[int, float]]:
+        if not documents:
+            return []
+        response = self.client.rerank(
+            model=self.model,
+            query=query,
+            documents=documents,
+            top_n=top_n,
+        )
+        return [(result.index, result.relevance_score) for result in response.results]
+
+    async def arerank(
+        self,
+        query: str,
+        documents: List[str],
+        top_n: int,
+        ids: Optional[List[str]] = None,
+    ) -> List[Tuple[int, float]]:
+        if not documents:
+            return []
+        response = await self.async_client.rerank(
+            model=self.model,
+            query=query,
+            documents=documents,
+            top_n=top_n,
+        )
+        return [(result.index, result.relevance_score) for result in response.results]
+
+
+class LocalCrossEncoderReranker(Reranker):
+    """
+    Reranks in-process with a cross-encoder exported to ONNX, on CPU.
+
+    (query, document) pairs are tokenized and scored in batches with vectorized
+    inference, and scores are cached per normalized query text (see
+    normalize_query) and document content hash, so repeated queries over the same
+    chunks skip inference entirely while re-upserted contents are scored afresh. Requires the optional
+    ``onnxruntime`` dependency and a model exported together with its
+    ``tokenizer.json`` (e.g. cross-encoder/ms-marco-MiniLM-L-6-v2).
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        tokenizer_path: str,
+        batch_size: int = 32,
+        max_length: int = 512,
+        cache_size: int = 10_000,
+    ):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError(
+                "The local reranker requires onnxruntime: pdm install -G local-rerank"
+            ) from e
+        from tokenizers import Tokenizer
+
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.session = onnxruntime.InferenceSession(
+            model_path, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rerank(
+        self,
+        query: str,
+        documents: List[str],
+        top_n: int,
+        ids: Optional[List[str]] = None,
+    ) -> List[Tuple[int, float]]:
+        if not documents:
+            return []
+        normalized = normalize_query(query)
+        keys = [
+            (normalized, hashlib.sha1(document.encode("utf-8")).hexdigest())
+            for document in documents
+        ]
+        with self._lock:
+            scores = [self._scores.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+
+        if missing:
+            start_time = time.time()
+            new_scores = self._score([documents[i] for i in missing], query)
+            with self._lock:
+                for i, score in zip(missing, new_scores):
+                    scores[i] = score
+                    self._scores[keys[i]] = score
+                    self._scores.move_to_end(keys[i])
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+            logging.info(
+                f"Scored {len(missing)} pairs locally in {time.time() - start_time:.3f} seconds"
+            )
+
+        ranked = sorted(enumerate(scores), key=lambda item: item[1], reverse=True)
+        return ranked[:top_n]
+
+    def _score(self, documents: List[str], query: str) -> List[float]:
+        """Run the cross-encoder over (query, document) pairs in batches."""
+        import numpy as np
+
+        scores: List[float] = []
+        for start in range(0, len(documents), self.batch_size):
+            batch = documents[start : start + self.batch_size]
+            encodings = self.tokenizer.encode_batch([(query, document) for document in batch])
+            inputs = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            logits = self.session.run(
+                None, {name: value for name, value in inputs.items() if name in self.input_names}
+            )[0]
+            # Single-logit relevance head; squash to (0, 1) like hosted rerankers
+            scores.extend((1 / (1 + np.exp(-logits[:, 0]))).tolist())
+        return scores
+
+
+def create_reranker(settings: RerankerSettings, cohere_api_key: Optional[str] = None) -> Reranker:
+    """Create the reranker selected by ``settings.provider`` ("cohere" or "local")."""
+    if settings.provider == "cohere":
+        return CohereReranker(cohere_api_key, model=settings.cohere_model)
+    if settings.provider == "local":
+        return LocalCrossEncoderReranker(
+            settings.local_model_path,
+            settings.local_tokenizer_path,
+            batch_size=settings.batch_size,
+            max_length=settings.max_length,
+            cache_size=settings.cache_size,
+        )
+    raise ValueError(f"Unsupported reranker provider: {settings.provider}")
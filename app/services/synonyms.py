@@ -0,0 +1,128 @@
+import logging
+import mmap
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class SynonymTable:
+    """
+    Read-only synonym lookup over a precomputed, memory-mapped file.
+
+    The file holds one ``term<TAB>synonym,synonym,...`` line per term, sorted by
+    the UTF-8 bytes of the term, as written by ``write``. Lookups binary-search
+    the mapped file, so only the pages touched are read and nothing is parsed up
+    front. The file is opened on first use; if it doesn't exist, keywords are
+    returned unexpanded. The file is checked for replacement (a new inode, size
+    or mtime, e.g. after ``python -m app.build_synonyms``) at most every
+    ``check_seconds`` and remapped, so running servers pick up a rebuilt table.
+
+    Example:
+        synonyms = SynonymTable(".cache/synonyms.tsv", max_expansions=3)
+        synonyms.expand(["revenue", "loan"])
+    """
+
+    def __init__(self, path: str, max_expansions: int = 3, check_seconds: float = 1.0):
+        self.path = path
+        self.max_expansions = max_expansions
+        self.check_seconds = check_seconds
+        self._mm: Optional[mmap.mmap] = None
+        # (inode, size, mtime) of the mapped file; None if there is no file
+        self._identity: Optional[Tuple[int, int, int]] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def lookup(self, term: str) -> List[str]:
+        """Return up to ``max_expansions`` synonyms of a term, most common sense first."""
+        mm = self._mapping()
+        if mm is None:
+            return []
+        key = term.lower().encode("utf-8")
+        lo, hi = 0, len(mm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            line_start = mm.rfind(b"\n", 0, mid) + 1
+            line_end = mm.find(b"\n", line_start)
+            if line_end == -1:
+                line_end = len(mm)
+            line_term, _, synonyms = mm[line_start:line_end].partition(b"\t")
+            if line_term == key:
+                return synonyms.decode("utf-8").split(",")[: self.max_expansions]
+            if line_term < key:
+                lo = line_end + 1
+            else:
+                hi = line_start
+        return []
+
+    def expand(self, keywords: Iterable[str]) -> List[str]:
+        """Return the keywords followed by their synonyms, without duplicates."""
+        keywords = list(keywords)
+        expanded = dict.fromkeys(keywords)
+        for keyword in keywords:
+            expanded.update(dict.fromkeys(self.lookup(keyword)))
+        return list(expanded)
+
+    def close(self) -> None:
+        """Unmap the file."""
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+            self._mm = None
+            self._identity = None
+            self._checked_at = float("-inf")
+
+    def _mapping(self) -> Optional[mmap.mmap]:
+        if time.monotonic() - self._checked_at < self.check_seconds:
+            return self._mm
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self.check_seconds:
+                self._remap_if_changed()
+                self._checked_at = time.monotonic()
+            return self._mm
+
+    def _remap_if_changed(self) -> None:
+        try:
+            stat = os.stat(self.path)
+            identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns) if stat.st_size else None
+        except FileNotFoundError:
+            identity = None
+        if identity == self._identity and self._checked_at != float("-inf"):
+            return
+        if identity is None:
+            logging.info(f"No synonym table at {self.path}; keywords won't be expanded")
+            mm = None
+        else:
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._identity is not None:
+                logging.info(f"Synonym table {self.path} changed; remapped it")
+        # The previous mapping isn't closed: lookups running in other threads may
+        # still be reading it, and it is unmapped once they drop it
+        self._mm = mm
+        self._identity = identity
+
+    @staticmethod
+    def write(path: str, synonyms: Dict[str, List[str]]) -> int:
+        """
+        Write a synonym table file.
+
+        Args:
+            path: The file to write.
+            synonyms: Synonyms per term. Terms are lowercased; terms and synonyms
+                must not contain tabs, commas or newlines.
+
+        Returns:
+            The number of terms written.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        entries = sorted(
+            (term.lower().encode("utf-8"), ",".join(values).encode("utf-8"))
+            for term, values in synonyms.items()
+            if values
+        )
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"\n".join(term + b"\t" + values for term, values in entries))
+        os.replace(tmp_path, path)
+        return len(entries)
@@ -1,7 +1,13 @@
-from typing import List
-import pandas as pd
-from pydantic import BaseModel, Field
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterator, List, Optional
+from pydantic import BaseModel, Field, ValidationError
 from .llm_factory import LLMFactory
+from .tracing import span
+
+if TYPE_CHECKING:
+    from ..database.results import SearchResult
 
 
 class SynthesizedResponse(BaseModel):
@@ -56,7 +62,7 @@ class Synthesizer:
     """
 
     @staticmethod
-    def generate_response(question: str, context: pd.DataFrame) -> SynthesizedResponse:
+    def generate_response(question: str, context: List[SearchResult]) -> SynthesizedResponse:
         """Generates a synthesized response based on the question and context from kommunalbanken documents.
 
         Args:
@@ -66,11 +72,78 @@ class Synthesizer:
         Returns:
             A SynthesizedResponse containing thought process, answer, and context sufficiency.
         """
-        context_str = Synthesizer.dataframe_to_json(
-            context, columns_to_keep=["content"]
+        llm = LLMFactory("openai")
+        messages = Synthesizer._build_messages(question, context)
+        with span("synthesis", tokens=Synthesizer.estimate_prompt_tokens(messages)):
+            return llm.create_completion(response_model=SynthesizedResponse, messages=messages)
+
+    @staticmethod
+    async def agenerate_response(question: str, context: List[SearchResult]) -> SynthesizedResponse:
+        """Async variant of generate_response for the ASGI app.
+
+        Args:
+            question: The user's question.
+            context: The relevant context retrieved from the kommunalbanken document database.
+
+        Returns:
+            A SynthesizedResponse containing thought process, answer, and context sufficiency.
+        """
+        llm = LLMFactory("openai", use_async=True)
+        messages = Synthesizer._build_messages(question, context)
+        with span("synthesis", tokens=Synthesizer.estimate_prompt_tokens(messages)):
+            return await llm.create_completion(
+                response_model=SynthesizedResponse, messages=messages
+            )
+
+    @staticmethod
+    def stream_response(question: str, context: List[SearchResult]) -> Iterator[SynthesizedResponse]:
+        """Stream the synthesized response as partial objects while the LLM generates it.
+
+        Args:
+            question: The user's question.
+            context: The relevant context retrieved from the kommunalbanken document database.
+
+        Returns:
+            An iterator of partial SynthesizedResponse objects, each more complete than the last.
+        """
+        llm = LLMFactory("openai")
+        return llm.create_partial_completion(
+            response_model=SynthesizedResponse,
+            messages=Synthesizer._build_messages(question, context),
         )
 
-        messages = [
+    @staticmethod
+    def astream_response(question: str, context: List[SearchResult]) -> AsyncIterator[SynthesizedResponse]:
+        """Async variant of stream_response for the ASGI app."""
+        llm = LLMFactory("openai", use_async=True)
+        return llm.create_partial_completion(
+            response_model=SynthesizedResponse,
+            messages=Synthesizer._build_messages(question, context),
+        )
+
+    @staticmethod
+    def final_response(partial: Optional[BaseModel]) -> Optional[SynthesizedResponse]:
+        """Validate the last partial object of a stream as a complete response.
+
+        Args:
+            partial: The last object yielded by stream_response or astream_response.
+
+        Returns:
+            The SynthesizedResponse, or None if the stream ended before it was complete.
+        """
+        if partial is None:
+            return None
+        try:
+            return SynthesizedResponse.model_validate(partial.model_dump(exclude_none=True))
+        except ValidationError:
+            return None
+
+    @staticmethod
+    def _build_messages(question: str, context: List[SearchResult]) -> List[Dict[str, str]]:
+        """Build the chat messages for synthesizing an answer from the context."""
+        context_str = Synthesizer.results_to_json(context, columns_to_keep=["content"])
+
+        return [
             {"role": "system", "content": Synthesizer.SYSTEM_PROMPT},
             {"role": "user", "content": f"# User question:\n{question}"},
             {
@@ -79,25 +152,23 @@ class Synthesizer:
             },
         ]
 
-        llm = LLMFactory("openai")
-        return llm.create_completion(
-            response_model=SynthesizedResponse,
-            messages=messages,
-        )
+    @staticmethod
+    def estimate_prompt_tokens(messages: List[Dict[str, str]]) -> int:
+        """Cheaply estimate the prompt size in tokens (roughly 4 characters per token)."""
+        return sum(len(message["content"]) // 4 + 1 for message in messages)
 
     @staticmethod
-    def dataframe_to_json(
-        context: pd.DataFrame,
-        columns_to_keep: List[str],
-    ) -> str:
+    def results_to_json(context: List[SearchResult], columns_to_keep: List[str]) -> str:
         """
-        Convert the context DataFrame to a JSON string.
+        Convert the retrieved results to a JSON string.
 
         Args:
-            context (pd.DataFrame): The context DataFrame.
-            columns_to_keep (List[str]): The columns to include in the output.
+            context (List[SearchResult]): The retrieved results.
+            columns_to_keep (List[str]): The fields to include in the output.
 
         Returns:
-            str: A JSON string representation of the selected columns.
+            str: A JSON array of objects with the selected fields.
         """
-        return context[columns_to_keep].to_json(orient="records", indent=2)
\ No newline at end of file
+        return json.dumps(
+            [result.to_dict(columns_to_keep) for result in context], indent=2, ensure_ascii=False
+        )
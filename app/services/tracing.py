@@ -0,0 +1,109 @@
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .metrics import REGISTRY
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "rag_stage_duration_seconds", "Duration of each search pipeline stage", ["stage"]
+)
+CANDIDATES = REGISTRY.histogram(
+    "rag_stage_candidates",
+    "Number of candidates returned by a retrieval or rerank stage",
+    ["stage"],
+    buckets=(0, 1, 5, 10, 20, 50, 100, 200, 500),
+)
+TOKENS = REGISTRY.counter("rag_tokens_total", "Tokens sent to model APIs", ["stage"])
+CACHE_REQUESTS = REGISTRY.counter(
+    "rag_cache_requests_total", "Cache lookups by stage and result", ["stage", "result"]
+)
+
+
+class Trace:
+    """The spans recorded while handling one request."""
+
+    def __init__(self):
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def breakdown(self) -> Dict[str, float]:
+        """Return the milliseconds spent per stage, summed over repeated spans."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                totals[span["name"]] = totals.get(span["name"], 0.0) + span["duration_ms"]
+        return {name: round(ms, 3) for name, ms in totals.items()}
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+
+
+@contextmanager
+def trace() -> Iterator[Trace]:
+    """
+    Collect the spans recorded in this context (including asyncio tasks it starts
+    and executor calls wrapped with ``in_context``) into a Trace.
+
+    Example:
+        with trace() as request_trace:
+            search_service.perform_search(query)
+        request_trace.breakdown()
+    """
+    request_trace = Trace()
+    token = _current_trace.set(request_trace)
+    try:
+        yield request_trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Time a pipeline stage.
+
+    The duration goes to the ``rag_stage_duration_seconds`` histogram and, inside
+    ``trace()``, to the current Trace. The yielded dict holds the span's attributes
+    and can be filled in by the stage; these keys also feed metrics:
+
+    - ``candidates``: observed in ``rag_stage_candidates``
+    - ``tokens``: added to ``rag_tokens_total``
+    - ``cache_hit``: counted in ``rag_cache_requests_total``
+
+    Example:
+        with span("semantic_search") as attributes:
+            results = ...
+            attributes["candidates"] = len(results)
+    """
+    start_time = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        duration = time.perf_counter() - start_time
+        STAGE_SECONDS.observe(duration, stage=name)
+        if attributes.get("candidates") is not None:
+            CANDIDATES.observe(attributes["candidates"], stage=name)
+        if attributes.get("tokens"):
+            TOKENS.inc(attributes["tokens"], stage=name)
+        if attributes.get("cache_hit") is not None:
+            CACHE_REQUESTS.inc(stage=name, result="hit" if attributes["cache_hit"] else "miss")
+
+        request_trace = _current_trace.get()
+        if request_trace is not None:
+            request_trace.add({"name": name, "duration_ms": duration * 1000, **attributes})
+        logging.debug(f"Span {name} took {duration * 1000:.1f} ms {attributes}")
+
+
+def in_context(fn: Callable, *args: Any, **kwargs: Any) -> Callable[[], Any]:
+    """Bind ``fn`` to the current context, so spans it records in a worker thread join the trace."""
+    context = contextvars.copy_context()
+    return lambda: context.run(fn, *args, **kwargs)
@@ -1,16 +1,254 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from .config.settings import get_settings
+from .database.async_vector_store import AsyncVectorStore
+from .database.results import SearchResult
 from .database.vector_store import VectorStore
-from .services.synthesizer import Synthesizer
-from timescale_vector import client
+from .services.query_cache import QueryResultCache
+from .services.synthesizer import SynthesizedResponse, Synthesizer
+from .services.tracing import in_context, span
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def format_response(response: SynthesizedResponse) -> Dict[str, Any]:
+    """Select the fields of a (possibly partial) synthesized response sent to the client."""
+    return {
+        'key_points': response.key_points or [],
+        'sections': response.sections or [],
+        'sources': response.sources or [],
+        'enough_context': response.enough_context,
+    }
+
+
+def query_from_body(body: Any) -> str:
+    """
+    Return the query of a search request body.
+
+    Raises:
+        ValueError: If the body isn't a JSON object with a non-empty string "query".
+    """
+    query = body.get("query") if isinstance(body, dict) else None
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError("The request body must be a JSON object with a non-empty 'query'")
+    return query
+
+
+def _sources_payload(results: List[SearchResult]) -> List[Dict[str, Any]]:
+    """Describe the retrieved chunks sent ahead of the synthesized answer."""
+    return [
+        result.to_dict(("id", "content", "search_type", "relevance_score"))
+        for result in results
+    ]
+
+
+def _search_limits() -> Dict[str, Any]:
+    """The candidate counts, reranking and result count configured in SearchSettings."""
+    settings = get_settings().search
+    return {
+        "keyword_k": settings.keyword_k,
+        "semantic_k": settings.semantic_k,
+        "rerank": settings.rerank,
+        "top_n": settings.top_n,
+    }
+
+
+def _create_query_cache(vector_store: VectorStore) -> Optional[QueryResultCache]:
+    """
+    Create the result cache from settings, invalidated whenever the table changes:
+    at once for writes through ``vector_store``, and within
+    ``version_check_seconds`` for writes by other processes (see
+    VectorStore.check_for_changes).
+    """
+    settings = get_settings().query_cache
+    if not settings.enabled:
+        return None
+    cache = QueryResultCache(
+        ttl_seconds=settings.ttl_seconds,
+        similarity_threshold=settings.similarity_threshold,
+        max_entries=settings.max_entries,
+    )
+    vector_store.add_change_listener(cache.invalidate)
+    return cache
+
 
 class SearchService:
     def __init__(self):
         self.vec = VectorStore()
+        self.cache = _create_query_cache(self.vec)
     
     def perform_search(self, query):
-        reranked_results = self.vec.hybrid_search(
-            query=query, keyword_k=10, semantic_k=10, rerank=True, top_n=5
-        )
+        # Answer repeats and near-duplicates from the cache
+        cached, precomputed = self._lookup_cache(query)
+        if cached is not None:
+            return cached[1]
+
+        reranked_results = self.vec.hybrid_search(query=query, **_search_limits(), **precomputed)
         response = Synthesizer.generate_response(question=query, context=reranked_results)
-        
+
+        if self.cache:
+            self.cache.put(
+                query, precomputed.get("query_embedding"), (reranked_results, response)
+            )
         # Return the structured response directly instead of trying to access 'answer'
-        return response
\ No newline at end of file
+        return response
+
+    def _lookup_cache(self, query) -> Tuple[Optional[Any], Dict[str, Any]]:
+        """
+        Look the query up in the result cache.
+
+        On a miss, the query embedding computed for the similarity lookup and the
+        keyword query, extracted concurrently with it, are returned for
+        hybrid_search, so neither is computed twice.
+
+        Returns:
+            The cached result or None, and the precomputed hybrid_search arguments.
+        """
+        if not self.cache:
+            return None, {}
+        # Drop results cached before another process (e.g. ingestion) changed the table
+        self.vec.check_for_changes()
+        with span("query_cache") as attributes:
+            cached = self.cache.get_exact(query)
+            attributes["cache_hit"] = cached is not None
+            if cached is not None:
+                logging.info("Search served from exact-match cache")
+                return cached, {}
+            keyword_future = self.vec.executor.submit(
+                in_context(self.vec.build_keyword_query, query)
+            )
+            query_embedding = self.vec.get_embedding(query)
+            cached = self.cache.get_similar(query_embedding)
+            attributes["cache_hit"] = cached is not None
+        if cached is not None:
+            logging.info("Search served from similarity cache")
+            keyword_future.cancel()
+            return cached, {}
+        return None, {
+            "query_embedding": query_embedding,
+            "search_query": keyword_future.result(),
+        }
+
+    def stream_search(self, query) -> Iterator[str]:
+        """
+        Run the search pipeline, yielding server-sent events as results become available.
+
+        Events: ``sources`` once reranking finishes, ``partial`` whenever the
+        synthesized answer grows, ``done`` with the final answer, or ``error``.
+        """
+        try:
+            cached, precomputed = self._lookup_cache(query)
+            if cached is not None:
+                reranked_results, response = cached
+                yield format_sse("sources", _sources_payload(reranked_results))
+                yield format_sse("done", format_response(response))
+                return
+
+            reranked_results = self.vec.hybrid_search(
+                query=query, **_search_limits(), **precomputed
+            )
+            yield format_sse("sources", _sources_payload(reranked_results))
+
+            partial = None
+            last_payload = None
+            with span("synthesis"):
+                for partial in Synthesizer.stream_response(question=query, context=reranked_results):
+                    payload = format_response(partial)
+                    if payload != last_payload:
+                        yield format_sse("partial", payload)
+                        last_payload = payload
+            yield format_sse("done", last_payload or {})
+
+            # Cache the validated response, as perform_search does, not the partial object
+            response = Synthesizer.final_response(partial)
+            if self.cache and response is not None:
+                self.cache.put(
+                    query, precomputed.get("query_embedding"), (reranked_results, response)
+                )
+        except Exception as e:
+            yield format_sse("error", {'error': str(e)})
+
+
+class AsyncSearchService:
+    def __init__(self):
+        self.vec = AsyncVectorStore()
+        self.cache = _create_query_cache(self.vec.store)
+
+    async def perform_search(self, query):
+        cached, precomputed = await self._lookup_cache(query)
+        if cached is not None:
+            return cached[1]
+
+        reranked_results = await self.vec.hybrid_search(
+            query=query, **_search_limits(), **precomputed
+        )
+        response = await Synthesizer.agenerate_response(question=query, context=reranked_results)
+
+        if self.cache:
+            self.cache.put(
+                query, precomputed.get("query_embedding"), (reranked_results, response)
+            )
+        return response
+
+    async def _lookup_cache(self, query) -> Tuple[Optional[Any], Dict[str, Any]]:
+        """Async variant of SearchService._lookup_cache."""
+        if not self.cache:
+            return None, {}
+        await self.vec.check_for_changes()
+        with span("query_cache") as attributes:
+            cached = self.cache.get_exact(query)
+            attributes["cache_hit"] = cached is not None
+            if cached is not None:
+                return cached, {}
+            keyword_task = asyncio.create_task(self.vec.build_keyword_query(query))
+            query_embedding = await self.vec.get_embedding(query)
+            cached = self.cache.get_similar(query_embedding)
+            attributes["cache_hit"] = cached is not None
+        if cached is not None:
+            keyword_task.cancel()
+            return cached, {}
+        return None, {"query_embedding": query_embedding, "search_query": await keyword_task}
+
+    async def stream_search(self, query) -> AsyncIterator[str]:
+        """Async variant of SearchService.stream_search."""
+        try:
+            cached, precomputed = await self._lookup_cache(query)
+            if cached is not None:
+                reranked_results, response = cached
+                yield format_sse("sources", _sources_payload(reranked_results))
+                yield format_sse("done", format_response(response))
+                return
+
+            reranked_results = await self.vec.hybrid_search(
+                query=query, **_search_limits(), **precomputed
+            )
+            yield format_sse("sources", _sources_payload(reranked_results))
+
+            partial = None
+            last_payload = None
+            with span("synthesis"):
+                async for partial in Synthesizer.astream_response(
+                    question=query, context=reranked_results
+                ):
+                    payload = format_response(partial)
+                    if payload != last_payload:
+                        yield format_sse("partial", payload)
+                        last_payload = payload
+            yield format_sse("done", last_payload or {})
+
+            # Cache the validated response, as perform_search does, not the partial object
+            response = Synthesizer.final_response(partial)
+            if self.cache and response is not None:
+                self.cache.put(
+                    query, precomputed.get("query_embedding"), (reranked_results, response)
+                )
+        except Exception as e:
+            yield format_sse("error", {'error': str(e)})
@@ -0,0 +1,124 @@
+"""
+Deterministic stand-ins for the hosted models, for offline benchmarks.
+
+They implement just enough of the OpenAI and reranker interfaces used by
+VectorStore, so a benchmark measures the database and the application code
+rather than the network. ``latency_ms`` adds a fixed sleep per call to model a
+provider round trip.
+"""
+
+import hashlib
+import math
+import re
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+from app.services.keyword_extractor import STOPWORDS
+from app.services.reranker import Reranker
+from app.services.synthesizer import Keywords
+
+_WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD_PATTERN.findall(text.lower())
+
+
+class FakeEmbeddings:
+    """
+    Feature-hashed bag-of-words embeddings.
+
+    Each word maps to a fixed dimension and sign, so texts sharing words get
+    similar unit vectors and the same text always gets the same vector.
+    """
+
+    def __init__(self, dimensions: int, latency_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+        self._features: Dict[str, Tuple[int, float]] = {}
+
+    def embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in tokenize(text):
+            index, sign = self._feature(word)
+            vector[index] += sign
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def create(self, input: List[str], model: str, **kwargs) -> SimpleNamespace:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        dimensions = kwargs.get("dimensions") or self.dimensions
+        data = [
+            SimpleNamespace(index=i, embedding=self.embed(text)[:dimensions])
+            for i, text in enumerate(input)
+        ]
+        return SimpleNamespace(data=data)
+
+    def _feature(self, word: str) -> Tuple[int, float]:
+        if word not in self._features:
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            self._features[word] = (value % self.dimensions, 1.0 if value >> 63 else -1.0)
+        return self._features[word]
+
+
+class FakeOpenAI:
+    """An OpenAI client whose embeddings come from FakeEmbeddings."""
+
+    def __init__(self, dimensions: int, latency_ms: float = 0.0):
+        self.embeddings = FakeEmbeddings(dimensions, latency_ms)
+
+    def with_options(self, **kwargs) -> "FakeOpenAI":
+        return self
+
+
+class FakeKeywordLLM:
+    """
+    An OpenAI client for LLMKeywordExtractor that returns the query's longest
+    non-stopword terms as the keywords.
+    """
+
+    def __init__(self, max_keywords: int = 2, latency_ms: float = 0.0):
+        self.max_keywords = max_keywords
+        self.latency_ms = latency_ms
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=self))
+
+    def parse(self, model: str, messages: List[Dict[str, str]], response_format=Keywords):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        prompt = messages[-1]["content"]
+        query = prompt.split("'")[1] if prompt.count("'") >= 2 else prompt
+        terms = [word for word in dict.fromkeys(tokenize(query)) if word not in STOPWORDS]
+        keywords = sorted(terms, key=len, reverse=True)[: self.max_keywords]
+        message = SimpleNamespace(parsed=Keywords(content=keywords))
+        tokens = sum(len(m["content"]) // 4 + 1 for m in messages) + len(keywords)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message)],
+            usage=SimpleNamespace(total_tokens=tokens),
+        )
+
+
+class FakeReranker(Reranker):
+    """Ranks documents by the fraction of query terms they contain."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+
+    def rerank(
+        self,
+        query: str,
+        documents: List[str],
+        top_n: int,
+        ids: Optional[List[str]] = None,
+    ) -> List[Tuple[int, float]]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        terms = set(tokenize(query))
+        scores = [
+            (i, len(terms & set(tokenize(document))) / (len(terms) or 1))
+            for i, document in enumerate(documents)
+        ]
+        scores.sort(key=lambda pair: pair[1], reverse=True)
+        return scores[:top_n]
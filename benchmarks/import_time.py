@@ -0,0 +1,95 @@
+"""
+Measure the cold import time of the application's entry-point modules.
+
+Each module is imported in a fresh interpreter with ``-X importtime`` and the
+cumulative time of its top-level import is reported. Exits non-zero when a
+module's median exceeds its budget in BUDGETS_MS (or ``--budget-ms`` for all
+of them), so it can gate CI:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py app.routes --budget-ms 500
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Median import budget per entry-point module, in milliseconds. Most of
+# app.config.settings is pydantic; each module below adds little on top of what
+# it imports, and the web entry points add Flask or Starlette.
+BUDGETS_MS = {
+    "app.config.settings": 300,
+    "app.database.vector_store": 350,
+    "app.database.async_vector_store": 400,
+    "app.similarity_search": 400,
+    "app.routes": 600,
+    "app.asgi": 800,
+    "app.insert_vectors": 400,
+}
+MODULES = list(BUDGETS_MS)
+
+# "import time: self [us] | cumulative | imported package"
+_IMPORTTIME_LINE = re.compile(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def import_time_ms(module: str) -> float:
+    """Import ``module`` in a fresh interpreter and return its cumulative import time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def measure(modules: List[str], repeat: int) -> Dict[str, Dict[str, float]]:
+    """Return the min and median import time of each module over ``repeat`` runs."""
+    report = {}
+    for module in modules:
+        samples = [import_time_ms(module) for _ in range(repeat)]
+        report[module] = {"min_ms": min(samples), "median_ms": statistics.median(samples)}
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES, help="Modules to measure")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module")
+    parser.add_argument(
+        "--budget-ms", type=float, help="Budget for every module, instead of BUDGETS_MS"
+    )
+    parser.add_argument("--json", action="store_true", help="Print a JSON report")
+    args = parser.parse_args()
+
+    report = measure(args.modules, args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for module, timing in report.items():
+            print(f"{module:40} {timing['median_ms']:8.1f} ms (min {timing['min_ms']:.1f} ms)")
+
+    over = []
+    for module, timing in report.items():
+        budget = args.budget_ms if args.budget_ms is not None else BUDGETS_MS.get(module)
+        if budget is not None and timing["median_ms"] > budget:
+            over.append(f"{module} ({timing['median_ms']:.0f} > {budget:.0f} ms)")
+    if over:
+        sys.exit(f"Over the import budget: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import pytest
+
+from app.config.settings import Settings, get_settings
+
+
+class FakeClock:
+    """Stands in for a module's ``time``: monotonic/time advance only when slept on."""
+
+    def __init__(self, start: float = 1_000.0):
+        self.now = start
+        self.slept = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def settings(tmp_path) -> Settings:
+    """Settings without persistent caches or synonyms, writing only under tmp_path."""
+    settings = get_settings()
+    return settings.model_copy(
+        update={
+            "embedding_cache": settings.embedding_cache.model_copy(update={"enabled": False}),
+            "synonyms": settings.synonyms.model_copy(update={"enabled": False}),
+            "keywords": settings.keywords.model_copy(update={"strategy": "local"}),
+            "local_index": settings.local_index.model_copy(
+                update={"path": str(tmp_path / "local_index")}
+            ),
+        }
+    )
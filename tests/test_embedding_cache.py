@@ -0,0 +1,79 @@
+from app.services import embedding_cache
+from app.services.embedding_cache import EmbeddingCache
+
+
+def make_cache(tmp_path, clock, monkeypatch, max_entries=3):
+    monkeypatch.setattr(embedding_cache, "time", clock)
+    return EmbeddingCache(str(tmp_path / "embeddings.sqlite"), "test-model", max_entries)
+
+
+def test_lookup_returns_stored_embeddings_and_missing_indices(tmp_path, clock, monkeypatch):
+    cache = make_cache(tmp_path, clock, monkeypatch)
+    cache.put_many(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+
+    embeddings, missing = cache.lookup(["b", "c", "a"])
+
+    assert embeddings == [[0.0, 1.0], None, [1.0, 0.0]]
+    assert missing == [1]
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_keys_ignore_whitespace_differences(tmp_path, clock, monkeypatch):
+    cache = make_cache(tmp_path, clock, monkeypatch)
+    cache.put("green  bond\nframework", [0.5, 0.5])
+
+    assert cache.get("green bond framework") == [0.5, 0.5]
+
+
+def test_evicts_least_recently_used_entries(tmp_path, clock, monkeypatch):
+    cache = make_cache(tmp_path, clock, monkeypatch, max_entries=2)
+    cache.put("a", [1.0])
+    clock.sleep(1)
+    cache.put("b", [2.0])
+    clock.sleep(1)
+    assert cache.get("a") == [1.0]  # now more recent than "b"
+    clock.sleep(1)
+
+    cache.put("c", [3.0])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+    assert cache.stats()["size"] == 2
+
+
+def test_replacing_an_entry_does_not_grow_the_cache(tmp_path, clock, monkeypatch):
+    cache = make_cache(tmp_path, clock, monkeypatch, max_entries=2)
+    cache.put_many(["a", "b"], [[1.0], [2.0]])
+
+    cache.put("a", [1.5])
+
+    assert cache.stats()["size"] == 2
+    assert cache.get("a") == [1.5]
+    assert cache.get("b") == [2.0]
+
+
+def test_entries_persist_and_are_scoped_to_the_model(tmp_path, clock, monkeypatch):
+    make_cache(tmp_path, clock, monkeypatch).put("a", [1.0])
+
+    reopened = make_cache(tmp_path, clock, monkeypatch)
+    other_model = EmbeddingCache(str(tmp_path / "embeddings.sqlite"), "other-model")
+
+    assert reopened.get("a") == [1.0]
+    assert reopened.stats()["size"] == 1
+    assert other_model.get("a") is None
+
+
+def test_caches_sharing_a_file_evict_down_to_its_actual_size(tmp_path, clock, monkeypatch):
+    first = make_cache(tmp_path, clock, monkeypatch, max_entries=3)
+    second = make_cache(tmp_path, clock, monkeypatch, max_entries=3)
+    for cache, text in [(first, "a"), (first, "b"), (second, "c"), (second, "d"), (first, "e")]:
+        cache.put(text, [1.0])
+        clock.sleep(1)
+
+    # first tracked 4 entries here, but the file holds 5
+    first.put("f", [1.0])
+
+    assert first.stats()["size"] == 3
+    assert first.lookup(["a", "b", "c", "d", "e", "f"])[1] == [0, 1, 2]
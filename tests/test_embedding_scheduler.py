@@ -0,0 +1,205 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from app.database.vector_store import VectorStore
+from app.services import embedding_scheduler
+from app.services.embedding_scheduler import EmbeddingScheduler, RateLimiter, is_retryable_error
+from benchmarks.fakes import FakeEmbeddings, FakeOpenAI
+
+
+class FakeEmbeddingServer:
+    """
+    An OpenAI-compatible ``POST /v1/embeddings`` endpoint on localhost.
+
+    Queued (status, headers) failures are returned first; after that every
+    request gets FakeEmbeddings vectors.
+    """
+
+    def __init__(self, dimensions: int = 8):
+        self.embeddings = FakeEmbeddings(dimensions)
+        self.failures = []
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.requests.append(body)
+                if server.failures:
+                    status, headers = server.failures.pop(0)
+                    payload = {"error": {"message": f"fake {status}", "type": "fake"}}
+                else:
+                    status, headers = 200, {}
+                    payload = {
+                        "object": "list",
+                        "model": body["model"],
+                        "data": [
+                            {
+                                "object": "embedding",
+                                "index": i,
+                                "embedding": server.embeddings.embed(text),
+                            }
+                            for i, text in enumerate(body["input"])
+                        ],
+                        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+                    }
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    with FakeEmbeddingServer() as server:
+        yield server
+
+
+@pytest.fixture
+def store(settings, server):
+    openai_settings = settings.openai.model_copy(
+        update={"api_key": "test", "base_url": server.base_url, "embedding_dimensions": None}
+    )
+    store = VectorStore(settings.model_copy(update={"openai": openai_settings}))
+    yield store
+    store.close()
+
+
+def test_embeds_through_the_server_in_input_order(store, server):
+    texts = ["green bonds", "quarterly report", "green bonds"]
+
+    embeddings = EmbeddingScheduler(store, max_concurrency=2).embed(texts)
+
+    assert embeddings == [server.embeddings.embed(text) for text in texts]
+
+
+def test_retries_a_429_after_the_retry_after_delay(store, server, clock, monkeypatch):
+    monkeypatch.setattr(embedding_scheduler, "time", clock)
+    server.failures.append((429, {"retry-after": "7"}))
+
+    embeddings = EmbeddingScheduler(store, max_retries=2).embed(["loan"])
+
+    assert embeddings == [server.embeddings.embed("loan")]
+    assert len(server.requests) == 2
+    assert 7 in clock.slept
+
+
+def test_does_not_retry_client_errors(store, server):
+    server.failures.append((400, {}))
+
+    with pytest.raises(openai.BadRequestError):
+        EmbeddingScheduler(store, max_retries=3).embed(["loan"])
+    assert len(server.requests) == 1
+
+
+def test_gives_up_after_max_retries(store, server, clock, monkeypatch):
+    monkeypatch.setattr(embedding_scheduler, "time", clock)
+    server.failures.extend([(503, {})] * 3)
+
+    with pytest.raises(openai.InternalServerError):
+        EmbeddingScheduler(store, max_retries=2).embed(["loan"])
+    assert len(server.requests) == 3
+
+
+def test_uses_the_stores_scheduler_settings(settings, server, clock, monkeypatch):
+    monkeypatch.setattr(embedding_scheduler, "time", clock)
+    server.failures.append((503, {}))
+    openai_settings = settings.openai.model_copy(
+        update={"api_key": "test", "base_url": server.base_url, "embedding_dimensions": None}
+    )
+    scheduler_settings = settings.embedding_scheduler.model_copy(
+        update={"max_retries": 0, "max_concurrency": 3}
+    )
+    store = VectorStore(
+        settings.model_copy(
+            update={"openai": openai_settings, "embedding_scheduler": scheduler_settings}
+        )
+    )
+    scheduler = EmbeddingScheduler(store)
+
+    assert scheduler.max_concurrency == 3
+    with pytest.raises(openai.InternalServerError):
+        scheduler.embed(["loan"])
+    assert len(server.requests) == 1
+    store.close()
+
+
+def test_iter_batches_yields_token_bounded_batches_in_order(settings):
+    openai_settings = settings.openai.model_copy(
+        update={"embedding_batch_size": 2, "embedding_dimensions": None}
+    )
+    fake = FakeOpenAI(dimensions=8)
+    store = VectorStore(settings.model_copy(update={"openai": openai_settings}), {"openai": fake})
+    texts = [f"text number {i}" for i in range(5)]
+
+    batches = list(EmbeddingScheduler(store, max_concurrency=1).iter_batches(texts))
+
+    assert [indices for indices, _ in batches] == [[0, 1], [2, 3], [4]]
+    assert [embedding for _, embeddings in batches for embedding in embeddings] == [
+        fake.embeddings.embed(text) for text in texts
+    ]
+
+
+def test_rate_limiter_waits_for_a_request_to_refill(clock, monkeypatch):
+    monkeypatch.setattr(embedding_scheduler, "time", clock)
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=1_000)
+
+    limiter.acquire(10)
+    limiter.acquire(10)
+    assert clock.slept == []
+    limiter.acquire(10)
+
+    assert sum(clock.slept) == pytest.approx(30)
+
+
+def test_rate_limiter_waits_for_tokens_to_refill(clock, monkeypatch):
+    monkeypatch.setattr(embedding_scheduler, "time", clock)
+    limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=60)
+
+    limiter.acquire(60)
+    limiter.acquire(30)
+
+    assert sum(clock.slept) == pytest.approx(30)
+
+
+def test_rate_limiter_caps_requests_larger_than_the_budget(clock, monkeypatch):
+    monkeypatch.setattr(embedding_scheduler, "time", clock)
+    limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=60)
+
+    limiter.acquire(500)
+
+    assert clock.slept == []
+
+
+def test_retryable_errors():
+    class StatusError(Exception):
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    assert is_retryable_error(StatusError(429))
+    assert is_retryable_error(StatusError(502))
+    assert not is_retryable_error(StatusError(400))
+    assert not is_retryable_error(ValueError("bad input"))
@@ -0,0 +1,47 @@
+import pytest
+
+from app.evaluate import SWEPT_INDEX_SETTINGS, SWEPT_SETTINGS, evaluate
+
+
+class FakeStore:
+    def __init__(self, settings, fail=False):
+        self.settings = settings
+        self.fail = fail
+        self.searched_with = []
+
+    def hybrid_search(self, query, **kwargs):
+        self.searched_with.append(self.settings)
+        if self.fail:
+            raise RuntimeError("search failed")
+        return []
+
+
+def config(settings, **overrides):
+    values = {name: getattr(settings.search, name) for name in SWEPT_SETTINGS}
+    values.update({name: getattr(settings.index, name) for name in SWEPT_INDEX_SETTINGS})
+    return {**values, **overrides}
+
+
+QUERIES = [
+    {"query": "green bonds", "relevant_chunks": [["report", "0"]]},
+    {"query": "scope 3 emissions", "relevant_chunks": [["report", "1"]]},
+]
+
+
+def test_a_configuration_runs_with_its_settings_and_restores_the_stores(settings):
+    store = FakeStore(settings)
+
+    result = evaluate(store, QUERIES, config(settings, keyword_k=42), top_n=5)
+
+    assert store.searched_with[0].search.keyword_k == 42
+    assert store.settings is settings
+    assert result["recall@5"] == 0.0
+
+
+def test_the_settings_are_restored_when_a_search_fails(settings):
+    store = FakeStore(settings, fail=True)
+
+    with pytest.raises(RuntimeError):
+        evaluate(store, QUERIES, config(settings, keyword_k=42), top_n=5)
+
+    assert store.settings is settings
@@ -0,0 +1,154 @@
+import queue
+from pathlib import Path
+
+import pytest
+
+from app.services import ingestion
+from app.services.ingestion import IngestionPipeline, document_id
+
+
+class FakeStore:
+    """The parts of VectorStore the embedding stage uses, over stored chunk ids."""
+
+    def __init__(self, settings, stored):
+        self.settings = settings
+        self.vector_settings = settings.vector_store
+        self.stored = stored
+        self.lookups = []
+
+    def get_stored_chunks(self, doc_ids):
+        self.lookups.append(list(doc_ids))
+        return {doc_id: self.stored[doc_id] for doc_id in doc_ids if doc_id in self.stored}
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+def chunk(doc_id, chunk_id, content, chunk_index=0):
+    return {"doc_id": doc_id, "chunk_id": chunk_id, "chunk_index": chunk_index, "content": content}
+
+
+def stored(*chunks):
+    """Stored chunks as get_stored_chunks returns them: chunk_id -> (record id, metadata)."""
+    return {
+        chunk_id: (record_id, {"chunk_id": chunk_id, "chunk_index": 0})
+        for chunk_id, record_id in chunks
+    }
+
+
+@pytest.fixture
+def pipeline(settings, monkeypatch):
+    monkeypatch.setattr(
+        ingestion,
+        "prepare_record",
+        lambda chunk, embedding: {"chunk_id": chunk["chunk_id"], "embedding": embedding},
+    )
+
+    def make(stored):
+        pipeline = IngestionPipeline(FakeStore(settings, stored))
+        pipeline.scheduler = FakeScheduler()
+        return pipeline
+
+    return make
+
+
+def test_document_id_keeps_files_with_the_same_name_apart(tmp_path):
+    a, b = tmp_path / "a" / "report.pdf", tmp_path / "b" / "report.pdf"
+
+    assert document_id(a).startswith("report-")
+    assert document_id(a) != document_id(b)
+    assert document_id(a) == document_id(Path(str(a)))
+
+
+def test_a_batch_of_files_is_diffed_with_one_lookup_and_embedded_together(pipeline):
+    pipeline = pipeline(
+        {
+            "report-1": stored(("kept", "r1"), ("gone", "r2")),
+            "report_123": stored(("0", "legacy1"), ("1", "legacy2")),
+            "old-id": stored(("x", "o1")),
+        }
+    )
+    batch = [
+        (
+            {"path": Path("report.pdf"), "doc_id": "report-1"},
+            [chunk("report-1", "kept", "same"), chunk("report-1", "new", "added text")],
+        ),
+        (
+            {"path": Path("other.pdf"), "doc_id": "other-2", "legacy_doc_id": "report_123"},
+            [chunk("other-2", "c", "fresh")],
+        ),
+        (
+            {"path": Path("moved.pdf"), "doc_id": "moved-3", "previous_doc_id": "old-id"},
+            [],
+        ),
+    ]
+    embedded = queue.Queue()
+    stats = {"chunks": 0}
+
+    pipeline._embed_batch(batch, embedded, stats)
+
+    assert pipeline.vector_store.lookups == [
+        ["report-1", "other-2", "report_123", "moved-3", "old-id"]
+    ]
+    assert pipeline.scheduler.calls == [["added text", "fresh"]]
+    items = [embedded.get_nowait() for _ in range(3)]
+    assert [(info["doc_id"], chunk_ids) for info, chunk_ids, _, _, _ in items] == [
+        ("report-1", ["kept", "new"]),
+        ("other-2", ["c"]),
+        ("moved-3", []),
+    ]
+    assert [[record["chunk_id"] for record in records] for _, _, records, _, _ in items] == [
+        ["new"],
+        ["c"],
+        [],
+    ]
+    assert [sorted(removed) for _, _, _, _, removed in items] == [
+        ["r2"],
+        ["legacy1", "legacy2"],
+        ["o1"],
+    ]
+    assert stats["chunks"] == 3
+
+
+def test_unchanged_chunks_that_moved_get_their_new_position(pipeline):
+    pipeline = pipeline({"report-1": stored(("a", "r1"), ("b", "r2"))})
+    batch = [
+        (
+            {"path": Path("report.pdf"), "doc_id": "report-1"},
+            [
+                chunk("report-1", "a", "first", chunk_index=0),
+                chunk("report-1", "new", "inserted", chunk_index=1),
+                chunk("report-1", "b", "second", chunk_index=2),
+            ],
+        )
+    ]
+    embedded = queue.Queue()
+
+    pipeline._embed_batch(batch, embedded, {"chunks": 0})
+
+    _, _, records, moved, removed = embedded.get_nowait()
+    assert [record["chunk_id"] for record in records] == ["new"]
+    assert list(moved) == ["r2"]
+    assert moved["r2"]["chunk_id"] == "b"
+    assert moved["r2"]["chunk_index"] == 2
+    assert removed == []
+
+
+def test_the_embed_stage_batches_files_already_parsed(pipeline):
+    pipeline = pipeline({})
+    parsed, embedded = queue.Queue(), queue.Queue()
+    for i in range(3):
+        parsed.put(({"path": Path(f"{i}.pdf"), "doc_id": f"doc-{i}"}, [chunk(f"doc-{i}", "c", "t")]))
+    parsed.put(ingestion._DONE)
+
+    pipeline._embed_stage(parsed, embedded, {"chunks": 0})
+
+    assert pipeline.vector_store.lookups == [["doc-0", "doc-1", "doc-2"]]
+    assert len(pipeline.scheduler.calls) == 1
+    assert embedded.qsize() == 4
@@ -0,0 +1,218 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.database.local_index import LocalVectorIndex
+
+
+class FakeTableVersion:
+    def __init__(self, version="1:0"):
+        self.version = version
+
+    def current(self):
+        return self.version
+
+    def remember(self, version):
+        self.version = version
+
+
+class FakeTable:
+    """The rows and version LocalVectorIndex reads, without a database."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.reads = 0
+        self.store = SimpleNamespace(
+            vector_settings=SimpleNamespace(table_name="documents", embedding_dimensions=2),
+            table_version=FakeTableVersion(),
+        )
+
+    def index(self, directory, **kwargs):
+        index = LocalVectorIndex(self.store, str(directory), **kwargs)
+        index._read_table = lambda: self.read(index.max_rows)
+        return index
+
+    def read(self, max_rows=None):
+        self.reads += 1
+        if max_rows is not None and len(self.rows) > max_rows:
+            return self.store.table_version.version, None
+        return self.store.table_version.version, list(self.rows)
+
+    def write(self, version):
+        before = self.store.table_version.version
+        self.store.table_version.version = version
+        return before
+
+
+@pytest.fixture
+def table():
+    return FakeTable(
+        [
+            ("a", {"doc_id": "report"}, "alpha", [1.0, 0.0]),
+            ("b", {"doc_id": "report"}, "beta", [0.0, 1.0]),
+            ("c", {"doc_id": "framework"}, "gamma", [0.6, 0.8]),
+        ]
+    )
+
+
+def ids(results):
+    return [result.id for result in results]
+
+
+def test_search_ranks_by_cosine_distance(table, tmp_path):
+    index = table.index(tmp_path)
+
+    assert index.ready()
+    results = index.search([1.0, 0.1], limit=2)
+
+    assert ids(results) == ["a", "c"]
+    assert results[0].distance == pytest.approx(1 - 1 / np.hypot(1.0, 0.1), abs=1e-6)
+    assert ids(index.search([1.0, 0.1], limit=5, metadata_filter={"doc_id": "report"})) == [
+        "a",
+        "b",
+    ]
+
+
+def test_upsert_applies_to_a_snapshot_at_the_version_before(table, tmp_path):
+    index = table.index(tmp_path)
+    index.ready()
+
+    before = table.write("1:2")
+    index.apply_upsert(
+        ["d", "b"],
+        [{"doc_id": "new"}, {"doc_id": "report"}],
+        ["delta", "beta v2"],
+        np.array([[-1.0, 0.0], [1.0, 1.0]], dtype=np.float32),
+        before=before,
+        after="1:2",
+    )
+
+    assert index.ready()
+    assert table.reads == 1
+    assert index.size == 4
+    assert ids(index.search([-1.0, 0.0], limit=1)) == ["d"]
+    assert index.search([1.0, 1.0], limit=1)[0].content == "beta v2"
+
+
+def test_writes_are_saved_on_next_use_not_per_batch(table, tmp_path):
+    index = table.index(tmp_path)
+    index.ready()
+    saved = {path.name: path.stat().st_mtime_ns for path in tmp_path.iterdir()}
+
+    for batch in range(3):
+        version = f"1:{batch + 1}"
+        index.apply_upsert(
+            [f"new{batch}"],
+            [{}],
+            ["text"],
+            np.array([[1.0, 1.0]], dtype=np.float32),
+            before=table.write(version),
+            after=version,
+        )
+    assert {path.name: path.stat().st_mtime_ns for path in tmp_path.iterdir()} == saved
+
+    assert index.ready()
+    other = table.index(tmp_path)
+    assert other.ready()
+    assert other.size == 6
+    assert table.reads == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["documents.json", "documents.npy"]
+
+
+def test_writes_without_a_version_remove_the_saved_files(table, tmp_path):
+    index = table.index(tmp_path)
+    index.ready()
+
+    index.apply_delete(["a"])
+
+    assert list(tmp_path.iterdir()) == []
+    assert index.size is None
+
+
+def test_delete_by_id_filter_and_all(table, tmp_path):
+    index = table.index(tmp_path)
+    index.ready()
+
+    index.apply_delete(["a"], before=table.write("1:1"), after="1:1")
+    assert sorted(ids(index.search([1.0, 0.0], limit=5))) == ["b", "c"]
+
+    index.apply_delete(metadata_filter={"doc_id": "report"}, before=table.write("1:2"), after="1:2")
+    assert ids(index.search([1.0, 0.0], limit=5)) == ["c"]
+
+    index.apply_delete(delete_all=True, before=table.write("1:3"), after="1:3")
+    assert index.ready()
+    assert index.search([1.0, 0.0], limit=5) == []
+    assert table.reads == 1
+
+
+def test_metadata_updates_replace_the_metadata_in_place(table, tmp_path):
+    index = table.index(tmp_path)
+    index.ready()
+
+    index.apply_metadata(["a"], [{"doc_id": "draft"}], before=table.write("1:1"), after="1:1")
+
+    assert ids(index.search([1.0, 0.0], limit=5, metadata_filter={"doc_id": "draft"})) == ["a"]
+    assert table.reads == 1
+
+
+def test_rebuilds_when_the_table_changed_some_other_way(table, tmp_path):
+    index = table.index(tmp_path)
+    index.ready()
+
+    # e.g. the table was dropped and re-seeded by another client
+    table.rows = [("z", {}, "zeta", [1.0, 0.0])]
+    table.write("2:1")
+
+    assert index.ready()
+    assert table.reads == 2
+    assert ids(index.search([1.0, 0.0], limit=5)) == ["z"]
+
+
+def test_a_write_from_a_stale_snapshot_is_dropped_and_rebuilt(table, tmp_path):
+    index = table.index(tmp_path)
+    index.ready()
+    table.write("1:5")  # another client's write
+
+    index.apply_delete(["a"], before="1:5", after="1:6")
+    table.rows = table.rows[1:]
+    table.write("1:6")
+
+    assert index.ready()
+    assert table.reads == 2
+    assert sorted(ids(index.search([1.0, 0.0], limit=5))) == ["b", "c"]
+
+
+def test_other_processes_load_the_saved_snapshot(table, tmp_path):
+    table.index(tmp_path).ready()
+
+    other = table.index(tmp_path)
+
+    assert other.ready()
+    assert table.reads == 1
+    assert other.size == 3
+
+
+def test_tables_over_max_rows_are_searched_in_the_database(table, tmp_path):
+    index = table.index(tmp_path, max_rows=2)
+
+    assert not index.ready()
+    assert not index.ready()
+    assert table.reads == 1
+
+    table.rows = table.rows[:2]
+    table.write("1:1")
+
+    assert index.ready()
+    assert table.reads == 2
+    assert index.size == 2
+
+
+def test_delete_files(table, tmp_path):
+    index = table.index(tmp_path)
+    index.ready()
+
+    index.delete_files()
+
+    assert list(tmp_path.iterdir()) == []
+    assert index.size is None
@@ -0,0 +1,68 @@
+from app.services.metrics import Counter, Histogram, MetricsRegistry
+
+
+def test_counter_renders_a_sample_per_label_combination():
+    counter = Counter("rag_requests_total", "Search requests", ["endpoint"])
+    counter.inc(endpoint="/search")
+    counter.inc(2, endpoint="/search")
+    counter.inc(0.5, endpoint="/api")
+
+    assert counter.render() == [
+        "# HELP rag_requests_total Search requests",
+        "# TYPE rag_requests_total counter",
+        'rag_requests_total{endpoint="/api"} 0.5',
+        'rag_requests_total{endpoint="/search"} 3',
+    ]
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    histogram = Histogram("rag_latency_seconds", "Latency", ["stage"], buckets=[0.1, 1])
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, stage="embed")
+
+    assert histogram.render() == [
+        "# HELP rag_latency_seconds Latency",
+        "# TYPE rag_latency_seconds histogram",
+        'rag_latency_seconds_bucket{stage="embed",le="0.1"} 2',
+        'rag_latency_seconds_bucket{stage="embed",le="1"} 3',
+        'rag_latency_seconds_bucket{stage="embed",le="+Inf"} 4',
+        'rag_latency_seconds_sum{stage="embed"} 3.65',
+        'rag_latency_seconds_count{stage="embed"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("rag_errors_total", "Errors", ["error"])
+    counter.inc(error='bad "quote" \\ and\nnewline')
+
+    assert counter.render()[-1] == (
+        'rag_errors_total{error="bad \\"quote\\" \\\\ and\\nnewline"} 1'
+    )
+
+
+def test_unlabelled_metrics_have_no_braces():
+    histogram = Histogram("rag_seconds", "Seconds", buckets=[1])
+    histogram.observe(2)
+
+    assert histogram.render()[2:] == [
+        'rag_seconds_bucket{le="1"} 0',
+        'rag_seconds_bucket{le="+Inf"} 1',
+        "rag_seconds_sum 2",
+        "rag_seconds_count 1",
+    ]
+
+
+def test_registry_reuses_metrics_and_renders_them_all():
+    registry = MetricsRegistry()
+    first = registry.counter("rag_requests_total", "Search requests", ["endpoint"])
+    again = registry.counter("rag_requests_total", "Search requests", ["endpoint"])
+    registry.histogram("rag_latency_seconds", "Latency", buckets=[1]).observe(0.5)
+    first.inc(endpoint="/search")
+
+    text = registry.render()
+
+    assert again is first
+    assert text.endswith("\n")
+    assert text.count("# TYPE rag_requests_total counter") == 1
+    assert 'rag_requests_total{endpoint="/search"} 1\n' in text
+    assert 'rag_latency_seconds_bucket{le="1"} 1\n' in text
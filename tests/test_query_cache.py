@@ -0,0 +1,96 @@
+from app.services import query_cache
+from app.services.query_cache import QueryResultCache, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  What is  the Green-Bond framework?") == (
+        "what is the green bond framework"
+    )
+
+
+def test_exact_hits_match_the_normalized_query():
+    cache = QueryResultCache()
+    cache.put("Green bonds?", [1.0, 0.0], "result")
+
+    assert cache.get_exact("green   BONDS") == "result"
+    assert cache.get_exact("green loans") is None
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_similar_hits_need_the_similarity_threshold():
+    cache = QueryResultCache(similarity_threshold=0.95)
+    cache.put("green bonds", [1.0, 0.0, 0.0], "bonds")
+    cache.put("loan book", [0.0, 1.0, 0.0], "loans")
+
+    assert cache.get_similar([0.99, 0.05, 0.0]) == "bonds"
+    assert cache.get_similar([0.0, 0.98, 0.1]) == "loans"
+    assert cache.get_similar([0.7, 0.7, 0.0]) is None
+    assert cache.stats() == {"exact_hits": 0, "similar_hits": 2, "misses": 1, "size": 2}
+
+
+def test_evicts_the_least_recently_used_entry():
+    cache = QueryResultCache(max_entries=2)
+    cache.put("a", [1.0, 0.0], "A")
+    cache.put("b", [0.0, 1.0], "B")
+    assert cache.get_exact("a") == "A"  # "b" is now least recently used
+
+    cache.put("c", [0.7, 0.7], "C")
+
+    assert cache.get_exact("b") is None
+    assert cache.get_similar([0.0, 1.0]) is None
+    assert cache.get_exact("a") == "A"
+    assert cache.get_similar([1.0, 0.0]) == "A"
+
+
+def test_similar_hits_count_as_use_for_eviction():
+    cache = QueryResultCache(max_entries=2)
+    cache.put("a", [1.0, 0.0], "A")
+    cache.put("b", [0.0, 1.0], "B")
+    assert cache.get_similar([1.0, 0.01]) == "A"
+
+    cache.put("c", [0.7, 0.7], "C")
+
+    assert cache.get_exact("a") == "A"
+    assert cache.get_exact("b") is None
+
+
+def test_replacing_an_entry_reuses_its_matrix_row():
+    cache = QueryResultCache(max_entries=2)
+    for i in range(10):
+        cache.put("a", [1.0, float(i)], i)
+
+    assert cache.stats()["size"] == 1
+    assert cache.get_similar([1.0, 9.0]) == 9
+
+
+def test_entries_expire(clock, monkeypatch):
+    monkeypatch.setattr(query_cache, "time", clock)
+    cache = QueryResultCache(ttl_seconds=60)
+    cache.put("a", [1.0, 0.0], "A")
+
+    clock.sleep(61)
+
+    assert cache.get_exact("a") is None
+    assert cache.get_similar([1.0, 0.0]) is None
+
+
+def test_invalidate_drops_everything():
+    cache = QueryResultCache()
+    cache.put("a", [1.0, 0.0], "A")
+
+    cache.invalidate()
+
+    assert cache.get_exact("a") is None
+    assert cache.get_similar([1.0, 0.0]) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_entries_without_or_with_other_sized_embeddings_only_hit_exactly():
+    cache = QueryResultCache()
+    cache.put("a", None, "A")
+    cache.put("b", [1.0, 0.0], "B")
+    cache.put("c", [1.0, 0.0, 0.0], "C")
+
+    assert cache.get_exact("a") == "A"
+    assert cache.get_exact("c") == "C"
+    assert cache.get_similar([1.0, 0.0, 0.0]) is None
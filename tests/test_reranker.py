@@ -0,0 +1,41 @@
+import threading
+from collections import OrderedDict
+
+from app.services.reranker import LocalCrossEncoderReranker
+
+
+def reranker():
+    """A LocalCrossEncoderReranker whose model scores documents by length."""
+    reranker = LocalCrossEncoderReranker.__new__(LocalCrossEncoderReranker)
+    reranker.cache_size = 100
+    reranker._scores = OrderedDict()
+    reranker._lock = threading.Lock()
+    reranker.scored = []
+
+    def score(documents, query):
+        reranker.scored.extend(documents)
+        return [float(len(document)) for document in documents]
+
+    reranker._score = score
+    return reranker
+
+
+def test_scores_are_reused_for_the_same_normalized_query():
+    local = reranker()
+
+    assert local.rerank("Green bonds?", ["a", "bbb"], top_n=2, ids=["1", "2"]) == [
+        (1, 3.0),
+        (0, 1.0),
+    ]
+    local.rerank("green  bonds", ["a", "bbb"], top_n=2, ids=["1", "2"])
+
+    assert local.scored == ["a", "bbb"]
+
+
+def test_changed_contents_under_the_same_id_are_scored_again():
+    local = reranker()
+
+    local.rerank("green bonds", ["old text"], top_n=1, ids=["1"])
+    assert local.rerank("green bonds", ["new"], top_n=1, ids=["1"]) == [(0, 3.0)]
+
+    assert local.scored == ["old text", "new"]
@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+from app.database.vector_store import VectorStore
+
+
+def named_params(sql):
+    return set(re.findall(r"%\((\w+)\)s", sql))
+
+
+@pytest.mark.parametrize("binary_quantization", [False, True])
+def test_fused_search_binds_every_parameter(settings, binary_quantization):
+    settings = settings.model_copy(
+        update={
+            "index": settings.index.model_copy(
+                update={"binary_quantization": binary_quantization}
+            )
+        }
+    )
+    vec = VectorStore(settings)
+
+    sql = vec._fused_search_sql()
+    params = vec._fused_search_params([0.1, 0.2], "loan & rate", 5, 4, None)
+
+    # Unbound names fail at execution; only the binary quantization candidate
+    # count may go unused
+    assert named_params(sql) <= set(params)
+    assert set(params) - named_params(sql) == (
+        set() if binary_quantization else {"semantic_candidates"}
+    )
+    assert "%s" not in sql
+    assert params["limit"] == 9
+    assert params["semantic_candidates"] == 4 * settings.search.binary_rescore_factor
+    assert ("<~>" in sql) == binary_quantization
+
+
+def test_keyword_search_takes_query_and_limit(settings):
+    sql = VectorStore(settings)._keyword_search_sql()
+
+    assert sql.count("%s") == 2
+    assert named_params(sql) == set()
+
+
+def test_results_carry_metadata():
+    metadata = {"doc_id": "report", "chunk_id": "abc"}
+
+    keyword = VectorStore._keyword_results([("1", "text", 0.5, metadata)])
+    fused = VectorStore._fused_results(
+        [("1", "text", 0.03, 1, 2, metadata), ("2", "more", 0.01, None, 1, {})]
+    )
+
+    assert keyword[0].metadata == metadata
+    assert keyword[0].text_rank == 0.5
+    assert [r.search_type for r in fused] == ["hybrid", "keyword"]
+    assert fused[0].metadata == metadata
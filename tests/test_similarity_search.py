@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from app import similarity_search
+from app.services.query_cache import QueryResultCache
+from app.services.synthesizer import SynthesizedResponse, Synthesizer
+from app.similarity_search import SearchService, query_from_body
+
+
+class PartialResponse(BaseModel):
+    """Like the partial objects instructor streams: every field may still be missing."""
+
+    thought_process: Optional[List[str]] = None
+    sections: Optional[List[dict]] = None
+    key_points: Optional[List[str]] = None
+    sources: Optional[List[str]] = None
+    enough_context: Optional[bool] = None
+
+
+def make_service(monkeypatch, partials):
+    executor = ThreadPoolExecutor(max_workers=1)
+    service = SearchService.__new__(SearchService)
+    service.vec = SimpleNamespace(
+        check_for_changes=lambda: None,
+        executor=executor,
+        build_keyword_query=lambda query: query,
+        get_embedding=lambda query: [1.0, 0.0],
+        hybrid_search=lambda **kwargs: [],
+    )
+    service.cache = QueryResultCache()
+    monkeypatch.setattr(
+        Synthesizer, "stream_response", staticmethod(lambda question, context: iter(partials))
+    )
+    monkeypatch.setattr(similarity_search, "_search_limits", lambda: {})
+    return service
+
+
+def test_stream_search_caches_the_validated_response(monkeypatch):
+    service = make_service(
+        monkeypatch,
+        [
+            PartialResponse(thought_process=["t"]),
+            PartialResponse(thought_process=["t"], key_points=["k"], enough_context=True),
+        ],
+    )
+
+    events = list(service.stream_search("What is the loan rate?"))
+
+    assert events[-1].startswith("event: done")
+    cached = service.perform_search("what is the loan rate")
+    assert isinstance(cached, SynthesizedResponse)
+    assert cached.key_points == ["k"]
+    assert cached.enough_context is True
+
+
+def test_stream_search_does_not_cache_an_incomplete_response(monkeypatch):
+    service = make_service(monkeypatch, [PartialResponse(key_points=["k"])])
+
+    list(service.stream_search("What is the loan rate?"))
+
+    assert service.cache.get_exact("What is the loan rate?") is None
+
+
+@pytest.mark.parametrize("body", [None, [], {}, {"query": ""}, {"query": "  "}, {"query": 3}])
+def test_query_from_body_rejects_missing_queries(body):
+    with pytest.raises(ValueError):
+        query_from_body(body)
+
+
+def test_query_from_body():
+    assert query_from_body({"query": "loan rate", "timings": True}) == "loan rate"
@@ -0,0 +1,59 @@
+import os
+
+from app.services import synonyms
+from app.services.synonyms import SynonymTable
+
+
+def test_lookup_finds_every_term_by_binary_search(tmp_path):
+    path = str(tmp_path / "synonyms.tsv")
+    table = {f"term{i:04d}": [f"syn{i}a", f"syn{i}b"] for i in range(500)}
+    table["ålesund"] = ["aalesund"]
+    SynonymTable.write(path, table)
+    lookup = SynonymTable(path, max_expansions=3)
+
+    for term, values in table.items():
+        assert lookup.lookup(term) == values
+    assert lookup.lookup("TERM0042") == ["syn42a", "syn42b"]
+    assert lookup.lookup("term9999") == []
+    assert lookup.lookup("a") == []
+    assert lookup.lookup("zzz") == []
+
+
+def test_lookup_returns_at_most_max_expansions(tmp_path):
+    path = str(tmp_path / "synonyms.tsv")
+    SynonymTable.write(path, {"loan": ["credit", "advance", "mortgage", "lending"]})
+
+    assert SynonymTable(path, max_expansions=2).lookup("loan") == ["credit", "advance"]
+
+
+def test_expand_keeps_keywords_first_without_duplicates(tmp_path):
+    path = str(tmp_path / "synonyms.tsv")
+    SynonymTable.write(path, {"loan": ["credit"], "credit": ["loan", "debt"]})
+
+    assert SynonymTable(path).expand(["loan", "credit"]) == ["loan", "credit", "debt"]
+
+
+def test_missing_file_expands_nothing(tmp_path):
+    table = SynonymTable(str(tmp_path / "missing.tsv"))
+
+    assert table.lookup("loan") == []
+    assert table.expand(["loan"]) == ["loan"]
+
+
+def test_remaps_a_replaced_file(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(synonyms, "time", clock)
+    path = str(tmp_path / "synonyms.tsv")
+    SynonymTable.write(path, {"loan": ["credit"]})
+    table = SynonymTable(path, check_seconds=1.0)
+    assert table.lookup("loan") == ["credit"]
+
+    SynonymTable.write(path, {"loan": ["advance"], "bond": ["debenture"]})
+    assert table.lookup("bond") == []  # not checked again yet
+    clock.sleep(1.0)
+
+    assert table.lookup("loan") == ["advance"]
+    assert table.lookup("bond") == ["debenture"]
+
+    os.remove(path)
+    clock.sleep(1.0)
+    assert table.lookup("loan") == []
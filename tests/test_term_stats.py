@@ -0,0 +1,19 @@
+from types import SimpleNamespace
+
+from app.database.term_stats import TermStatistics
+
+
+def test_the_table_is_created_once_before_the_first_write():
+    store = SimpleNamespace(vector_settings=SimpleNamespace(table_name="documents"))
+    term_stats = TermStatistics(store)
+    created = []
+
+    def create_table():
+        created.append(term_stats.table_name)
+        term_stats._table_ready = True
+
+    term_stats.create_table = create_table
+    term_stats.ensure_table()
+    term_stats.ensure_table()
+
+    assert created == ["documents_term_stats"]